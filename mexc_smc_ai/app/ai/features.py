@@ -1,31 +1,126 @@
 """Construção de features para IA auxiliar."""
 from __future__ import annotations
 
+import math
+
+import numpy as np
 import pandas as pd
 
 from app.core.models import OrderBlock
+from app.indicators.divergence import last_row_divergence
 
+# Ordem fixa das colunas da matriz de features (e do vetor usado no treino).
+FEATURE_COLUMNS = (
+    "distance_to_ob",
+    "rsi",
+    "rsi_slope",
+    "bull_div",
+    "bear_div",
+    "volume_ratio",
+    "bias_bull",
+    "bias_bear",
+    "profile_scalp",
+    "profile_day",
+    "profile_swing",
+)
+VOLUME_WINDOW = 20
 
-def build_features(
-    frame: pd.DataFrame,
-    ob: OrderBlock,
-    bias: str,
-    profile: str,
-) -> dict:
+
+def frame_features(frame: pd.DataFrame) -> dict:
+    """Features que só dependem do último candle do frame (calculadas uma vez por frame)."""
     last = frame.iloc[-1]
-    distance = abs(last["close"] - ((ob.low + ob.high) / 2)) / last["close"]
-    rsi_slope = frame["rsi"].diff().iloc[-1]
-    volume_ratio = last["volume"] / frame["volume"].rolling(20).mean().iloc[-1]
+    rsi = frame["rsi"].to_numpy(dtype=float)
+    volumes = frame["volume"].to_numpy(dtype=float)
+    rsi_slope = rsi[-1] - rsi[-2] if len(rsi) > 1 else math.nan
+    volume_mean = volumes[-VOLUME_WINDOW:].mean() if len(volumes) >= VOLUME_WINDOW else math.nan
+    volume_ratio = last["volume"] / volume_mean
     return {
-        "distance_to_ob": float(distance),
+        "close": float(last["close"]),
         "rsi": float(last["rsi"]),
         "rsi_slope": float(rsi_slope),
         "bull_div": int(last.get("bull_divergence", False)),
         "bear_div": int(last.get("bear_divergence", False)),
         "volume_ratio": float(volume_ratio) if volume_ratio == volume_ratio else 0.0,
+    }
+
+
+def candidate_features(base: dict, ob: OrderBlock, bias: str, profile: str) -> dict:
+    return {
+        "distance_to_ob": float(abs(base["close"] - ((ob.low + ob.high) / 2)) / base["close"]),
+        "rsi": base["rsi"],
+        "rsi_slope": base["rsi_slope"],
+        "bull_div": base["bull_div"],
+        "bear_div": base["bear_div"],
+        "volume_ratio": base["volume_ratio"],
         "bias_bull": int(bias == "bullish"),
         "bias_bear": int(bias == "bearish"),
         "profile_scalp": int(profile == "scalping"),
         "profile_day": int(profile == "daytrade"),
         "profile_swing": int(profile == "swing"),
     }
+
+
+def build_features(
+    frame: pd.DataFrame,
+    ob: OrderBlock,
+    bias: str,
+    profile: str,
+) -> dict:
+    return candidate_features(frame_features(frame), ob, bias, profile)
+
+
+def build_feature_matrix(
+    frame: pd.DataFrame,
+    candidates: list[tuple[OrderBlock, str]],
+    bias: str,
+) -> np.ndarray:
+    """Uma linha por (OB, perfil), nas colunas de `FEATURE_COLUMNS`."""
+    base = frame_features(frame)
+    matrix = np.empty((len(candidates), len(FEATURE_COLUMNS)), dtype=float)
+    for row, (ob, profile) in enumerate(candidates):
+        features = candidate_features(base, ob, bias, profile)
+        matrix[row] = [features[column] for column in FEATURE_COLUMNS]
+    return matrix
+
+
+def history_features(frame: pd.DataFrame, pivot_right: int) -> dict[str, np.ndarray]:
+    """`frame_features` de cada candle de um histórico enriquecido, calculadas de uma vez."""
+    rsi = frame["rsi"].to_numpy(dtype=float)
+    volumes = frame["volume"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_ratio = volumes / frame["volume"].rolling(VOLUME_WINDOW).mean().to_numpy(dtype=float)
+    volume_ratio[np.isnan(volume_ratio)] = 0.0
+    bull, bear = last_row_divergence(frame, pivot_right)
+    return {
+        "close": frame["close"].to_numpy(dtype=float),
+        "rsi": rsi,
+        "rsi_slope": np.diff(rsi, prepend=np.nan),
+        "bull_div": bull.astype(int),
+        "bear_div": bear.astype(int),
+        "volume_ratio": volume_ratio,
+    }
+
+
+def history_feature_matrix(
+    base: dict[str, np.ndarray],
+    positions: np.ndarray,
+    ob_mids: np.ndarray,
+    biases: np.ndarray,
+    profiles: np.ndarray,
+) -> np.ndarray:
+    """Matriz de `FEATURE_COLUMNS` para eventos (candle, OB, bias, perfil) dados em vetores paralelos."""
+    close = base["close"][positions]
+    columns = {
+        "distance_to_ob": np.abs(close - ob_mids) / close,
+        "rsi": base["rsi"][positions],
+        "rsi_slope": base["rsi_slope"][positions],
+        "bull_div": base["bull_div"][positions],
+        "bear_div": base["bear_div"][positions],
+        "volume_ratio": base["volume_ratio"][positions],
+        "bias_bull": biases == "bullish",
+        "bias_bear": biases == "bearish",
+        "profile_scalp": profiles == "scalping",
+        "profile_day": profiles == "daytrade",
+        "profile_swing": profiles == "swing",
+    }
+    return np.column_stack([np.asarray(columns[column], dtype=float) for column in FEATURE_COLUMNS])
@@ -1,62 +1,316 @@
 """Modelo IA auxiliar (plugável)."""
 from __future__ import annotations
 
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+
 import numpy as np
 
+from app.ai.features import FEATURE_COLUMNS
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
+from app.core.metrics import METRICS
 
 
 LOGGER = get_logger(__name__)
 
+# Versão do layout do diretório do artefato (metadata.json + vetores .npy).
+ARTIFACT_VERSION = 1
+MODEL_TYPES = ("logistic_regression", "hist_gradient_boosting")
+
 
 class BaseModel:
     def predict_proba(self, features: dict) -> float:
+        vector = np.array([[features[column] for column in FEATURE_COLUMNS]], dtype=float)
+        return float(self.predict_proba_batch(vector)[0])
+
+    def predict_proba_batch(self, matrix: np.ndarray) -> np.ndarray:
+        """Probabilidades para uma matriz no layout de `FEATURE_COLUMNS`."""
         raise NotImplementedError
 
 
-class LogisticRegressionModel(BaseModel):
+class SklearnModel(BaseModel):
+    """Estimador do scikit-learn treinado em processo (sem treino, devolve 0.5).
+
+    O estimador (e o import do scikit-learn) só é criado no primeiro `fit`.
+    """
+
+    name = ""
+
     def __init__(self) -> None:
-        try:
-            from sklearn.linear_model import LogisticRegression
+        self.trained = False
+        self.model = None
 
-            self.model = LogisticRegression()
-            self.trained = False
-        except Exception as exc:
-            log_event(
-                LOGGER,
-                "model_init_failed",
-                message="Falha ao iniciar LogisticRegression",
-                error=str(exc),
-                level="warning",
-            LOGGER.warning(
-                "model_init_failed",
-                extra={"message": "Falha ao iniciar LogisticRegression", "error": str(exc)},
-            )
-            self.model = None
-            self.trained = False
+    def _estimator(self):
+        raise NotImplementedError
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
         if self.model is None:
-            return
+            try:
+                self.model = self._estimator()
+            except Exception as exc:
+                log_event(
+                    LOGGER,
+                    "model_init_failed",
+                    message=f"Falha ao iniciar {self.name}",
+                    error=str(exc),
+                    level="warning",
+                )
+                return
         self.model.fit(X, y)
         self.trained = True
 
-    def predict_proba(self, features: dict) -> float:
-        if self.model is None or not self.trained:
-            return 0.5
-        vector = np.array([list(features.values())])
-        return float(self.model.predict_proba(vector)[0][1])
-
-
-def build_model(model_type: str) -> BaseModel:
-    if model_type == "logistic_regression":
-        return LogisticRegressionModel()
-    log_event(
-        LOGGER,
-        "unknown_model",
-        message="Modelo desconhecido, usando fallback",
-        level="warning",
+    def predict_proba_batch(self, matrix: np.ndarray) -> np.ndarray:
+        if self.model is None or not self.trained or not len(matrix):
+            return np.full(len(matrix), 0.5)
+        return self.model.predict_proba(matrix)[:, 1]
+
+
+class LogisticRegressionModel(SklearnModel):
+    name = "LogisticRegression"
+
+    def _estimator(self):
+        from sklearn.linear_model import LogisticRegression
+
+        return LogisticRegression()
+
+
+class HistGradientBoostingModel(SklearnModel):
+    name = "HistGradientBoostingClassifier"
+
+    def _estimator(self):
+        from sklearn.ensemble import HistGradientBoostingClassifier
+
+        return HistGradientBoostingClassifier()
+
+
+def _sigmoid(scores: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-scores))
+
+
+def linear_proba(params: dict[str, np.ndarray], matrix: np.ndarray) -> np.ndarray:
+    """Sigmoide de uma regressão logística sobre features padronizadas."""
+    scores = ((matrix - params["mean"]) / params["scale"]) @ params["coef"] + params["intercept"][0]
+    return _sigmoid(scores)
+
+
+def tree_proba(params: dict[str, np.ndarray], matrix: np.ndarray) -> np.ndarray:
+    """Percorre todas as árvores exportadas de uma vez, um nível por iteração.
+
+    Mesma regra do `HistGradientBoostingClassifier`: `x <= limiar` vai para a
+    esquerda e NaN segue `tree_missing_left`.
+    """
+    leaf = params["tree_leaf"]
+    rows = np.arange(len(matrix))[:, None]
+    nodes = np.repeat(np.asarray(params["tree_roots"])[None, :], len(matrix), axis=0)
+    active = ~leaf[nodes]
+    while active.any():
+        values = matrix[rows, params["tree_feature"][nodes]]
+        go_left = np.where(np.isnan(values), params["tree_missing_left"][nodes], values <= params["tree_threshold"][nodes])
+        nodes = np.where(active, np.where(go_left, params["tree_left"][nodes], params["tree_right"][nodes]), nodes)
+        active = ~leaf[nodes]
+    return _sigmoid(params["tree_baseline"][0] + params["tree_value"][nodes].sum(axis=1))
+
+
+def read_metadata(path: str | Path) -> dict:
+    return json.loads((Path(path) / "metadata.json").read_text(encoding="utf-8"))
+
+
+class ArtifactModel(BaseModel):
+    """Modelo treinado offline (`app.ai.training`), servido só com NumPy.
+
+    Os vetores só são lidos na primeira predição, mapeados via mmap. Se o
+    schema de features gravado não bater com `FEATURE_COLUMNS`, o modelo se
+    comporta como não treinado (0.5).
+    """
+
+    PARAMS: tuple[str, ...] = ()
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.params: dict[str, np.ndarray] | None = None
+        self.metadata: dict = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        self.metadata = read_metadata(self.path)
+        if (
+            self.metadata.get("artifact_version") != ARTIFACT_VERSION
+            or tuple(self.metadata.get("feature_columns", ())) != FEATURE_COLUMNS
+        ):
+            log_event(
+                LOGGER,
+                "model_schema_mismatch",
+                message="Artefato incompatível com as features atuais, usando probabilidade neutra",
+                path=str(self.path),
+                artifact_version=self.metadata.get("artifact_version"),
+                level="warning",
+            )
+            return
+        self.params = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in self.PARAMS}
+        log_event(LOGGER, "model_loaded", message="Artefato de modelo carregado", path=str(self.path), model=type(self).__name__)
+
+    @property
+    def trained(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self.params is not None
+
+    def _score(self, matrix: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_proba_batch(self, matrix: np.ndarray) -> np.ndarray:
+        if not self.trained or not len(matrix):
+            return np.full(len(matrix), 0.5)
+        return self._score(matrix)
+
+
+class LinearArtifactModel(ArtifactModel):
+    PARAMS = ("mean", "scale", "coef", "intercept")
+
+    def _score(self, matrix: np.ndarray) -> np.ndarray:
+        return linear_proba(self.params, matrix)
+
+
+class TreeArtifactModel(ArtifactModel):
+    PARAMS = (
+        "tree_roots",
+        "tree_feature",
+        "tree_threshold",
+        "tree_missing_left",
+        "tree_left",
+        "tree_right",
+        "tree_leaf",
+        "tree_value",
+        "tree_baseline",
     )
-    LOGGER.warning("unknown_model", extra={"message": "Modelo desconhecido, usando fallback"})
-    return LogisticRegressionModel()
+
+    def _score(self, matrix: np.ndarray) -> np.ndarray:
+        return tree_proba(self.params, matrix)
+
+
+@dataclass
+class LatencyStats:
+    calls: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    over_budget: int = 0
+    fallback_calls: int = 0
+
+    def record(self, elapsed_ms: float, rows: int) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def ms_per_prediction(self) -> float:
+        return self.total_ms / self.rows if self.rows else 0.0
+
+
+class BudgetedModel(BaseModel):
+    """Mede a latência de cada lote e troca para o scorer barato quando o orçamento estoura.
+
+    Depois de estourar `budget_ms`, os próximos `probe_every` lotes vão para
+    `fallback`; então o modelo principal é testado de novo e volta a valer se
+    couber no orçamento. Além de `latency`, tudo sai em `METRICS`
+    (`model_latency_seconds`, `model_seconds_per_prediction`,
+    `model_over_budget_total`, `model_fallback_total` e `model_degraded`).
+    """
+
+    def __init__(
+        self,
+        primary: BaseModel,
+        fallback: BaseModel | None = None,
+        budget_ms: float | None = None,
+        probe_every: int = 100,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.budget_ms = budget_ms
+        self.probe_every = probe_every
+        self.latency = LatencyStats()
+        self.degraded = False
+        self._skipped = 0
+
+    def predict_proba_batch(self, matrix: np.ndarray) -> np.ndarray:
+        if self.degraded and self._skipped < self.probe_every:
+            self._skipped += 1
+            self.latency.fallback_calls += 1
+            METRICS.inc("model_fallback_total")
+            return self.fallback.predict_proba_batch(matrix)
+        started = perf_counter()
+        scores = self.primary.predict_proba_batch(matrix)
+        elapsed_ms = (perf_counter() - started) * 1000
+        self.latency.record(elapsed_ms, len(matrix))
+        METRICS.observe("model_latency_seconds", elapsed_ms / 1000)
+        METRICS.set("model_seconds_per_prediction", self.latency.ms_per_prediction / 1000)
+        if self.budget_ms is None or self.fallback is None:
+            return scores
+        if elapsed_ms > self.budget_ms:
+            self.latency.over_budget += 1
+            METRICS.inc("model_over_budget_total")
+            if not self.degraded:
+                log_event(
+                    LOGGER,
+                    "model_latency_exceeded",
+                    message="Inferência acima do orçamento de latência, usando scorer linear",
+                    elapsed_ms=round(elapsed_ms, 3),
+                    budget_ms=self.budget_ms,
+                    rows=len(matrix),
+                    level="warning",
+                )
+            self.degraded = True
+            self._skipped = 0
+            METRICS.set("model_degraded", 1)
+        elif self.degraded:
+            self.degraded = False
+            METRICS.set("model_degraded", 0)
+            log_event(LOGGER, "model_latency_recovered", message="Modelo principal de volta ao orçamento de latência")
+        return scores
+
+
+def build_model(
+    model_type: str,
+    artifact_path: str | None = None,
+    latency_budget_ms: float | None = None,
+) -> BudgetedModel:
+    """Artefato treinado (NumPy puro) quando existe; senão, o estimador do scikit-learn de `model_type`.
+
+    Sem artefato, o estimador fica sem treino (0.5) e o scikit-learn nem é importado.
+
+    Artefatos de árvores também trazem a regressão linear, usada como scorer
+    barato quando a inferência passa de `latency_budget_ms`.
+    """
+    if model_type not in MODEL_TYPES:
+        log_event(
+            LOGGER,
+            "unknown_model",
+            message="Modelo desconhecido, usando fallback",
+            model_type=model_type,
+            level="warning",
+        )
+        model_type = "logistic_regression"
+    if artifact_path and (Path(artifact_path) / "metadata.json").exists():
+        trained_type = read_metadata(artifact_path).get("model_type", "logistic_regression")
+        if trained_type != model_type:
+            log_event(
+                LOGGER,
+                "model_type_mismatch",
+                message="Artefato treinado com outro tipo de modelo; usando o artefato",
+                configured=model_type,
+                artifact=trained_type,
+                level="warning",
+            )
+        linear = LinearArtifactModel(artifact_path)
+        if trained_type == "hist_gradient_boosting":
+            return BudgetedModel(TreeArtifactModel(artifact_path), fallback=linear, budget_ms=latency_budget_ms)
+        return BudgetedModel(linear)
+    if model_type == "hist_gradient_boosting":
+        return BudgetedModel(HistGradientBoostingModel())
+    return BudgetedModel(LogisticRegressionModel())
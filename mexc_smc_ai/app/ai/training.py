@@ -0,0 +1,297 @@
+"""Treino offline do filtro de IA sobre o histórico em disco."""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.ai.features import FEATURE_COLUMNS, history_feature_matrix, history_features
+from app.ai.model import ARTIFACT_VERSION, linear_proba, tree_proba
+from app.core.logger import get_logger, log_event
+from app.core.timeframes import timeframe_delta
+from app.engine.paper_broker import STOP_ATR_BUFFER, TRAILING_ATR_MULT
+from app.engine.signal_engine import enrich_frame
+from app.smc.bias import bias_codes, composite_codes
+from app.smc.order_blocks import order_blocks_by_confirmation
+
+
+LOGGER = get_logger(__name__)
+
+# Candles examinados por vez ao procurar a saída de cada trade simulado.
+EXIT_BLOCK = 256
+# Faixa do scikit-learn em que `export_trees` foi testado (mesma do pyproject).
+SKLEARN_SUPPORTED = ">=1.4,<1.10"
+TREE_NODE_FIELDS = {"feature_idx", "num_threshold", "missing_go_to_left", "left", "right", "is_leaf", "value"}
+
+
+@dataclass
+class TrainingSet:
+    features: np.ndarray
+    labels: np.ndarray
+    times: np.ndarray  # open_time (ns) do candle do toque, para o corte cronológico
+    pnl: np.ndarray
+
+
+def touch_positions(
+    highs: np.ndarray,
+    lows: np.ndarray,
+    closes: np.ndarray,
+    ob_low: float,
+    ob_high: float,
+    bullish: bool,
+    active_from: int,
+    max_age_bars: int,
+) -> np.ndarray:
+    """Candles em que o OB, ativo a partir de `active_from`, seria devolvido por `registry.touched`.
+
+    O OB sai do registro no primeiro fechamento que o invalida (o toque desse
+    candle já não conta) ou depois de `max_age_bars` candles.
+    """
+    stop = min(len(closes), active_from + max_age_bars + 1)
+    closes = closes[active_from:stop]
+    invalid = np.flatnonzero(closes < ob_low if bullish else closes > ob_high)
+    if len(invalid):
+        stop = active_from + int(invalid[0])
+        closes = closes[: invalid[0]]
+    highs = highs[active_from:stop]
+    lows = lows[active_from:stop]
+    touched = ((lows <= ob_high) & (highs >= ob_low)) | ((closes >= ob_low) & (closes <= ob_high))
+    return active_from + np.flatnonzero(touched)
+
+
+def simulate_exit(
+    entry_pos: int,
+    stop: float,
+    buy: bool,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    closes: np.ndarray,
+    atrs: np.ndarray,
+) -> float:
+    """Preço de saída do trailing stop do `PaperBroker` para um trade aberto em `entry_pos` (NaN se não fecha)."""
+    start = entry_pos + 1
+    while start < len(closes):
+        end = min(len(closes), start + EXIT_BLOCK)
+        if buy:
+            stops = np.maximum(stop, np.maximum.accumulate(closes[start:end] - TRAILING_ATR_MULT * atrs[start:end]))
+            hit = np.flatnonzero(lows[start:end] <= stops)
+        else:
+            stops = np.minimum(stop, np.minimum.accumulate(closes[start:end] + TRAILING_ATR_MULT * atrs[start:end]))
+            hit = np.flatnonzero(highs[start:end] >= stops)
+        if len(hit):
+            return float(stops[hit[0]])
+        stop = float(stops[-1])
+        start = end
+    return float("nan")
+
+
+def build_training_set(
+    config: dict,
+    frame: pd.DataFrame,
+    higher: list[pd.DataFrame],
+    symbol: str,
+    timeframe: str,
+) -> TrainingSet:
+    """Um exemplo por (toque em OB, perfil habilitado), com rótulo = trade simulado lucrativo.
+
+    Usa todos os toques, sem os filtros de confluência: o modelo aprende a
+    ordenar candidatos, e os filtros continuam valendo ao vivo. Toques cujo
+    trade não fecha até o fim do histórico ficam de fora.
+    """
+    settings = config["order_block"]
+    frame = frame.sort_values("open_time").reset_index(drop=True)
+    enriched = enrich_frame(frame, config)
+    pending = order_blocks_by_confirmation(enriched, symbol, timeframe, settings)
+    base = history_features(enriched, settings["pivot_right"])
+    highs = enriched["high"].to_numpy(dtype=float)
+    lows = enriched["low"].to_numpy(dtype=float)
+    closes = base["close"]
+    atrs = enriched["atr"].to_numpy(dtype=float)
+
+    positions: list[int] = []
+    mids: list[float] = []
+    pnl: list[float] = []
+    for active_from, blocks in pending.items():
+        if active_from >= len(frame):
+            continue
+        for ob in blocks:
+            buy = ob.direction == "bull"
+            touches = touch_positions(highs, lows, closes, ob.low, ob.high, buy, active_from, settings.get("max_age_bars", 500))
+            for pos in touches:
+                stop = ob.low - atrs[pos] * STOP_ATR_BUFFER if buy else ob.high + atrs[pos] * STOP_ATR_BUFFER
+                exit_price = simulate_exit(pos, stop, buy, highs, lows, closes, atrs)
+                if exit_price != exit_price:
+                    continue
+                positions.append(int(pos))
+                mids.append((ob.low + ob.high) / 2)
+                pnl.append(exit_price - closes[pos] if buy else closes[pos] - exit_price)
+
+    profiles = np.array([name for name, profile in config["profiles"].items() if profile["enabled"]])
+    at = np.repeat(np.asarray(positions, dtype=int), len(profiles))
+    moments = (frame["open_time"] + timeframe_delta(timeframe)).iloc[at]
+    biases = composite_codes([bias_codes(htf, moments) for htf in higher], len(at))
+    features = history_feature_matrix(
+        base,
+        at,
+        np.repeat(np.asarray(mids, dtype=float), len(profiles)),
+        biases,
+        np.tile(profiles, len(positions)),
+    )
+    pnl_rows = np.repeat(np.asarray(pnl, dtype=float), len(profiles))
+    # Candles do aquecimento dos indicadores (RSI ainda NaN) não viram exemplo.
+    keep = np.isfinite(features).all(axis=1)
+    return TrainingSet(
+        features=features[keep],
+        labels=(pnl_rows[keep] > 0).astype(int),
+        times=frame["open_time"].to_numpy(dtype="datetime64[ns]").astype(np.int64)[at[keep]],
+        pnl=pnl_rows[keep],
+    )
+
+
+def collect_training_set(config: dict, history: dict[tuple[str, str], pd.DataFrame]) -> TrainingSet:
+    """Junta os exemplos de todos os pares de execução, em ordem cronológica."""
+    parts = []
+    for symbol in config["symbols"]:
+        higher = [history[(symbol, tf)] for tf in config["timeframes"]["higher_tf"] if (symbol, tf) in history]
+        for timeframe in config["timeframes"]["execution_tf"]:
+            frame = history.get((symbol, timeframe))
+            if frame is not None and not frame.empty:
+                parts.append(build_training_set(config, frame, higher, symbol, timeframe))
+    if not parts:
+        return TrainingSet(np.empty((0, len(FEATURE_COLUMNS))), np.empty(0, dtype=int), np.empty(0, dtype=np.int64), np.empty(0))
+    times = np.concatenate([part.times for part in parts])
+    order = np.argsort(times, kind="stable")
+    return TrainingSet(
+        features=np.concatenate([part.features for part in parts])[order],
+        labels=np.concatenate([part.labels for part in parts])[order],
+        times=times[order],
+        pnl=np.concatenate([part.pnl for part in parts])[order],
+    )
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray) -> dict[str, np.ndarray]:
+    """Regressão logística sobre features padronizadas, exportada como vetores."""
+    from sklearn.linear_model import LogisticRegression
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    model = LogisticRegression(max_iter=1000).fit((X - mean) / scale, y)
+    return {"mean": mean, "scale": scale, "coef": model.coef_[0], "intercept": model.intercept_}
+
+
+def export_trees(model) -> dict[str, np.ndarray]:
+    """Achata as árvores de um `HistGradientBoostingClassifier` binário em vetores de nós.
+
+    Os filhos passam a ser índices absolutos no vetor concatenado e
+    `tree_roots` guarda o nó raiz de cada árvore. Depende de atributos
+    privados do estimador, testados nas versões de `SKLEARN_SUPPORTED`.
+    """
+    predictors = getattr(model, "_predictors", None)
+    baseline = getattr(model, "_baseline_prediction", None)
+    if predictors is None or baseline is None or not TREE_NODE_FIELDS <= set(predictors[0][0].nodes.dtype.names):
+        import sklearn
+
+        raise RuntimeError(
+            f"scikit-learn {sklearn.__version__} não expõe as árvores do HistGradientBoostingClassifier "
+            f"no formato esperado; exportação suportada em scikit-learn{SKLEARN_SUPPORTED}"
+        )
+    trees = [tree[0].nodes for tree in predictors]
+    sizes = np.array([len(nodes) for nodes in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    nodes = np.concatenate(trees)
+    offsets = np.repeat(roots, sizes)
+    return {
+        "tree_roots": roots,
+        "tree_feature": nodes["feature_idx"].astype(np.int64),
+        "tree_threshold": nodes["num_threshold"].astype(np.float64),
+        "tree_missing_left": nodes["missing_go_to_left"].astype(bool),
+        "tree_left": nodes["left"].astype(np.int64) + offsets,
+        "tree_right": nodes["right"].astype(np.int64) + offsets,
+        "tree_leaf": nodes["is_leaf"].astype(bool),
+        "tree_value": nodes["value"].astype(np.float64),
+        "tree_baseline": np.ravel(baseline).astype(np.float64),
+    }
+
+
+def fit_boosting(X: np.ndarray, y: np.ndarray, settings: dict | None = None) -> dict[str, np.ndarray]:
+    """Gradient boosting por histogramas exportado para `tree_proba`, mais a logística como scorer barato."""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    model = HistGradientBoostingClassifier(**(settings or {})).fit(X, y)
+    return {**fit_logistic(X, y), **export_trees(model)}
+
+
+def fit_model(
+    dataset: TrainingSet,
+    model_type: str = "logistic_regression",
+    test_ratio: float = 0.2,
+    boosting: dict | None = None,
+) -> tuple[dict[str, np.ndarray], dict]:
+    """Ajusta o modelo e valida nos exemplos mais recentes.
+
+    A validação usa o mesmo scorer NumPy do motor; o modelo final é
+    reajustado com todos os exemplos.
+    """
+    from sklearn.metrics import roc_auc_score
+
+    X, y = dataset.features, dataset.labels
+    if len(np.unique(y)) < 2:
+        raise ValueError("O conjunto de treino precisa de exemplos das duas classes")
+    if model_type == "hist_gradient_boosting":
+        fit, score = (lambda rows, labels: fit_boosting(rows, labels, boosting)), tree_proba
+    else:
+        fit, score = fit_logistic, linear_proba
+
+    split = int(len(y) * (1 - test_ratio))
+    metrics: dict = {"samples": int(len(y)), "base_rate": float(y.mean())}
+    if 0 < split < len(y) and len(np.unique(y[:split])) == 2:
+        probability = score(fit(X[:split], y[:split]), X[split:])
+        metrics["test_samples"] = int(len(y) - split)
+        metrics["test_accuracy"] = float(((probability >= 0.5) == y[split:]).mean())
+        if len(np.unique(y[split:])) == 2:
+            metrics["test_auc"] = float(roc_auc_score(y[split:], probability))
+    return fit(X, y), metrics
+
+
+def save_artifact(path: str, params: dict[str, np.ndarray], metrics: dict, model_type: str = "logistic_regression") -> Path:
+    """Grava o artefato: `metadata.json` (schema e métricas) e um `.npy` por vetor de parâmetros."""
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, values in params.items():
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(values))
+    metadata = {
+        "artifact_version": ARTIFACT_VERSION,
+        "model_type": model_type,
+        "feature_columns": list(FEATURE_COLUMNS),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "metrics": metrics,
+    }
+    (directory / "metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    return directory
+
+
+def train_model(config: dict, history: dict[tuple[str, str], pd.DataFrame], artifact_path: str) -> dict:
+    dataset = collect_training_set(config, history)
+    log_event(
+        LOGGER,
+        "training_dataset",
+        message="Conjunto de treino montado",
+        samples=len(dataset.labels),
+        positives=int(dataset.labels.sum()),
+    )
+    model_type = config["ai"]["model_type"]
+    settings = config["ai"].get("training", {})
+    params, metrics = fit_model(
+        dataset,
+        model_type=model_type,
+        test_ratio=settings.get("test_ratio", 0.2),
+        boosting=settings.get("boosting"),
+    )
+    save_artifact(artifact_path, params, metrics, model_type=model_type)
+    log_event(LOGGER, "training_finished", message="Modelo treinado e salvo", path=artifact_path, model_type=model_type, **metrics)
+    return metrics
@@ -1,34 +1,103 @@
 """Logger com saída JSON e narrativa humana."""
 from __future__ import annotations
 
+import atexit
+import itertools
 import json
 import logging
 import os
-from datetime import datetime
-from typing import Any
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator
 
+from app.core.metrics import METRICS
 
-class JsonFormatter(logging.Formatter):
-    RESERVED_KEYS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys()) | {"message"}
 
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+HUMAN_FORMAT = "[%(levelname)s] %(name)s - %(message)s"
+# Eventos pendentes antes de começar a descartar (a thread do motor nunca espera pelo I/O do log).
+QUEUE_SIZE = 10_000
 
 
 class JsonFormatter(logging.Formatter):
+    RESERVED_KEYS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys()) | {"message"}
+
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
-        for key, value in record.__dict__.items():
-            if key in self.RESERVED_KEYS:
-                continue
-            payload[key] = value
+        fields = getattr(record, "fields", None)
+        if fields is None:
+            # Registro de `logger.info(..., extra=...)` fora de `log_event`.
+            fields = {key: value for key, value in record.__dict__.items() if key not in self.RESERVED_KEYS}
+        for key, value in fields.items():
+            payload[f"event_{key}" if key in self.RESERVED_KEYS else key] = value
         extra = getattr(record, "extra", None)
         if isinstance(extra, dict):
             payload.update(extra)
-        return json.dumps(payload, ensure_ascii=False)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Enfileira o registro como está: formatação e `json.dumps` ficam na thread do listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            METRICS.inc("log_events_dropped_total")
+
+
+class _TimedStreamHandler(logging.StreamHandler):
+    """Saída do listener: mede formatação + escrita na thread do listener, fora do laço do motor."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with METRICS.timer("log_emit_seconds", level=record.levelname.lower()):
+            super().emit(record)
+
+
+_LOCK = threading.Lock()
+_QUEUE_HANDLER: _RecordQueueHandler | None = None
+_LISTENER: QueueListener | None = None
+_OUTPUT: _TimedStreamHandler | None = None
+_LOGGERS: list[logging.Logger] = []
+_LEVEL: str | None = None
+_SAMPLE_EVERY: dict[str, int] = {}
+_SAMPLE_COUNTERS: dict[str, Iterator[int]] = {}
+
+
+def _formatter(name: str) -> logging.Formatter:
+    return logging.Formatter(HUMAN_FORMAT) if name == "human" else JsonFormatter()
+
+
+def _queue_handler() -> _RecordQueueHandler:
+    """Handler único compartilhado por todos os loggers; a saída roda numa thread própria."""
+    global _QUEUE_HANDLER, _LISTENER, _OUTPUT
+    with _LOCK:
+        if _QUEUE_HANDLER is None:
+            log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+            _OUTPUT = _TimedStreamHandler()
+            _OUTPUT.setFormatter(_formatter(os.getenv("LOG_FORMAT", "json")))
+            _LISTENER = QueueListener(log_queue, _OUTPUT)
+            _LISTENER.start()
+            # Esvazia a fila na saída do processo.
+            atexit.register(_LISTENER.stop)
+            _QUEUE_HANDLER = _RecordQueueHandler(log_queue)
+        return _QUEUE_HANDLER
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -36,21 +105,32 @@ def get_logger(name: str) -> logging.Logger:
     if logger.handlers:
         return logger
 
-    level = os.getenv("LOG_LEVEL", "INFO").upper()
-    logger.setLevel(level)
+    # Loggers criados depois de `configure_logging` (imports tardios) seguem o nível configurado.
+    logger.setLevel(_LEVEL or os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.addHandler(_queue_handler())
+    logger.propagate = False
+    _LOGGERS.append(logger)
+    return logger
 
-    json_handler = logging.StreamHandler()
-    json_handler.setFormatter(JsonFormatter())
 
-    human_handler = logging.StreamHandler()
-    human_handler.setFormatter(
-        logging.Formatter("[%(levelname)s] %(name)s - %(message)s")
-    )
+def configure_logging(settings: dict) -> None:
+    """Aplica a seção `logging` do config: nível (`LOG_LEVEL` tem prioridade), formato e amostragem."""
+    global _LEVEL
+    _LEVEL = os.getenv("LOG_LEVEL", settings.get("level", "INFO")).upper()
+    for logger in _LOGGERS:
+        logger.setLevel(_LEVEL)
+    _queue_handler()
+    _OUTPUT.setFormatter(_formatter(os.getenv("LOG_FORMAT", settings.get("format", "json"))))
+    _SAMPLE_EVERY.clear()
+    _SAMPLE_EVERY.update({event: int(every) for event, every in (settings.get("sample") or {}).items() if int(every) > 1})
+    _SAMPLE_COUNTERS.clear()
 
-    logger.addHandler(json_handler)
-    logger.addHandler(human_handler)
-    logger.propagate = False
-    return logger
+
+def _sampled_out(event: str, every: int) -> bool:
+    counter = _SAMPLE_COUNTERS.get(event)
+    if counter is None:
+        counter = _SAMPLE_COUNTERS.setdefault(event, itertools.count())
+    return next(counter) % every != 0
 
 
 def log_event(
@@ -61,13 +141,15 @@ def log_event(
     level: str = "info",
     **fields: Any,
 ) -> None:
-    safe_fields = {}
-    for key, value in fields.items():
-        if key in JsonFormatter.RESERVED_KEYS:
-            safe_fields[f"event_{key}"] = value
-        else:
-            safe_fields[key] = value
+    levelno = LEVELS.get(level, logging.INFO)
+    if not logger.isEnabledFor(levelno):
+        return
+    every = _SAMPLE_EVERY.get(event)
+    if every:
+        if _sampled_out(event, every):
+            return
+        # Cada evento emitido representa `sampled` ocorrências.
+        fields["sampled"] = every
     if message is not None:
-        safe_fields["event_message"] = message
-    log_method = getattr(logger, level, logger.info)
-    log_method(event, extra=safe_fields)
+        fields["event_message"] = message
+    logger.log(levelno, event, extra={"fields": fields})
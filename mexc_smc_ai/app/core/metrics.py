@@ -0,0 +1,278 @@
+"""Métricas do motor (contadores, gauges e histogramas) expostas no formato de texto do Prometheus."""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+
+# Limites superiores (segundos) dos buckets dos histogramas.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "engine_stage_seconds": "Duração de cada etapa do pipeline por símbolo/timeframe",
+    "engine_cycle_seconds": "Duração do ciclo completo do motor",
+    "engine_cycle_last_seconds": "Duração do último ciclo",
+    "engine_cycle_budget_ratio": "Duração do último ciclo / engine.polling_seconds",
+    "engine_cycle_overruns_total": "Ciclos mais longos que engine.polling_seconds",
+    "engine_signals_total": "Sinais gerados por decisão",
+    "engine_shard_up": "1 enquanto o worker do shard está vivo e mandando heartbeat",
+    "engine_shard_restarts_total": "Reinícios de workers do modo multi-processo",
+    "model_latency_seconds": "Latência de cada lote de inferência do modelo principal",
+    "model_seconds_per_prediction": "Latência média por linha prevista pelo modelo principal",
+    "model_over_budget_total": "Lotes do modelo principal acima de ai.latency_budget_ms",
+    "model_fallback_total": "Lotes servidos pelo scorer linear com o modelo principal degradado",
+    "model_degraded": "1 enquanto a inferência usa o scorer linear por estouro do orçamento",
+    "mexc_request_seconds": "Latência das requisições à MEXC",
+    "mexc_requests_total": "Requisições à MEXC por resultado",
+    "mexc_rate_limited_total": "Respostas 429 da MEXC",
+    "log_emit_seconds": "Formatação e escrita de cada evento de log na thread do listener, por nível",
+    "log_events_dropped_total": "Eventos de log descartados com a fila cheia",
+}
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _key(labels: dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{value}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopTimer:
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry: MetricsRegistry, name: str, labels: dict) -> None:
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> _Timer:
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.registry.observe(self.name, perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Registro de métricas em memória, seguro entre threads.
+
+    Desligado (`enabled = False`), toda chamada retorna logo na primeira
+    linha e `timer` devolve um context manager vazio compartilhado, então a
+    instrumentação pode ficar no caminho quente sem custo relevante.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._gauges: dict[str, dict[LabelKey, float]] = {}
+        self._histograms: dict[str, dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            for pos, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram.counts[pos] += 1
+                    break
+            histogram.total += value
+            histogram.count += 1
+
+    def timer(self, name: str, **labels) -> _Timer | _NoopTimer:
+        """`with METRICS.timer("engine_stage_seconds", stage="fetch"):` observa a duração do bloco."""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def dump(self) -> dict:
+        """Estado bruto (com os buckets) para ser carregado no registro de outro processo."""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "gauges": {name: dict(series) for name, series in self._gauges.items()},
+                "histograms": {
+                    name: {key: (list(histogram.counts), histogram.total, histogram.count) for key, histogram in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def load(self, dump: dict, **labels) -> None:
+        """Substitui as séries de um `dump` de outro processo, acrescentando `labels` (ex.: `shard`).
+
+        Os valores do dump já são acumulados, então cada carga sobrescreve a anterior.
+        """
+        if not self.enabled:
+            return
+        extra = _key(labels)
+        with self._lock:
+            for kind, target in (("counters", self._counters), ("gauges", self._gauges)):
+                for name, series in dump[kind].items():
+                    values = target.setdefault(name, {})
+                    for key, value in series.items():
+                        values[tuple(sorted(key + extra))] = value
+            for name, series in dump["histograms"].items():
+                values = self._histograms.setdefault(name, {})
+                for key, (counts, total, count) in series.items():
+                    histogram = _Histogram(len(self.buckets))
+                    histogram.counts, histogram.total, histogram.count = list(counts), total, count
+                    values[tuple(sorted(key + extra))] = histogram
+
+    def _quantile(self, histogram: _Histogram, q: float) -> float:
+        """Estimativa pelo limite superior do bucket que contém o quantil."""
+        target = q * histogram.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, histogram.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """Valores atuais em estrutura serializável (usada pelo dashboard)."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in self._counters.items()
+                    for key, value in series.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in self._gauges.items()
+                    for key, value in series.items()
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(key),
+                        "count": histogram.count,
+                        "sum": histogram.total,
+                        "p50": self._quantile(histogram, 0.5),
+                        "p95": self._quantile(histogram, 0.95),
+                    }
+                    for name, series in self._histograms.items()
+                    for key, histogram in series.items()
+                ],
+            }
+
+    def render(self) -> str:
+        """Exposição no formato de texto 0.0.4 do Prometheus."""
+        lines: list[str] = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.total:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def configure_metrics(settings: dict) -> MetricsRegistry:
+    METRICS.enabled = bool(settings.get("enabled", False))
+    return METRICS
+
+
+def _handler(registry: MetricsRegistry) -> type[BaseHTTPRequestHandler]:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                body = registry.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.snapshot()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            # Scrapes periódicos não devem poluir o log do motor.
+            return
+
+    return MetricsHandler
+
+
+def start_metrics_server(registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108) -> ThreadingHTTPServer:
+    """Serve `/metrics` (Prometheus) e `/metrics.json` numa thread daemon. Encerre com `shutdown()`."""
+    server = ThreadingHTTPServer((host, port), _handler(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
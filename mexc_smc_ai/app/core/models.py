@@ -58,7 +58,7 @@ class Trade:
     entry_price: float
     stop_price: float
     target_price: float
-    status: Literal["open", "closed"]
+    status: Literal["open", "closed", "abandoned"]
     opened_at: datetime
     closed_at: datetime | None = None
     exit_price: float | None = None
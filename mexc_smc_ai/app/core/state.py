@@ -4,6 +4,7 @@ from __future__ import annotations
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any, Callable
 
 from app.core.models import OrderBlock, Signal, Trade
 
@@ -15,15 +16,40 @@ class EngineState:
     trades: deque[Trade] = field(default_factory=lambda: deque(maxlen=500))
     logs: deque[dict] = field(default_factory=lambda: deque(maxlen=500))
     last_update: datetime | None = None
+    # Cresce a cada mudança; o dashboard usa como chave de cache.
+    version: int = 0
+    # Recebe (tipo, objeto) a cada mudança; ex.: `StateWriter.submit`, que persiste fora do laço do motor.
+    sink: Callable[[str, Any], None] | None = field(default=None, repr=False)
+
+    def _emit(self, kind: str, item: Any) -> None:
+        self.version += 1
+        if self.sink is not None:
+            self.sink(kind, item)
 
     def add_order_block(self, key: str, ob: OrderBlock) -> None:
         self.order_blocks[key].append(ob)
+        self._emit("order_block", (key, ob))
+
+    def remove_order_block(self, key: str, ob_id: str) -> None:
+        self.order_blocks[key] = [ob for ob in self.order_blocks[key] if ob.id != ob_id]
+        self._emit("order_block_removed", (key, ob_id))
 
     def add_signal(self, signal: Signal) -> None:
         self.signals.appendleft(signal)
+        self._emit("signal", signal)
 
     def add_trade(self, trade: Trade) -> None:
         self.trades.appendleft(trade)
+        self._emit("trade", trade)
+
+    def update_trade(self, trade: Trade) -> None:
+        """Avisa que um trade já registrado mudou (por exemplo, foi encerrado)."""
+        self._emit("trade", trade)
 
     def add_log(self, record: dict) -> None:
         self.logs.appendleft(record)
+        self._emit("log", record)
+
+    def mark_updated(self, moment: datetime) -> None:
+        self.last_update = moment
+        self._emit("last_update", moment)
@@ -0,0 +1,311 @@
+"""Estado do motor persistido em SQLite (WAL), compartilhado com o dashboard."""
+from __future__ import annotations
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.core.logger import get_logger, log_event
+from app.core.models import OrderBlock, Signal, Trade
+from app.core.state import EngineState
+
+
+LOGGER = get_logger(__name__)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS signals (seq INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS trades (seq INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS order_blocks ("
+    "seq INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, key TEXT NOT NULL, active INTEGER NOT NULL, payload TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS logs (seq INTEGER PRIMARY KEY, payload TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+TABLES = ("signals", "trades", "order_blocks", "logs")
+DATETIME_FIELDS = {
+    Signal: ("timestamp",),
+    Trade: ("opened_at", "closed_at"),
+    OrderBlock: ("created_at",),
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(item: Any) -> str:
+    data = asdict(item) if not isinstance(item, dict) else item
+    return json.dumps(data, default=_default, ensure_ascii=False)
+
+
+def _snapshot(kind: str, item: Any) -> Any:
+    """Forma imutável do item para a fila do `StateWriter`."""
+    if kind in ("signal", "trade"):
+        return item.id, _encode(item)
+    if kind == "order_block":
+        key, ob = item
+        return key, ob.id, _encode(ob)
+    if kind == "log":
+        return _encode(item)
+    return item
+
+
+def _decode(cls: type, payload: str) -> Any:
+    data = json.loads(payload)
+    for name in DATETIME_FIELDS[cls]:
+        if data.get(name) is not None:
+            data[name] = datetime.fromisoformat(data[name])
+    return cls(**data)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+class StateWriter:
+    """Persiste as mudanças do `EngineState` numa thread própria, em transações por lote.
+
+    `submit` (ligado em `EngineState.sink`) serializa o objeto na thread de
+    quem chama, porque o motor continua alterando trades e OBs depois de
+    emiti-los, e só enfileira o JSON; a thread espera até `flush_seconds` ou
+    `batch_size` itens e grava tudo numa única transação. Cada linha recebe um `seq` crescente (reatribuído quando um
+    trade ou OB é atualizado), que os leitores usam para buscar só o que
+    mudou. Mantém no máximo `retention` linhas por tabela.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_seconds: float = 0.2,
+        batch_size: int = 500,
+        retention: int = 5000,
+    ) -> None:
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.retention = retention
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._seq = 0
+        self.written = 0
+
+    def submit(self, kind: str, item: Any) -> None:
+        self._queue.put((kind, _snapshot(kind, item)))
+
+    def start(self) -> StateWriter:
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Espera até tudo o que foi enfileirado antes desta chamada estar gravado."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        conn = _connect(self.path)
+        self._seq = max(conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {table}").fetchone()[0] for table in TABLES)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size and batch[-1][0] not in ("flush", "stop"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, [entry for entry in batch if entry[0] not in ("flush", "stop")])
+            except Exception as exc:
+                log_event(
+                    LOGGER,
+                    "state_write_failed",
+                    message="Falha ao gravar o estado compartilhado",
+                    error=str(exc),
+                    items=len(batch),
+                    level="error",
+                )
+            for kind, item in batch:
+                if kind == "flush":
+                    item.set()
+                elif kind == "stop":
+                    running = False
+        conn.close()
+
+    def _next(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _write(self, conn: sqlite3.Connection, batch: list[tuple[str, Any]]) -> None:
+        if not batch:
+            return
+        rows: dict[str, list[tuple]] = defaultdict(list)
+        removed: list[tuple] = []
+        last_update = None
+        for kind, item in batch:
+            if kind == "signal":
+                rows["signals"].append((self._next(), *item))
+            elif kind == "trade":
+                rows["trades"].append((self._next(), *item))
+            elif kind == "order_block":
+                key, ob_id, payload = item
+                rows["order_blocks"].append((self._next(), ob_id, key, 1, payload))
+            elif kind == "order_block_removed":
+                removed.append((self._next(), item[1]))
+            elif kind == "log":
+                rows["logs"].append((self._next(), item))
+            elif kind == "last_update":
+                last_update = item
+        with conn:
+            conn.executemany(
+                "INSERT INTO signals (seq, id, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, payload = excluded.payload",
+                rows["signals"],
+            )
+            conn.executemany(
+                "INSERT INTO trades (seq, id, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, payload = excluded.payload",
+                rows["trades"],
+            )
+            conn.executemany(
+                "INSERT INTO order_blocks (seq, id, key, active, payload) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, key = excluded.key, active = 1, payload = excluded.payload",
+                rows["order_blocks"],
+            )
+            conn.executemany("UPDATE order_blocks SET seq = ?, active = 0 WHERE id = ?", removed)
+            conn.executemany("INSERT INTO logs (seq, payload) VALUES (?, ?)", rows["logs"])
+            if last_update is not None:
+                conn.execute(
+                    "INSERT INTO meta (name, value) VALUES ('last_update', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                    (_default(last_update),),
+                )
+            for table in TABLES:
+                if rows[table] or (table == "order_blocks" and removed):
+                    self._trim(conn, table)
+        self.written += len(batch)
+
+    def _trim(self, conn: sqlite3.Connection, table: str) -> None:
+        active = " AND active = 0" if table == "order_blocks" else ""
+        conn.execute(
+            f"DELETE FROM {table} WHERE seq < (SELECT seq FROM {table} ORDER BY seq DESC LIMIT 1 OFFSET ?){active}",
+            (self.retention,),
+        )
+
+
+class StateReader:
+    """Espelho local (um `EngineState`) do estado gravado pelo `StateWriter`.
+
+    `refresh` só lê as linhas com `seq` maior que o último visto; `version`
+    muda exatamente quando algo novo chegou.
+    """
+
+    def __init__(self, path: str, limit: int = 500) -> None:
+        self.path = path
+        self.limit = limit
+        self.state = EngineState()
+        self.version = 0
+        self._seen = dict.fromkeys(TABLES, 0)
+        self._trades: dict[str, Trade] = {}
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self._conn is None and Path(self.path).exists():
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def _pull(self, conn: sqlite3.Connection, table: str, columns: str, extra: str = "") -> list[tuple]:
+        rows = conn.execute(
+            f"SELECT {columns} FROM {table} WHERE seq > ?{extra} ORDER BY seq DESC LIMIT ?",
+            (self._seen[table], self.limit),
+        ).fetchall()
+        if rows:
+            self._seen[table] = rows[0][0]
+        return rows[::-1]
+
+    def refresh(self) -> EngineState:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return self.state
+            state = self.state
+            for _, payload in self._pull(conn, "signals", "seq, payload"):
+                state.signals.appendleft(_decode(Signal, payload))
+
+            trades = self._pull(conn, "trades", "seq, payload")
+            for _, payload in trades:
+                trade = _decode(Trade, payload)
+                self._trades[trade.id] = trade
+            if trades:
+                ordered = sorted(self._trades.values(), key=lambda trade: trade.opened_at, reverse=True)[: self.limit]
+                self._trades = {trade.id: trade for trade in ordered}
+                state.trades = deque(ordered, maxlen=self.limit)
+
+            first = self._seen["order_blocks"] == 0
+            # Na primeira leitura só interessam os OBs ainda ativos, sem limite de quantidade.
+            blocks = conn.execute(
+                "SELECT seq, key, active, payload FROM order_blocks WHERE seq > ?" + (" AND active = 1" if first else "") + " ORDER BY seq",
+                (self._seen["order_blocks"],),
+            ).fetchall()
+            for _, key, active, payload in blocks:
+                ob = _decode(OrderBlock, payload)
+                current = [block for block in state.order_blocks[key] if block.id != ob.id]
+                state.order_blocks[key] = current + [ob] if active else current
+            if blocks:
+                self._seen["order_blocks"] = blocks[-1][0]
+
+            for _, payload in self._pull(conn, "logs", "seq, payload"):
+                state.logs.appendleft(json.loads(payload))
+
+            row = conn.execute("SELECT value FROM meta WHERE name = 'last_update'").fetchone()
+            state.last_update = datetime.fromisoformat(row[0]) if row else None
+            self.version = max(self._seen.values())
+            state.version = self.version
+            return state
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def attach_writer(state: EngineState, settings: dict) -> StateWriter | None:
+    """Liga um `StateWriter` ao estado quando `state.backend` é `sqlite`."""
+    if settings.get("backend", "memory") != "sqlite":
+        return None
+    writer = StateWriter(
+        settings["path"],
+        flush_seconds=settings.get("flush_ms", 200) / 1000,
+        batch_size=settings.get("batch_size", 500),
+        retention=settings.get("retention", 5000),
+    ).start()
+    state.sink = writer.submit
+    return writer
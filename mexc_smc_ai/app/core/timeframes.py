@@ -0,0 +1,45 @@
+"""Durações e alinhamento de timeframes (candles alinhados ao epoch UTC, como na MEXC)."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "1h": 3600,
+    "4h": 14400,
+    "8h": 28800,
+    "1d": 86400,
+    "1W": 604800,
+}
+
+# Candles semanais abrem na segunda-feira; o epoch (1970-01-01) foi uma quinta.
+_WEEK_OFFSET = 4 * 86400
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"Timeframe não suportado: {timeframe}") from None
+
+
+def timeframe_delta(timeframe: str) -> timedelta:
+    return timedelta(seconds=timeframe_seconds(timeframe))
+
+
+def candle_open(moment: datetime, timeframe: str) -> datetime:
+    """Abertura do candle que contém `moment` (datetimes ingênuos são tratados como UTC)."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    seconds = timeframe_seconds(timeframe)
+    offset = _WEEK_OFFSET if timeframe == "1W" else 0
+    epoch = moment.timestamp() - offset
+    return datetime.fromtimestamp(epoch - (epoch % seconds) + offset, tz=timezone.utc)
+
+
+def next_close(moment: datetime, timeframe: str) -> datetime:
+    return candle_open(moment, timeframe) + timeframe_delta(timeframe)
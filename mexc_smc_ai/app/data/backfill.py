@@ -0,0 +1,158 @@
+"""Download paginado de histórico de candles da MEXC para o `HistoryStore`."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import get_logger, log_event
+from app.core.timeframes import candle_open, timeframe_delta, timeframe_seconds
+from app.data.feed import normalize_klines
+from app.data.mexc_client import MexcClient
+from app.data.storage import HistoryStore, save_history
+
+
+LOGGER = get_logger(__name__)
+
+# Máximo de candles por requisição em `/api/v3/klines`.
+MAX_LIMIT = 1000
+
+
+@dataclass
+class BackfillReport:
+    symbol: str
+    timeframe: str
+    added: int = 0
+    requests: int = 0
+    gaps: list[tuple[pd.Timestamp, pd.Timestamp]] = field(default_factory=list)
+
+
+def _ms(moment: pd.Timestamp) -> int:
+    return moment.value // 1_000_000
+
+
+def _aligned_open(moment: pd.Timestamp, timeframe: str) -> pd.Timestamp:
+    """Primeiro `open_time` de candle em ou após `moment`."""
+    opened = pd.Timestamp(candle_open(moment.to_pydatetime(), timeframe))
+    return opened if opened >= moment else opened + timeframe_delta(timeframe)
+
+
+def find_gaps(
+    open_times: np.ndarray,
+    timeframe: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Intervalos [início, fim) sem candles entre `start` e `end`, dados os `open_time` em ms."""
+    step = timeframe_seconds(timeframe) * 1000
+    first = _ms(_aligned_open(start, timeframe))
+    stop = _ms(_aligned_open(end, timeframe))
+    times = open_times[(open_times >= first) & (open_times < stop)]
+    bounds = np.concatenate([[first - step], times, [stop]])
+    jumps = np.flatnonzero(np.diff(bounds) > step)
+    return [
+        (pd.Timestamp(int(bounds[pos] + step), unit="ms", tz="UTC"), pd.Timestamp(int(bounds[pos + 1]), unit="ms", tz="UTC"))
+        for pos in jumps
+    ]
+
+
+class Backfiller:
+    """Pagina `/api/v3/klines` por `startTime` e grava os candles fechados no store.
+
+    Cada par começa do candle seguinte ao último gravado (retomando downloads
+    interrompidos) e, ao final, procura lacunas no intervalo pedido e tenta
+    buscá-las uma vez; o que continuar faltando (por exemplo, paradas da
+    exchange) fica no relatório. Pares rodam em paralelo e o `TokenBucket` do
+    cliente mantém o conjunto dentro do orçamento de requisições.
+    """
+
+    def __init__(self, client: MexcClient, store: HistoryStore, limit: int = MAX_LIMIT, workers: int = 4) -> None:
+        self.client = client
+        self.store = store
+        self.limit = min(limit, MAX_LIMIT)
+        self.workers = workers
+
+    def _download(self, report: BackfillReport, start: pd.Timestamp, end: pd.Timestamp) -> None:
+        step = timeframe_delta(report.timeframe)
+        now = pd.Timestamp.now(tz="UTC")
+        cursor = start
+        while cursor < end:
+            klines = self.client.get_klines(
+                report.symbol,
+                report.timeframe,
+                limit=self.limit,
+                start_time=_ms(cursor),
+                end_time=_ms(end) - 1,
+            )
+            report.requests += 1
+            if not klines:
+                break
+            frame = normalize_klines(report.symbol, report.timeframe, klines)
+            report.added += save_history(self.store, frame, now=now)
+            following = frame["open_time"].iloc[-1] + step
+            if len(klines) < self.limit or following <= cursor:
+                break
+            cursor = following
+
+    def backfill_pair(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp | None = None,
+    ) -> BackfillReport:
+        step = timeframe_delta(timeframe)
+        if end is None:
+            # Até o último candle fechado.
+            end = pd.Timestamp(candle_open(pd.Timestamp.now(tz="UTC").to_pydatetime(), timeframe))
+        report = BackfillReport(symbol, timeframe)
+        last = self.store.last_open_time(symbol, timeframe)
+        resume = start if last is None or last < start else last + step
+        self._download(report, resume, end)
+
+        for gap_start, gap_end in self._gaps(symbol, timeframe, start, end):
+            self._download(report, gap_start, gap_end)
+        report.gaps = self._gaps(symbol, timeframe, start, end)
+        log_event(
+            LOGGER,
+            "backfill_pair_done",
+            message="Backfill concluído para o par",
+            symbol=symbol,
+            timeframe=timeframe,
+            added=report.added,
+            requests=report.requests,
+            gaps=len(report.gaps),
+            level="warning" if report.gaps else "info",
+        )
+        return report
+
+    def _gaps(self, symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+        open_times = self.store.columns(symbol, timeframe, start, end)["open_time"]
+        return find_gaps(np.asarray(open_times), timeframe, start, end)
+
+    def run(
+        self,
+        pairs: list[tuple[str, str]],
+        start: pd.Timestamp,
+        end: pd.Timestamp | None = None,
+    ) -> list[BackfillReport]:
+        reports = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            futures = {pool.submit(self.backfill_pair, symbol, tf, start, end): (symbol, tf) for symbol, tf in pairs}
+            for future in as_completed(futures):
+                symbol, timeframe = futures[future]
+                try:
+                    reports.append(future.result())
+                except Exception as exc:
+                    log_event(
+                        LOGGER,
+                        "backfill_failed",
+                        message="Falha no backfill do par",
+                        symbol=symbol,
+                        timeframe=timeframe,
+                        error=str(exc),
+                        level="error",
+                    )
+        return sorted(reports, key=lambda report: (report.symbol, report.timeframe))
@@ -1,13 +1,14 @@
 """Camada de feed para normalizar OHLCV."""
 from __future__ import annotations
 
+import threading
 from datetime import datetime, timezone
 
 import pandas as pd
 
 from app.core.models import Candle
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
+from app.core.metrics import METRICS
 from app.data.mexc_client import MexcClient
 
 
@@ -29,27 +30,136 @@ def normalize_klines(symbol: str, timeframe: str, klines: list) -> pd.DataFrame:
         "taker_quote",
         "ignore",
     ]
-    frame = pd.DataFrame(klines, columns=columns)
-    frame["open_time"] = pd.to_datetime(frame["open_time"], unit="ms", utc=True)
-    frame["close_time"] = pd.to_datetime(frame["close_time"], unit="ms", utc=True)
-    for col in ["open", "high", "low", "close", "volume"]:
-        frame[col] = frame[col].astype(float)
-    frame["symbol"] = symbol
-    frame["timeframe"] = timeframe
+    with METRICS.timer("engine_stage_seconds", stage="normalize", symbol=symbol, timeframe=timeframe):
+        frame = pd.DataFrame(klines, columns=columns)
+        frame["open_time"] = pd.to_datetime(frame["open_time"], unit="ms", utc=True)
+        frame["close_time"] = pd.to_datetime(frame["close_time"], unit="ms", utc=True)
+        for col in ["open", "high", "low", "close", "volume"]:
+            frame[col] = frame[col].astype(float)
+        frame["symbol"] = symbol
+        frame["timeframe"] = timeframe
     return frame
 
 
-def fetch_candles(client: MexcClient, symbol: str, timeframe: str, limit: int = 200) -> pd.DataFrame:
+def _open_time_ms(frame: pd.DataFrame) -> int:
+    return int(frame["open_time"].iloc[-1].value // 1_000_000)
+
+
+class CandleCache:
+    """Histórico rolante por (símbolo, timeframe) atualizado de forma incremental.
+
+    Após a carga inicial, cada chamada pede à MEXC apenas os candles a partir do
+    último `open_time` em memória (o candle ainda em formação), substitui esse
+    candle e anexa os novos, mantendo no máximo `max_candles` linhas.
+    """
+
+    def __init__(self, max_candles: int = 200, refresh_limit: int = 50) -> None:
+        self.max_candles = max_candles
+        self.refresh_limit = refresh_limit
+        self.hits = 0
+        self.misses = 0
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+        self._capacity: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, client: MexcClient, symbol: str, timeframe: str, limit: int = 200) -> pd.DataFrame:
+        key = (symbol, timeframe)
+        cached = self._frames.get(key)
+        frame = None
+        if cached is not None and not cached.empty and self._capacity.get(key, 0) >= limit:
+            frame = self._refresh(client, symbol, timeframe, cached)
+        hit = frame is not None
+        if hit:
+            capacity = self._capacity[key]
+        else:
+            capacity = max(limit, self.max_candles)
+            klines = client.get_klines(symbol=symbol, interval=timeframe, limit=capacity)
+            frame = normalize_klines(symbol, timeframe, klines)
+        if len(frame) > capacity:
+            frame = frame.iloc[-capacity:].reset_index(drop=True)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._capacity[key] = capacity
+            self._frames[key] = frame
+        return frame.iloc[-limit:].reset_index(drop=True)
+
+    def _refresh(
+        self,
+        client: MexcClient,
+        symbol: str,
+        timeframe: str,
+        cached: pd.DataFrame,
+    ) -> pd.DataFrame | None:
+        klines = client.get_klines(
+            symbol=symbol,
+            interval=timeframe,
+            limit=self.refresh_limit,
+            start_time=_open_time_ms(cached),
+        )
+        if len(klines) >= self.refresh_limit:
+            # Lacuna maior que a janela incremental: recarrega tudo.
+            return None
+        if not klines:
+            return cached
+        fresh = normalize_klines(symbol, timeframe, klines)
+        kept = cached[cached["open_time"] < fresh["open_time"].iloc[0]]
+        return pd.concat([kept, fresh], ignore_index=True)
+
+    def apply_kline(self, symbol: str, timeframe: str, kline: list) -> bool:
+        """Aplica um candle recebido por push. Retorna True quando ele abre um novo
+        candle, ou seja, quando o candle anterior acabou de fechar."""
+        key = (symbol, timeframe)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None or frame.empty:
+                return False
+            open_ms = int(kline[0])
+            last_ms = _open_time_ms(frame)
+            if open_ms < last_ms:
+                return False
+            fresh = normalize_klines(symbol, timeframe, [kline])
+            if open_ms == last_ms:
+                frame = pd.concat([frame.iloc[:-1], fresh], ignore_index=True)
+            else:
+                frame = pd.concat([frame, fresh], ignore_index=True)
+                capacity = self._capacity[key]
+                if len(frame) > capacity:
+                    frame = frame.iloc[-capacity:].reset_index(drop=True)
+            self._frames[key] = frame
+        return open_ms > last_ms
+
+    def frame(self, symbol: str, timeframe: str) -> pd.DataFrame | None:
+        return self._frames.get((symbol, timeframe))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._frames),
+        }
+
+
+def fetch_candles(
+    client: MexcClient,
+    symbol: str,
+    timeframe: str,
+    limit: int = 200,
+    cache: CandleCache | None = None,
+) -> pd.DataFrame:
     log_event(
         LOGGER,
         "fetch_candles",
         message="Buscando candles",
         symbol=symbol,
         timeframe=timeframe,
-    LOGGER.info(
-        "fetch_candles",
-        extra={"message": "Buscando candles", "symbol": symbol, "timeframe": timeframe},
     )
+    if cache is not None:
+        return cache.get(client, symbol, timeframe, limit=limit)
     klines = client.get_klines(symbol=symbol, interval=timeframe, limit=limit)
     return normalize_klines(symbol, timeframe, klines)
 
@@ -1,18 +1,50 @@
 """Cliente REST para a MEXC com retry, backoff e rate limit."""
 from __future__ import annotations
 
+import random
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from app.core.config import env
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
+from app.core.metrics import METRICS
+from app.data.rate_limit import TokenBucket
 
 
 LOGGER = get_logger(__name__)
 
+# Peso de cada endpoint no orçamento por IP da MEXC.
+ENDPOINT_WEIGHTS = {"/api/v3/klines": 1}
+
+
+@dataclass
+class EndpointStats:
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": (self.total_seconds / self.count) * 1000 if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
 
 @dataclass
 class MexcClient:
@@ -20,41 +52,102 @@ class MexcClient:
     timeout: int = int(env("MEXC_TIMEOUT", "10") or 10)
     max_retries: int = 3
     backoff_seconds: float = 1.5
+    pool_size: int = 10
+    rate_limit_weight: int = int(env("MEXC_RATE_LIMIT", "500") or 500)
+    rate_limit_window: float = float(env("MEXC_RATE_WINDOW", "10") or 10)
+    # Orçamento compartilhado (ex.: `SharedTokenBucket` entre processos); sem ele, um bucket próprio.
+    limiter: TokenBucket | None = field(default=None, repr=False)
+    session: requests.Session = field(init=False, repr=False)
+    stats: dict[str, EndpointStats] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if self.limiter is None:
+            self.limiter = TokenBucket(self.rate_limit_weight, self.rate_limit_window)
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_seconds * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, value: str | None, attempt: int) -> float:
+        """Segundos do `Retry-After` (número ou data HTTP, RFC 9110); backoff quando ausente ou inválido."""
+        if not value:
+            return self._backoff(attempt)
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return self._backoff(attempt)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    def _record(self, path: str, seconds: float, ok: bool) -> None:
+        with self._stats_lock:
+            self.stats.setdefault(path, EndpointStats()).record(seconds, ok)
+        METRICS.observe("mexc_request_seconds", seconds, endpoint=path)
+        METRICS.inc("mexc_requests_total", endpoint=path, result="ok" if ok else "error")
 
     def _request(self, path: str, params: dict) -> dict:
         url = f"{self.base_url}{path}"
+        weight = ENDPOINT_WEIGHTS.get(path, 1)
         for attempt in range(1, self.max_retries + 1):
+            self.limiter.acquire(weight)
+            started = time.perf_counter()
+            response = None
             try:
-                response = requests.get(url, params=params, timeout=self.timeout)
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                self._record(path, time.perf_counter() - started, response.status_code < 400)
                 if response.status_code == 429:
+                    delay = self._retry_after(response.headers.get("Retry-After"), attempt)
                     log_event(
                         LOGGER,
                         "rate_limit",
                         message="Rate limit atingido",
                         attempt=attempt,
+                        delay=delay,
                         level="warning",
-                    LOGGER.warning(
-                        "rate_limit",
-                        extra={"message": "Rate limit atingido", "attempt": attempt},
                     )
-                    time.sleep(self.backoff_seconds * attempt)
+                    METRICS.inc("mexc_rate_limited_total", endpoint=path)
+                    self.limiter.penalize(delay)
                     continue
                 response.raise_for_status()
                 return response.json()
             except requests.RequestException as exc:
+                if response is None:
+                    self._record(path, time.perf_counter() - started, False)
                 log_event(
                     LOGGER,
                     "request_failed",
                     message="Falha ao requisitar MEXC",
                     error=str(exc),
                     level="error",
-                LOGGER.error(
-                    "request_failed",
-                    extra={"message": "Falha ao requisitar MEXC", "error": str(exc)},
                 )
-                time.sleep(self.backoff_seconds * attempt)
+                time.sleep(self._backoff(attempt))
         raise RuntimeError("Falha após tentativas na MEXC")
 
-    def get_klines(self, symbol: str, interval: str, limit: int = 200) -> list:
+    def latency_stats(self) -> dict[str, dict]:
+        with self._stats_lock:
+            return {path: stats.as_dict() for path, stats in self.stats.items()}
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 200,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> list:
         params = {"symbol": symbol, "interval": interval, "limit": limit}
+        if start_time is not None:
+            params["startTime"] = start_time
+        if end_time is not None:
+            params["endTime"] = end_time
         return self._request("/api/v3/klines", params=params)
@@ -0,0 +1,96 @@
+"""Token bucket para respeitar o orçamento de peso da MEXC antes do 429."""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Limita o consumo de peso por janela de tempo.
+
+    `acquire` reserva o peso imediatamente (o saldo pode ficar negativo) e dorme
+    o tempo necessário fora do lock, então chamadas concorrentes formam uma fila
+    na ordem de chegada em vez de competirem pelo próximo token.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        window_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / window_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, weight: float = 1.0) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= weight
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float) -> None:
+        """Esvazia o balde para que nenhuma requisição saia nos próximos `seconds`."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+
+class SharedTokenBucket(TokenBucket):
+    """`TokenBucket` com saldo em memória compartilhada: um único orçamento para vários processos.
+
+    Deve ser entregue aos processos filhos na criação (argumento do
+    `Process`). Usa `time.monotonic`, que é o mesmo relógio para todos os
+    processos da máquina.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        window_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        context=None,
+    ) -> None:
+        context = context or multiprocessing.get_context()
+        self._shared = context.RawArray("d", 2)  # [saldo, último refill]
+        super().__init__(capacity, window_seconds, clock=clock, sleep=sleep)
+        self._lock = context.Lock()
+
+    @property
+    def _tokens(self) -> float:
+        return self._shared[0]
+
+    @_tokens.setter
+    def _tokens(self, value: float) -> None:
+        self._shared[0] = value
+
+    @property
+    def _updated(self) -> float:
+        return self._shared[1]
+
+    @_updated.setter
+    def _updated(self, value: float) -> None:
+        self._shared[1] = value
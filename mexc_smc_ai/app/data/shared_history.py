@@ -0,0 +1,86 @@
+"""Histórico de candles em memória compartilhada, para pools de processos."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.core.timeframes import timeframe_delta
+
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class SharedFrameSpec:
+    symbol: str
+    timeframe: str
+    name: str
+    rows: int
+
+
+class SharedHistory:
+    """Publica cada (símbolo, timeframe) como um bloco float64 (colunas x linhas).
+
+    Os workers recebem só os `specs` (nomes dos blocos) e montam os frames sobre
+    o mesmo buffer, sem serializar candles por tarefa. `open_time` vai em ms,
+    exato em float64. O dono deve chamar `close` para liberar os blocos.
+    """
+
+    def __init__(self, history: dict[tuple[str, str], pd.DataFrame]) -> None:
+        self.specs: list[SharedFrameSpec] = []
+        self._blocks: list[shared_memory.SharedMemory] = []
+        try:
+            for (symbol, timeframe), frame in history.items():
+                rows = len(frame)
+                block = shared_memory.SharedMemory(create=True, size=max(len(COLUMNS) * rows * 8, 1))
+                self._blocks.append(block)
+                _publish(block, frame)
+                self.specs.append(SharedFrameSpec(symbol, timeframe, block.name, rows))
+        except BaseException:
+            # Blocos já criados não somem com o processo: ficariam em /dev/shm.
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> SharedHistory:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _publish(block: shared_memory.SharedMemory, frame: pd.DataFrame) -> None:
+    data = np.ndarray((len(COLUMNS), len(frame)), dtype=np.float64, buffer=block.buf)
+    try:
+        data[0] = frame["open_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        for pos, col in enumerate(COLUMNS[1:], start=1):
+            data[pos] = frame[col].to_numpy(dtype=float)
+    finally:
+        # A view segura o buffer; sem soltá-la, `close` do bloco falha se a cópia der erro.
+        del data
+
+
+def attach_history(
+    specs: list[SharedFrameSpec],
+) -> tuple[dict[tuple[str, str], pd.DataFrame], list[shared_memory.SharedMemory]]:
+    """Monta os frames sobre os blocos publicados. Os blocos devolvidos precisam continuar vivos."""
+    history = {}
+    blocks = []
+    for spec in specs:
+        block = shared_memory.SharedMemory(name=spec.name)
+        blocks.append(block)
+        data = np.ndarray((len(COLUMNS), spec.rows), dtype=np.float64, buffer=block.buf)
+        data.flags.writeable = False
+        open_time = pd.to_datetime(data[0].astype(np.int64), unit="ms", utc=True)
+        frame = pd.DataFrame({col: data[pos] for pos, col in enumerate(COLUMNS[1:], start=1)}, copy=False)
+        frame.insert(0, "open_time", open_time)
+        frame["close_time"] = open_time + timeframe_delta(spec.timeframe) - pd.Timedelta(milliseconds=1)
+        history[(spec.symbol, spec.timeframe)] = frame
+    return history, blocks
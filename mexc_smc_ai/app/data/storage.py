@@ -1,20 +1,282 @@
-"""Storage opcional para histórico (stub)."""
+"""Armazenamento colunar de candles em disco (arquivos NumPy brutos lidos via mmap)."""
 from __future__ import annotations
 
+import contextlib
+import json
+import os
+import threading
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do mesmo processo.
+    fcntl = None
+
+import numpy as np
 import pandas as pd
 
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
 
 
 LOGGER = get_logger(__name__)
 
+# Tempos em ms desde o epoch (int64); preços e volume em float64.
+COLUMNS: dict[str, np.dtype] = {
+    "open_time": np.dtype(np.int64),
+    "close_time": np.dtype(np.int64),
+    "open": np.dtype(np.float64),
+    "high": np.dtype(np.float64),
+    "low": np.dtype(np.float64),
+    "close": np.dtype(np.float64),
+    "volume": np.dtype(np.float64),
+}
+TIME_COLUMNS = ("open_time", "close_time")
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+SNAPSHOT_ATTEMPTS = 5
+
+
+def _to_ms(values: pd.Series) -> np.ndarray:
+    return values.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+
+def _partition_name(timeframe: str) -> str:
+    # "1M" (mês) e "1m" (minuto) colidiriam em sistemas de arquivos sem distinção de caixa.
+    return "1mo" if timeframe == "1M" else timeframe
+
+
+class HistoryStore:
+    """Candles fechados particionados em `<root>/<SÍMBOLO>/<timeframe>/<coluna>.bin`.
+
+    Cada coluna é um vetor binário contíguo ordenado por `open_time`, sem
+    duplicatas. Leituras abrem os arquivos com `np.memmap` e recortam o
+    intervalo pedido por busca binária, sem parse. Candles mais novos que o
+    último gravado são anexados ao fim dos arquivos; candles que caem dentro
+    do histórico só provocam regravação da partição se ainda não existirem
+    (lacunas).
+
+    Leituras não alteram nada: usam o menor comprimento entre as colunas, que
+    só conta linhas já escritas em todas. Escritas (`append`) seguram um
+    `flock` em `<partição>/.lock`, valendo também entre processos (motor,
+    backfill, dashboard); é só sob esse lock que colunas com tamanhos
+    diferentes, sobra de uma escrita interrompida, são truncadas.
+
+    A regravação escreve uma geração nova das colunas (`<coluna>.<n>.bin`) e
+    só então troca a geração em `manifest.json` com `os.replace`; até lá os
+    leitores continuam vendo a geração anterior inteira. Sem manifesto, vale
+    a geração 0 (`<coluna>.bin`).
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol: str, timeframe: str) -> Path:
+        return self.root / symbol / _partition_name(timeframe)
+
+    def _generation(self, directory: Path) -> int:
+        manifest = directory / MANIFEST
+        if not manifest.exists():
+            return 0
+        return int(json.loads(manifest.read_text())["generation"])
+
+    def _files(self, symbol: str, timeframe: str, generation: int | None = None) -> dict[str, Path]:
+        directory = self._dir(symbol, timeframe)
+        if generation is None:
+            generation = self._generation(directory)
+        suffix = ".bin" if generation == 0 else f".{generation}.bin"
+        return {column: directory / f"{column}{suffix}" for column in COLUMNS}
+
+    def _rows(self, files: dict[str, Path]) -> int:
+        sizes = [path.stat().st_size // COLUMNS[column].itemsize if path.exists() else 0 for column, path in files.items()]
+        return min(sizes)
+
+    def _repair(self, files: dict[str, Path]) -> int:
+        """Trunca as colunas para linhas completas. Só com o lock de escrita da partição."""
+        rows = self._rows(files)
+        for column, path in files.items():
+            if path.exists() and path.stat().st_size != rows * COLUMNS[column].itemsize:
+                os.truncate(path, rows * COLUMNS[column].itemsize)
+        return rows
+
+    def _snapshot(self, symbol: str, timeframe: str) -> tuple[dict[str, Path], dict[str, np.ndarray]]:
+        """Colunas de uma geração consistente, mesmo com uma regravação concorrente trocando o manifesto."""
+        directory = self._dir(symbol, timeframe)
+        for attempt in range(SNAPSHOT_ATTEMPTS):
+            generation = self._generation(directory)
+            files = self._files(symbol, timeframe, generation)
+            try:
+                rows = self._rows(files)
+                data = {column: self._column(files, column, rows) for column in COLUMNS}
+            except FileNotFoundError:
+                # A geração foi apagada por uma regravação entre ler o manifesto e abrir as colunas.
+                if attempt == SNAPSHOT_ATTEMPTS - 1:
+                    raise
+                continue
+            if self._generation(directory) == generation:
+                break
+        return files, data
+
+    @contextlib.contextmanager
+    def _write_lock(self, symbol: str, timeframe: str):
+        directory = self._dir(symbol, timeframe)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(directory / LOCK_FILE, "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _column(self, files: dict[str, Path], column: str, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(files[column], dtype=COLUMNS[column], mode="r", shape=(rows,))
+
+    def __len__(self) -> int:
+        return sum(self.rows(symbol, tf) for symbol, tf in self.partitions())
+
+    def partitions(self) -> list[tuple[str, str]]:
+        if not self.root.exists():
+            return []
+        return [
+            (symbol_dir.name, "1M" if tf_dir.name == "1mo" else tf_dir.name)
+            for symbol_dir in sorted(self.root.iterdir())
+            if symbol_dir.is_dir()
+            for tf_dir in sorted(symbol_dir.iterdir())
+            if tf_dir.is_dir()
+        ]
+
+    def rows(self, symbol: str, timeframe: str) -> int:
+        return len(self._snapshot(symbol, timeframe)[1]["open_time"])
+
+    def last_open_time(self, symbol: str, timeframe: str) -> pd.Timestamp | None:
+        times = self._snapshot(symbol, timeframe)[1]["open_time"]
+        if not len(times):
+            return None
+        return pd.Timestamp(int(times[-1]), unit="ms", tz="UTC")
+
+    def columns(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Visões memmap (somente leitura) das colunas com `start <= open_time < end`."""
+        data = self._snapshot(symbol, timeframe)[1]
+        times = data["open_time"]
+        rows = len(times)
+        first = 0 if start is None else int(np.searchsorted(times, pd.Timestamp(start).value // 1_000_000, side="left"))
+        last = rows if end is None else int(np.searchsorted(times, pd.Timestamp(end).value // 1_000_000, side="left"))
+        return {column: values[first:last] for column, values in data.items()}
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+    ) -> pd.DataFrame:
+        """Frame no layout de `normalize_klines` (sem as colunas que não são armazenadas)."""
+        data = self.columns(symbol, timeframe, start, end)
+        frame = pd.DataFrame({column: np.asarray(values) for column, values in data.items()})
+        for column in TIME_COLUMNS:
+            frame[column] = pd.to_datetime(frame[column], unit="ms", utc=True)
+        frame["symbol"] = symbol
+        frame["timeframe"] = timeframe
+        return frame
+
+    def append(self, symbol: str, timeframe: str, frame: pd.DataFrame) -> int:
+        """Grava candles (fechados) deduplicando por `open_time`. Retorna quantos eram novos."""
+        if frame.empty:
+            return 0
+        incoming = {column: frame[column].to_numpy(dtype=dtype) for column, dtype in COLUMNS.items() if column not in TIME_COLUMNS}
+        for column in TIME_COLUMNS:
+            incoming[column] = _to_ms(frame[column])
+        order = np.argsort(incoming["open_time"], kind="stable")
+        incoming = {column: values[order] for column, values in incoming.items()}
+        # Dentro do lote, vale a última ocorrência de cada open_time.
+        times = incoming["open_time"]
+        keep = np.append(times[1:] != times[:-1], True)
+        incoming = {column: values[keep] for column, values in incoming.items()}
+
+        with self._write_lock(symbol, timeframe):
+            files = self._files(symbol, timeframe)
+            rows = self._repair(files)
+            stored = self._column(files, "open_time", rows)
+            last = int(stored[-1]) if rows else None
+            newer = incoming["open_time"] > last if last is not None else np.ones(len(incoming["open_time"]), dtype=bool)
+            older_times = incoming["open_time"][~newer]
+            if len(older_times):
+                pos = np.searchsorted(stored, older_times)
+                exists = np.zeros(len(older_times), dtype=bool)
+                inside = pos < rows
+                exists[inside] = stored[pos[inside]] == older_times[inside]
+                if not exists.all():
+                    # Lote ordenado: as lacunas vêm antes dos candles novos.
+                    take = np.concatenate([np.flatnonzero(~newer)[~exists], np.flatnonzero(newer)])
+                    self._merge(symbol, timeframe, files, rows, {column: values[take] for column, values in incoming.items()})
+                    return len(take)
+            fresh = {column: values[newer] for column, values in incoming.items()}
+            self._append(symbol, timeframe, files, fresh)
+            return int(newer.sum())
+
+    def _append(self, symbol: str, timeframe: str, files: dict[str, Path], data: dict[str, np.ndarray]) -> None:
+        if not len(data["open_time"]):
+            return
+        for column, dtype in COLUMNS.items():
+            with open(files[column], "ab") as handle:
+                handle.write(np.ascontiguousarray(data[column], dtype=dtype).tobytes())
+
+    def _merge(self, symbol: str, timeframe: str, files: dict[str, Path], rows: int, extra: dict[str, np.ndarray]) -> None:
+        """Regrava a partição com candles que preenchem lacunas do histórico."""
+        merged = {
+            column: np.concatenate([np.asarray(self._column(files, column, rows)), extra[column]])
+            for column in COLUMNS
+        }
+        order = np.argsort(merged["open_time"], kind="stable")
+        merged = {column: values[order] for column, values in merged.items()}
+        directory = self._dir(symbol, timeframe)
+        generation = self._generation(directory) + 1
+        fresh = self._files(symbol, timeframe, generation)
+        for column, dtype in COLUMNS.items():
+            with open(fresh[column], "wb") as handle:
+                handle.write(np.ascontiguousarray(merged[column], dtype=dtype).tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+        self._commit(directory, generation)
+        for path in directory.glob("*.bin"):
+            if path not in fresh.values():
+                # Sobras de gerações anteriores (ou de uma regravação interrompida).
+                with contextlib.suppress(OSError):
+                    path.unlink()
+        log_event(
+            LOGGER,
+            "history_merged",
+            message="Lacunas do histórico preenchidas",
+            symbol=symbol,
+            timeframe=timeframe,
+            rows=len(merged["open_time"]),
+        )
+
+    def _commit(self, directory: Path, generation: int) -> None:
+        """Publica a geração com uma única troca atômica do manifesto."""
+        tmp = directory / f"{MANIFEST}.tmp"
+        with open(tmp, "w") as handle:
+            json.dump({"generation": generation}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, directory / MANIFEST)
+
 
-def save_history(path: str, frame: pd.DataFrame) -> None:
-    db_path = Path(path)
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    frame.to_csv(db_path, index=False)
-    log_event(LOGGER, "history_saved", message="Histórico salvo", path=str(db_path))
-    LOGGER.info("history_saved", extra={"message": "Histórico salvo", "path": str(db_path)})
+def save_history(store: HistoryStore, frame: pd.DataFrame, now: pd.Timestamp | None = None) -> int:
+    """Anexa ao store os candles já fechados de um frame de `normalize_klines`."""
+    if now is not None:
+        frame = frame[frame["close_time"] < now]
+    if frame.empty:
+        return 0
+    symbol, timeframe = frame["symbol"].iloc[0], frame["timeframe"].iloc[0]
+    return store.append(symbol, timeframe, frame)
@@ -0,0 +1,158 @@
+"""Ingestão de candles via WebSocket da MEXC (alternativa ao polling REST)."""
+from __future__ import annotations
+
+import json
+import threading
+from typing import Callable
+
+from websockets.exceptions import WebSocketException
+from websockets.sync.client import connect
+
+from app.core.config import env
+from app.core.logger import get_logger, log_event
+from app.data.feed import CandleCache
+from app.data.mexc_client import MexcClient
+
+
+LOGGER = get_logger(__name__)
+
+STREAM_URL = env("MEXC_WS_URL", "wss://wbs.mexc.com/ws") or "wss://wbs.mexc.com/ws"
+CHANNEL_TEMPLATE = "spot@public.kline.v3.api@{symbol}@{interval}"
+INTERVALS = {
+    "1m": "Min1",
+    "5m": "Min5",
+    "15m": "Min15",
+    "30m": "Min30",
+    "60m": "Min60",
+    "1h": "Min60",
+    "4h": "Hour4",
+    "8h": "Hour8",
+    "1d": "Day1",
+    "1W": "Week1",
+    "1M": "Month1",
+}
+
+
+def channel_name(symbol: str, timeframe: str) -> str:
+    return CHANNEL_TEMPLATE.format(symbol=symbol, interval=INTERVALS[timeframe])
+
+
+def kline_from_push(data: dict) -> list:
+    """Converte o payload `k` do push para o layout de linha do REST `/api/v3/klines`."""
+    open_ms = int(data["t"]) * 1000
+    close_ms = int(data["T"]) * 1000 - 1
+    return [
+        open_ms,
+        data["o"],
+        data["h"],
+        data["l"],
+        data["c"],
+        data["v"],
+        close_ms,
+        data.get("a", "0"),
+        0,
+        "0",
+        "0",
+        "0",
+    ]
+
+
+class KlineStream:
+    """Mantém os frames do `CandleCache` atualizados por push e avisa quando um candle fecha.
+
+    A cada (re)conexão os frames são completados via REST (`CandleCache.get`),
+    cobrindo a lacuna do período desconectado; se um candle fechou durante a
+    lacuna, `on_close` também é chamado para ele. A MEXC aceita no máximo 30
+    inscrições por conexão, então universos maiores devem usar várias instâncias.
+    """
+
+    def __init__(
+        self,
+        client: MexcClient,
+        cache: CandleCache,
+        subscriptions: list[tuple[str, str]],
+        on_close: Callable[[str, str], None],
+        url: str = STREAM_URL,
+        limit: int = 200,
+        reconnect_seconds: float = 5.0,
+        ping_seconds: float = 20.0,
+    ) -> None:
+        self.client = client
+        self.cache = cache
+        self.on_close = on_close
+        self.url = url
+        self.limit = limit
+        self.reconnect_seconds = reconnect_seconds
+        self.ping_seconds = ping_seconds
+        # Aliases ("60m"/"1h") caem no mesmo canal: cada push atualiza todos os timeframes inscritos nele.
+        self.channels: dict[str, list[tuple[str, str]]] = {}
+        for symbol, tf in dict.fromkeys(subscriptions):
+            self.channels.setdefault(channel_name(symbol, tf), []).append((symbol, tf))
+        self.connections = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name="kline-stream", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reconnect_seconds + self.ping_seconds)
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.backfill()
+                self._listen()
+            except (OSError, TimeoutError, WebSocketException, RuntimeError) as exc:
+                log_event(
+                    LOGGER,
+                    "stream_disconnected",
+                    message="Stream desconectado, reconectando",
+                    error=str(exc),
+                    level="warning",
+                )
+            self._stop.wait(self.reconnect_seconds)
+
+    def backfill(self) -> None:
+        for symbol, timeframe in (target for targets in self.channels.values() for target in targets):
+            before = self.cache.frame(symbol, timeframe)
+            last_open = before["open_time"].iloc[-1] if before is not None and not before.empty else None
+            frame = self.cache.get(self.client, symbol, timeframe, limit=self.limit)
+            if last_open is not None and frame["open_time"].iloc[-1] > last_open:
+                self.on_close(symbol, timeframe)
+
+    def _listen(self) -> None:
+        with connect(self.url, open_timeout=self.ping_seconds) as socket:
+            self.connections += 1
+            socket.send(json.dumps({"method": "SUBSCRIPTION", "params": list(self.channels)}))
+            log_event(
+                LOGGER,
+                "stream_connected",
+                message="Stream de candles conectado",
+                channels=len(self.channels),
+            )
+            while not self._stop.is_set():
+                try:
+                    raw = socket.recv(timeout=self.ping_seconds)
+                except TimeoutError:
+                    socket.send(json.dumps({"method": "PING"}))
+                    continue
+                self.handle_message(raw)
+
+    def handle_message(self, raw: str | bytes) -> None:
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return
+        targets = self.channels.get(payload.get("c", ""))
+        data = payload.get("d", {}).get("k")
+        if not targets or not data:
+            return
+        kline = kline_from_push(data)
+        for symbol, timeframe in targets:
+            if self.cache.apply_kline(symbol, timeframe, kline):
+                self.on_close(symbol, timeframe)
@@ -0,0 +1,221 @@
+"""Backtest orientado a eventos: replay candle a candle do pipeline do `SignalEngine`."""
+from __future__ import annotations
+
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.logger import get_logger, log_event
+from app.core.models import OrderBlock, Trade
+from app.core.state import EngineState
+from app.core.timeframes import timeframe_delta
+from app.data.storage import HistoryStore
+from app.engine.signal_engine import SignalEngine, enrich_frame
+from app.smc.bias import bias_codes, composite_codes
+from app.smc.confluence import bias_allows
+from app.smc.order_blocks import order_blocks_by_confirmation
+
+
+LOGGER = get_logger(__name__)
+
+@dataclass
+class SimulatedClock:
+    current: datetime = datetime(1970, 1, 1)
+
+    def now(self) -> datetime:
+        return self.current
+
+
+@dataclass
+class BacktestResult:
+    trades: list[Trade]
+    equity: pd.DataFrame
+    stats: dict = field(default_factory=dict)
+
+
+def equity_curve(trades: list[Trade]) -> pd.DataFrame:
+    closed = sorted((t for t in trades if t.status == "closed"), key=lambda t: t.closed_at)
+    frame = pd.DataFrame(
+        {
+            "time": [t.closed_at for t in closed],
+            "symbol": [t.symbol for t in closed],
+            "pnl": [t.pnl for t in closed],
+            "return_pct": [t.pnl / t.entry_price * 100 for t in closed],
+        }
+    )
+    frame["equity"] = frame["pnl"].cumsum()
+    frame["equity_pct"] = frame["return_pct"].cumsum()
+    return frame
+
+
+def summarize(trades: list[Trade], equity: pd.DataFrame) -> dict:
+    pnl = equity["pnl"].to_numpy(dtype=float)
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    curve = equity["equity_pct"].to_numpy(dtype=float)
+    drawdown = np.maximum.accumulate(np.concatenate([[0.0], curve])) - np.concatenate([[0.0], curve])
+    return {
+        "trades": len(trades),
+        "closed": len(pnl),
+        "open": len(trades) - len(pnl),
+        "wins": len(wins),
+        "losses": len(losses),
+        "win_rate": len(wins) / len(pnl) if len(pnl) else 0.0,
+        "total_pnl": float(pnl.sum()),
+        "total_return_pct": float(curve[-1]) if len(curve) else 0.0,
+        "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) else float("inf") if len(wins) else 0.0,
+        "max_drawdown_pct": float(drawdown.max()),
+    }
+
+
+class Backtester:
+    """Alimenta o `SignalEngine` com candles históricos, um candle fechado por vez.
+
+    Indicadores e OBs são calculados uma única vez sobre o histórico inteiro
+    (todos são causais); cada OB entra no registro no candle em que seu pivot
+    fica confirmado, como aconteceria ao vivo. O frame de `window` candles que
+    o engine veria só é montado e enriquecido nos candles em que algum OB é
+    tocado e as confluências pré-calculadas não descartam o sinal, e então
+    passa pelo mesmo `evaluate_touches` (confluência, IA e `PaperBroker`).
+    """
+
+    def __init__(self, config: dict, window: int = 200) -> None:
+        self.config = config
+        self.window = window
+        self.clock = SimulatedClock()
+        self.state = EngineState(trades=deque(), signals=deque())
+        self.engine = SignalEngine(config=config, state=self.state, clock=self.clock.now)
+
+    def run(
+        self,
+        history: dict[tuple[str, str], pd.DataFrame],
+        trade_from: pd.Timestamp | None = None,
+    ) -> BacktestResult:
+        """Com `trade_from`, os candles anteriores só aquecem indicadores e OBs (sem sinais)."""
+        bars = 0
+        for symbol in self.config["symbols"]:
+            for timeframe in self.config["timeframes"]["execution_tf"]:
+                frame = history.get((symbol, timeframe))
+                if frame is None or frame.empty:
+                    log_event(
+                        LOGGER,
+                        "backtest_missing_history",
+                        message="Sem histórico para o backtest",
+                        symbol=symbol,
+                        timeframe=timeframe,
+                        level="warning",
+                    )
+                    continue
+                higher = [
+                    history[(symbol, tf)]
+                    for tf in self.config["timeframes"]["higher_tf"]
+                    if (symbol, tf) in history
+                ]
+                bars += self.replay(symbol, timeframe, frame, higher, trade_from)
+
+        trades = sorted(self.state.trades, key=lambda t: t.opened_at)
+        equity = equity_curve(trades)
+        stats = summarize(trades, equity)
+        stats["bars"] = bars
+        stats["signals"] = len(self.state.signals)
+        log_event(LOGGER, "backtest_finished", message="Backtest concluído", **stats)
+        return BacktestResult(trades=trades, equity=equity, stats=stats)
+
+    def _may_signal(self, ob: OrderBlock, bias: str, volume_ok: bool) -> bool:
+        """Descarta de antemão toques que `evaluate_touches` certamente rejeitaria."""
+        confluence = self.config["confluence"]
+        direction = "buy" if ob.direction == "bull" else "sell"
+        if confluence["require_volume_spike"] and not volume_ok:
+            return False
+        if confluence["require_bias_alignment"] and not bias_allows(direction, bias):
+            return False
+        # Divergência só é marcada em pivots, e com pivot_right > 0 o último candle nunca é pivot.
+        if confluence["require_rsi_divergence"] and self.config["order_block"]["pivot_right"] > 0:
+            return False
+        return True
+
+    def replay(
+        self,
+        symbol: str,
+        timeframe: str,
+        frame: pd.DataFrame,
+        higher: list[pd.DataFrame],
+        trade_from: pd.Timestamp | None = None,
+    ) -> int:
+        frame = frame.sort_values("open_time").reset_index(drop=True)
+        first_trade = 0 if trade_from is None else int(frame["open_time"].searchsorted(trade_from))
+        enriched = enrich_frame(frame, self.config)
+        pending = order_blocks_by_confirmation(enriched, symbol, timeframe, self.config["order_block"])
+
+        moments = frame["open_time"] + timeframe_delta(timeframe)
+        biases = composite_codes([bias_codes(htf, moments) for htf in higher], len(frame))
+        clock_times = moments.dt.tz_convert(None).dt.to_pydatetime()
+        highs = enriched["high"].to_numpy(dtype=float)
+        lows = enriched["low"].to_numpy(dtype=float)
+        closes = enriched["close"].to_numpy(dtype=float)
+        atrs = enriched["atr"].to_numpy(dtype=float)
+        volume_ok = enriched["volume_spike"].to_numpy(dtype=bool)
+
+        registry = self.engine._registry(symbol, timeframe)
+        broker = self.engine.paper_broker
+        for idx in range(len(frame)):
+            self.clock.current = clock_times[idx]
+            high, low, close = highs[idx], lows[idx], closes[idx]
+            broker.update_bar(high, low, close, atrs[idx], symbol=symbol, timeframe=timeframe)
+            added, evicted = registry.replay_bar(pending.pop(idx, []), high, low, close)
+            if added or evicted:
+                self.engine.mirror_order_blocks(symbol, timeframe, added, evicted)
+            if idx < first_trade:
+                continue
+            bias = str(biases[idx])
+            touched = [ob for ob in registry.touched(high, low, close) if self._may_signal(ob, bias, volume_ok[idx])]
+            if not touched:
+                continue
+            window = frame.iloc[max(0, idx - self.window + 1) : idx + 1].reset_index(drop=True)
+            self.engine.evaluate_touches(symbol, timeframe, bias, self.engine._enrich_frame(window), touched)
+        return len(frame) - first_trade
+
+
+def load_backtest_history(config: dict, data_dir: str) -> dict[tuple[str, str], pd.DataFrame]:
+    """Lê do `HistoryStore` em `data_dir` cada par (símbolo, timeframe) configurado."""
+    timeframes = dict.fromkeys(config["timeframes"]["higher_tf"] + config["timeframes"]["execution_tf"])
+    store = HistoryStore(data_dir)
+    history = {}
+    for symbol in config["symbols"]:
+        for timeframe in timeframes:
+            if store.rows(symbol, timeframe):
+                history[(symbol, timeframe)] = store.read(symbol, timeframe)
+    return history
+
+
+def write_report(result: BacktestResult, output_dir: str) -> Path:
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(
+        [
+            {
+                "id": t.id,
+                "symbol": t.symbol,
+                "timeframe": t.timeframe,
+                "profile": t.profile,
+                "direction": t.direction,
+                "opened_at": t.opened_at,
+                "closed_at": t.closed_at,
+                "entry_price": t.entry_price,
+                "exit_price": t.exit_price,
+                "stop_price": t.stop_price,
+                "target_price": t.target_price,
+                "status": t.status,
+                "pnl": t.pnl,
+            }
+            for t in result.trades
+        ]
+    ).to_csv(output / "trades.csv", index=False)
+    result.equity.to_csv(output / "equity.csv", index=False)
+    (output / "stats.json").write_text(json.dumps(result.stats, indent=2), encoding="utf-8")
+    return output
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Callable
 from uuid import uuid4
 
 import pandas as pd
@@ -13,18 +14,32 @@ from app.risk.rules import target_from_atr
 from app.risk.trailing import trailing_stop_long, trailing_stop_short
 
 
+# Stop inicial além do OB e distância do trailing stop, em ATRs.
+STOP_ATR_BUFFER = 0.5
+TRAILING_ATR_MULT = 1.2
+
+
+def _last_atr(frame: pd.DataFrame) -> float:
+    # Frames enriquecidos pelo engine já trazem a coluna `atr`.
+    if "atr" in frame.columns:
+        return float(frame["atr"].iloc[-1])
+    return float(compute_atr(frame).iloc[-1])
+
+
 class PaperBroker:
-    def __init__(self, state: EngineState) -> None:
+    def __init__(self, state: EngineState, clock: Callable[[], datetime] = datetime.utcnow) -> None:
         self.state = state
+        self.clock = clock
+        self.open_trades: list[Trade] = []
 
     def open_trade(self, signal: Signal, frame: pd.DataFrame, ob: OrderBlock) -> None:
-        atr = compute_atr(frame).iloc[-1]
+        atr = _last_atr(frame)
         entry = float(frame["close"].iloc[-1])
         stop = ob.low if signal.direction == "buy" else ob.high
         if signal.direction == "buy":
-            stop -= atr * 0.5
+            stop -= atr * STOP_ATR_BUFFER
         else:
-            stop += atr * 0.5
+            stop += atr * STOP_ATR_BUFFER
         mult = 1.5
         target = target_from_atr(entry, atr, mult, signal.direction)
         trade = Trade(
@@ -37,7 +52,7 @@ class PaperBroker:
             stop_price=stop,
             target_price=target,
             status="open",
-            opened_at=datetime.utcnow(),
+            opened_at=self.clock(),
             narrative=[
                 f"OB {ob.direction} validado entre {ob.low:.2f}-{ob.high:.2f}",
                 f"Entrada simulada {entry:.2f}",
@@ -46,26 +61,44 @@ class PaperBroker:
             ],
         )
         self.state.add_trade(trade)
+        self.open_trades.append(trade)
 
-    def update_trades(self, frame: pd.DataFrame) -> None:
-        if not self.state.trades:
+    def update_trades(self, frame: pd.DataFrame, symbol: str | None = None, timeframe: str | None = None) -> None:
+        if not self.open_trades:
             return
-        atr = compute_atr(frame).iloc[-1]
         last = frame.iloc[-1]
-        for trade in list(self.state.trades):
-            if trade.status != "open":
+        self.update_bar(last["high"], last["low"], last["close"], _last_atr(frame), symbol, timeframe)
+
+    def update_bar(
+        self,
+        high: float,
+        low: float,
+        close: float,
+        atr: float,
+        symbol: str | None = None,
+        timeframe: str | None = None,
+    ) -> list[Trade]:
+        """Avança os trades abertos (do símbolo/timeframe, se informados) com um candle. Retorna os encerrados."""
+        closed: list[Trade] = []
+        for trade in self.open_trades:
+            if (symbol is not None and trade.symbol != symbol) or (timeframe is not None and trade.timeframe != timeframe):
                 continue
             if trade.direction == "buy":
-                trade.stop_price = trailing_stop_long(trade.stop_price, last["close"], atr, 1.2)
-                if last["low"] <= trade.stop_price:
+                trade.stop_price = trailing_stop_long(trade.stop_price, close, atr, TRAILING_ATR_MULT)
+                if low <= trade.stop_price:
                     trade.status = "closed"
                     trade.exit_price = trade.stop_price
             else:
-                trade.stop_price = trailing_stop_short(trade.stop_price, last["close"], atr, 1.2)
-                if last["high"] >= trade.stop_price:
+                trade.stop_price = trailing_stop_short(trade.stop_price, close, atr, TRAILING_ATR_MULT)
+                if high >= trade.stop_price:
                     trade.status = "closed"
                     trade.exit_price = trade.stop_price
             if trade.status == "closed":
-                trade.closed_at = datetime.utcnow()
+                trade.closed_at = self.clock()
                 trade.pnl = (trade.exit_price - trade.entry_price) if trade.direction == "buy" else (trade.entry_price - trade.exit_price)
                 trade.narrative.append(f"Trade encerrado com PnL {trade.pnl:.2f}")
+                self.state.update_trade(trade)
+                closed.append(trade)
+        if closed:
+            self.open_trades = [trade for trade in self.open_trades if trade.status == "open"]
+        return closed
@@ -1,34 +1,144 @@
-"""Scheduler de polling por timeframe."""
+"""Schedulers do motor: polling fixo ou alinhado ao fechamento dos candles."""
 from __future__ import annotations
 
 import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
 
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
+from app.core.timeframes import candle_open, next_close
+from app.data.stream import KlineStream
 from app.engine.signal_engine import SignalEngine
 
 
 LOGGER = get_logger(__name__)
 
 
+def _utc(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
 class EngineScheduler:
-    def __init__(self, engine: SignalEngine, polling_seconds: int) -> None:
+    """Roda o ciclo completo a cada `polling_seconds`, descontando a duração do próprio ciclo."""
+
+    def __init__(
+        self,
+        engine: SignalEngine,
+        polling_seconds: int,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
         self.engine = engine
         self.polling_seconds = polling_seconds
+        self.sleep = sleep
+
+    def _run_cycle(self, **kwargs) -> None:
+        try:
+            self.engine.run_cycle(**kwargs)
+        except Exception as exc:
+            log_event(
+                LOGGER,
+                "engine_cycle_failed",
+                message="Erro no ciclo da engine",
+                error=str(exc),
+                level="error",
+            )
 
     def run(self) -> None:
+        deadline = time.monotonic()
         while True:
-            try:
-                self.engine.run_cycle()
-            except Exception as exc:
-                log_event(
-                    LOGGER,
-                    "engine_cycle_failed",
-                    message="Erro no ciclo da engine",
-                    error=str(exc),
-                    level="error",
-                LOGGER.error(
-                    "engine_cycle_failed",
-                    extra={"message": "Erro no ciclo da engine", "error": str(exc)},
-                )
-            time.sleep(self.polling_seconds)
+            self._run_cycle()
+            deadline += self.polling_seconds
+            # Ciclo mais longo que o intervalo: recomeça a contagem em vez de acumular atraso.
+            deadline = max(deadline, time.monotonic())
+            self.sleep(deadline - time.monotonic())
+
+
+class CandleCloseScheduler(EngineScheduler):
+    """Acorda `grace_seconds` depois do fechamento de cada timeframe de execução e processa só os que fecharam.
+
+    Os horários de despertar são absolutos (derivados do relógio, não da
+    duração do ciclo anterior), então o atraso não se acumula. Se um ciclo
+    atravessar vários fechamentos, o seguinte processa todos os timeframes
+    pendentes de uma vez. Com `intrabar_seconds > 0`, entre os fechamentos
+    roda também um ciclo sobre o candle em formação (detecção de toque),
+    alinhado a múltiplos de `intrabar_seconds`.
+    """
+
+    def __init__(
+        self,
+        engine: SignalEngine,
+        timeframes: list[str],
+        grace_seconds: float = 2.0,
+        intrabar_seconds: float = 0.0,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        super().__init__(engine, polling_seconds=0, sleep=sleep)
+        self.timeframes = list(timeframes)
+        self.grace = timedelta(seconds=grace_seconds)
+        self.intrabar_seconds = intrabar_seconds
+        self.clock = clock
+        self.last_closed: dict[str, datetime] = {}
+
+    def _now(self) -> datetime:
+        return _utc(self.clock())
+
+    def closed_timeframes(self, now: datetime) -> list[str]:
+        """Timeframes com candle fechado há pelo menos `grace_seconds` e ainda não processado."""
+        shifted = now - self.grace
+        return [tf for tf in self.timeframes if tf not in self.last_closed or candle_open(shifted, tf) > self.last_closed[tf]]
+
+    def next_wake(self, now: datetime) -> datetime:
+        shifted = now - self.grace
+        wake = min(next_close(shifted, tf) for tf in self.timeframes) + self.grace
+        if self.intrabar_seconds > 0:
+            step = self.intrabar_seconds
+            wake = min(wake, datetime.fromtimestamp((now.timestamp() // step + 1) * step, tz=timezone.utc))
+        return wake
+
+    def step(self) -> list[str]:
+        """Executa o que estiver devido agora e dorme até o próximo horário. Retorna os timeframes fechados processados."""
+        now = self._now()
+        closed = self.closed_timeframes(now)
+        if closed:
+            self._run_cycle(timeframes=closed, closed_only=True)
+            for tf in closed:
+                self.last_closed[tf] = candle_open(now - self.grace, tf)
+        elif self.intrabar_seconds > 0:
+            self._run_cycle(closed_only=False)
+        log_event(LOGGER, "scheduler_tick", level="debug", closed=closed, intrabar=not closed)
+        after = self._now()
+        self.sleep(max((self.next_wake(after) - after).total_seconds(), 0.0))
+        return closed
+
+    def run(self) -> None:
+        while True:
+            self.step()
+
+
+def build_scheduler(engine: SignalEngine, config: dict) -> EngineScheduler:
+    """Scheduler de `engine.schedule`: `close` (alinhado ao fechamento) ou `polling`."""
+    settings = config["engine"]
+    if settings.get("schedule", "close") == "polling":
+        return EngineScheduler(engine=engine, polling_seconds=settings["polling_seconds"])
+    return CandleCloseScheduler(
+        engine=engine,
+        timeframes=config["timeframes"]["execution_tf"],
+        grace_seconds=settings.get("close_grace_seconds", 2.0),
+        intrabar_seconds=settings.get("intrabar_seconds", 0),
+        clock=engine.clock,
+    )
+
+
+def drive_engine(engine: SignalEngine, config: dict) -> None:
+    """Laço principal do motor: WebSocket (`engine.feed: stream`) ou o scheduler de `engine.schedule`."""
+    if config["engine"].get("feed", "rest") == "stream":
+        stream = KlineStream(
+            client=engine.client,
+            cache=engine.candle_cache,
+            subscriptions=engine.stream_subscriptions(),
+            on_close=engine.on_candle_close,
+        )
+        stream.run()
+        return
+    build_scheduler(engine, config).run()
@@ -0,0 +1,272 @@
+"""Motor em vários processos: símbolos divididos por hash entre workers, estado centralizado no coordenador."""
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import queue
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable
+
+from app.core.logger import configure_logging, get_logger, log_event
+from app.core.metrics import METRICS, configure_metrics
+from app.core.state import EngineState
+from app.data.mexc_client import MexcClient
+from app.data.rate_limit import SharedTokenBucket, TokenBucket
+from app.engine.scheduler import drive_engine
+from app.engine.signal_engine import SignalEngine
+
+
+LOGGER = get_logger(__name__)
+
+# Eventos aplicados por chamada de `drain` antes de checar a saúde dos workers.
+DRAIN_BATCH = 1000
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """Shard do símbolo; crc32 é estável entre processos e execuções (ao contrário de `hash`)."""
+    return zlib.crc32(symbol.encode("utf-8")) % shards
+
+
+def partition_symbols(symbols: list[str], shards: int) -> list[list[str]]:
+    parts: list[list[str]] = [[] for _ in range(shards)]
+    for symbol in symbols:
+        parts[shard_of(symbol, shards)].append(symbol)
+    return parts
+
+
+def apply_event(state: EngineState, kind: str, item: Any) -> None:
+    """Reaplica no estado do coordenador uma mudança emitida pelo `EngineState` de um worker."""
+    if kind == "signal":
+        state.add_signal(item)
+    elif kind == "trade":
+        # O worker manda uma cópia a cada mudança; substitui a versão anterior do mesmo trade.
+        for pos, trade in enumerate(state.trades):
+            if trade.id == item.id:
+                state.trades[pos] = item
+                state.update_trade(item)
+                return
+        state.add_trade(item)
+    elif kind == "order_block":
+        state.add_order_block(*item)
+    elif kind == "order_block_removed":
+        state.remove_order_block(*item)
+    elif kind == "log":
+        state.add_log(item)
+    elif kind == "last_update":
+        state.mark_updated(item)
+
+
+def _heartbeat(shard: int, events, seconds: float, engine: SignalEngine) -> None:
+    """Manda a cada `seconds` há quanto tempo o ciclo atual do motor está rodando e as métricas do worker."""
+    while True:
+        busy_since = engine.busy_since
+        events.put(
+            (
+                shard,
+                "heartbeat",
+                {
+                    "busy_seconds": time.perf_counter() - busy_since if busy_since is not None else 0.0,
+                    "metrics": METRICS.dump() if METRICS.enabled else None,
+                },
+            )
+        )
+        time.sleep(seconds)
+
+
+def _worker_main(shard: int, config: dict, events, limiter: TokenBucket, heartbeat_seconds: float) -> None:
+    """Processo worker: um `SignalEngine` com os símbolos do shard, caches próprios e o rate limit compartilhado."""
+    configure_logging(config.get("logging", {}))
+    configure_metrics(config.get("metrics", {}))
+    state = EngineState(sink=lambda kind, item: events.put((shard, kind, item)))
+    client = MexcClient(pool_size=max(config["engine"].get("workers", 1), 1), limiter=limiter)
+    engine = SignalEngine(config=config, state=state, client=client)
+    threading.Thread(
+        target=_heartbeat, args=(shard, events, heartbeat_seconds, engine), name="shard-heartbeat", daemon=True
+    ).start()
+    log_event(LOGGER, "shard_start", message="Worker do shard iniciado", shard=shard, symbols=len(config["symbols"]))
+    drive_engine(engine, config)
+
+
+class ShardCoordinator:
+    """Dono do `EngineState` no modo com `sharding.shards > 1`.
+
+    Cada shard roda num processo próprio (`spawn`) com os símbolos cujo crc32
+    cai nele. O `EngineState` do worker repassa cada mudança por uma fila, e
+    o coordenador a aplica no estado central, que é o que o `StateWriter` e o
+    dashboard enxergam. Todos os workers consomem o mesmo `SharedTokenBucket`,
+    então o orçamento de peso da MEXC vale para o IP inteiro.
+
+    Um worker que morre, fica `timeout_seconds` sem heartbeat ou reporta um
+    ciclo rodando há mais de `cycle_timeout_seconds` (motor travado, com a
+    thread de heartbeat viva) é reiniciado, no máximo uma vez a cada
+    `restart_delay_seconds`. Os OBs do shard saem do estado central antes do
+    reinício, porque o worker novo os detecta de novo. Trades de paper abertos
+    no worker antigo não são retomados: ficam com status `abandoned`.
+
+    Com `metrics.enabled`, cada heartbeat traz as métricas do worker, que o
+    coordenador expõe no próprio `/metrics` com o rótulo `shard`.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        state: EngineState,
+        context=None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        settings = config.get("sharding", {})
+        self.config = config
+        self.state = state
+        self.shards = max(int(settings.get("shards", 1)), 1)
+        self.heartbeat_seconds = settings.get("heartbeat_seconds", 5)
+        self.timeout_seconds = settings.get("timeout_seconds", 30)
+        self.restart_delay_seconds = settings.get("restart_delay_seconds", 5)
+        self.cycle_timeout_seconds = settings.get("cycle_timeout_seconds", 300)
+        self.clock = clock
+        self.context = context or multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.limiter = SharedTokenBucket(MexcClient.rate_limit_weight, MexcClient.rate_limit_window, context=self.context)
+        self.assignments = {
+            shard: symbols for shard, symbols in enumerate(partition_symbols(config["symbols"], self.shards)) if symbols
+        }
+        self.processes: dict[int, Any] = {}
+        self.last_seen: dict[int, float] = {}
+        self.started_at: dict[int, float] = {}
+        self.busy_seconds: dict[int, float] = {}
+        self.abandoned: set[str] = set()
+        self.restarts: dict[int, int] = defaultdict(int)
+
+    def _spawn(self, shard: int):
+        config = copy.deepcopy(self.config)
+        config["symbols"] = self.assignments[shard]
+        process = self.context.Process(
+            target=_worker_main,
+            args=(shard, config, self.events, self.limiter, self.heartbeat_seconds),
+            name=f"engine-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _start_shard(self, shard: int) -> None:
+        self.processes[shard] = self._spawn(shard)
+        self.last_seen[shard] = self.started_at[shard] = time.monotonic()
+        self.busy_seconds[shard] = 0.0
+        METRICS.set("engine_shard_up", 1, shard=shard)
+
+    def start(self) -> None:
+        for shard in self.assignments:
+            self._start_shard(shard)
+        log_event(
+            LOGGER,
+            "shards_started",
+            message="Workers do motor iniciados",
+            shards=len(self.assignments),
+            symbols=len(self.config["symbols"]),
+        )
+
+    def drain(self, timeout: float) -> int:
+        """Aplica os eventos pendentes (esperando até `timeout` pelo primeiro). Retorna quantos."""
+        try:
+            entry = self.events.get(timeout=timeout)
+        except queue.Empty:
+            return 0
+        applied = 0
+        while True:
+            shard, kind, item = entry
+            self.last_seen[shard] = time.monotonic()
+            if kind == "heartbeat":
+                self._beat(shard, item)
+            elif kind == "trade" and item.id in self.abandoned and item.status == "open":
+                # Atualização atrasada do worker antigo, ainda na fila quando ele foi reiniciado.
+                pass
+            else:
+                apply_event(self.state, kind, item)
+            applied += 1
+            if applied >= DRAIN_BATCH:
+                return applied
+            try:
+                entry = self.events.get_nowait()
+            except queue.Empty:
+                return applied
+
+    def _beat(self, shard: int, item: dict) -> None:
+        self.busy_seconds[shard] = item["busy_seconds"]
+        if item["metrics"] is not None:
+            METRICS.load(item["metrics"], shard=shard)
+
+    def _clear_shard(self, shard: int) -> None:
+        symbols = set(self.assignments[shard])
+        for key in list(self.state.order_blocks):
+            if key.rsplit("-", 1)[0] in symbols:
+                for ob in list(self.state.order_blocks[key]):
+                    self.state.remove_order_block(key, ob.id)
+        now = self.clock()
+        for trade in self.state.trades:
+            if trade.status == "open" and trade.symbol in symbols:
+                self.abandoned.add(trade.id)
+                trade.status = "abandoned"
+                trade.closed_at = now
+                trade.narrative.append("Worker do shard reiniciado; trade abandonado sem saída")
+                self.state.update_trade(trade)
+
+    def _health(self, shard: int, process, now: float) -> str | None:
+        """Motivo para reiniciar o worker (`dead`, `stale` ou `hung`), ou None se está saudável."""
+        if not process.is_alive():
+            return "dead"
+        if now - self.last_seen[shard] > self.timeout_seconds:
+            return "stale"
+        if self.busy_seconds[shard] > self.cycle_timeout_seconds:
+            return "hung"
+        return None
+
+    def check_workers(self) -> list[int]:
+        """Reinicia os workers mortos, sem heartbeat ou com o ciclo travado. Retorna os shards reiniciados."""
+        now = time.monotonic()
+        restarted = []
+        for shard, process in list(self.processes.items()):
+            reason = self._health(shard, process, now)
+            if reason is None:
+                continue
+            METRICS.set("engine_shard_up", 0, shard=shard)
+            if now - self.started_at[shard] < self.restart_delay_seconds:
+                continue
+            log_event(
+                LOGGER,
+                "shard_restart",
+                message="Worker do shard parado, sem heartbeat ou travado, reiniciando",
+                shard=shard,
+                reason=reason,
+                exitcode=process.exitcode,
+                restarts=self.restarts[shard] + 1,
+                level="warning",
+            )
+            if reason != "dead":
+                process.terminate()
+                process.join(5)
+            self._clear_shard(shard)
+            self.restarts[shard] += 1
+            METRICS.inc("engine_shard_restarts_total", shard=shard)
+            self._start_shard(shard)
+            restarted.append(shard)
+        return restarted
+
+    def stop(self) -> None:
+        for shard, process in self.processes.items():
+            if process.is_alive():
+                process.terminate()
+            process.join(5)
+            METRICS.set("engine_shard_up", 0, shard=shard)
+
+    def run(self) -> None:
+        self.start()
+        try:
+            while True:
+                self.drain(timeout=self.heartbeat_seconds)
+                self.check_workers()
+        finally:
+            self.stop()
@@ -1,114 +1,207 @@
 """Pipeline principal: dados -> indicadores -> SMC -> IA -> sinais."""
 from __future__ import annotations
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from time import perf_counter
+from typing import Callable
 from uuid import uuid4
 
 import pandas as pd
 
 from app.ai.decision import decide
-from app.ai.features import build_features
+from app.ai.features import build_feature_matrix
 from app.ai.model import build_model
 from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
-from app.core.models import Signal
+from app.core.metrics import METRICS
+from app.core.models import OrderBlock, Signal
 from app.core.state import EngineState
-from app.data.feed import fetch_candles
+from app.data.feed import CandleCache, fetch_candles
 from app.data.mexc_client import MexcClient
+from app.data.storage import HistoryStore, save_history
 from app.indicators.atr import compute_atr
 from app.indicators.divergence import detect_rsi_divergence
 from app.indicators.pivots import detect_pivots
 from app.indicators.rsi import compute_rsi
+from app.indicators.streaming import IndicatorCache
 from app.indicators.volume import volume_spike
-from app.smc.bias import compute_bias
-from app.smc.confluence import bias_allows, ob_touch
-from app.smc.order_blocks import find_order_blocks, validate_order_blocks
+from app.smc.bias import BiasService
+from app.smc.confluence import bias_allows
+from app.smc.registry import OrderBlockRegistry
 from app.engine.paper_broker import PaperBroker
 
 
 LOGGER = get_logger(__name__)
 
 
+def _add_indicators(frame: pd.DataFrame, config: dict) -> pd.DataFrame:
+    frame["rsi"] = compute_rsi(frame["close"])
+    frame = detect_rsi_divergence(frame)
+    frame["atr"] = compute_atr(frame, period=config["risk"]["atr_period"])
+    frame["volume_spike"] = volume_spike(
+        frame,
+        period=config["confluence"]["volume_sma_period"],
+        mult=config["confluence"]["volume_spike_mult"],
+    )
+    return frame
+
+
+def enrich_frame(frame: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Pivots e indicadores em lote, como o engine calcula sem cache incremental."""
+    frame = detect_pivots(
+        frame,
+        left=config["order_block"]["pivot_left"],
+        right=config["order_block"]["pivot_right"],
+    )
+    return _add_indicators(frame, config)
+
+
 class SignalEngine:
-    def __init__(self, config: dict, state: EngineState) -> None:
+    def __init__(
+        self,
+        config: dict,
+        state: EngineState,
+        client: MexcClient | None = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
         self.config = config
         self.state = state
-        self.client = MexcClient()
-        self.paper_broker = PaperBroker(state=state)
-        self.model = build_model(config["ai"]["model_type"])
+        self.clock = clock
+        # `perf_counter` do início do ciclo em andamento (None entre ciclos); o heartbeat dos shards o reporta.
+        self.busy_since: float | None = None
+        self.client = client or MexcClient(pool_size=max(config["engine"].get("workers", 1), 1))
+        self.paper_broker = PaperBroker(state=state, clock=clock)
+        self.model = build_model(
+            config["ai"]["model_type"],
+            artifact_path=config["ai"].get("artifact_path"),
+            latency_budget_ms=config["ai"].get("latency_budget_ms"),
+        )
         self.cooldowns: dict[str, datetime] = {}
+        use_cache = config["engine"].get("candle_cache", True) or config["engine"].get("feed") == "stream"
+        self.candle_cache = CandleCache() if use_cache else None
+        self.incremental_indicators = config["engine"].get("incremental_indicators", True)
+        self.indicator_caches: dict[tuple[str, str], IndicatorCache] = {}
+        self.registries: dict[tuple[str, str], OrderBlockRegistry] = {}
+        self.bias_service = BiasService(config["timeframes"]["higher_tf"])
+        storage = config.get("storage", {})
+        self.history_store = HistoryStore(storage["path"]) if storage.get("enabled") else None
 
-    def _enrich_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+    def _indicator_cache(self, symbol: str, timeframe: str) -> IndicatorCache:
+        key = (symbol, timeframe)
+        if key not in self.indicator_caches:
+            self.indicator_caches[key] = IndicatorCache(
+                atr_period=self.config["risk"]["atr_period"],
+                volume_period=self.config["confluence"]["volume_sma_period"],
+                volume_mult=self.config["confluence"]["volume_spike_mult"],
+            )
+        return self.indicator_caches[key]
+
+    def _enrich_frame(self, frame: pd.DataFrame, symbol: str | None = None, timeframe: str | None = None) -> pd.DataFrame:
         frame = detect_pivots(
             frame,
             left=self.config["order_block"]["pivot_left"],
             right=self.config["order_block"]["pivot_right"],
         )
-        frame["rsi"] = compute_rsi(frame["close"])
-        frame = detect_rsi_divergence(frame)
-        frame["atr"] = compute_atr(frame, period=self.config["risk"]["atr_period"])
-        frame["volume_spike"] = volume_spike(
-            frame,
-            period=self.config["confluence"]["volume_sma_period"],
-            mult=self.config["confluence"]["volume_spike_mult"],
-        )
+        if self.incremental_indicators and symbol is not None and "open_time" in frame.columns:
+            frame = self._indicator_cache(symbol, timeframe).apply(frame)
+            return detect_rsi_divergence(frame)
+        return _add_indicators(frame, self.config)
+
+    def _registry(self, symbol: str, timeframe: str) -> OrderBlockRegistry:
+        key = (symbol, timeframe)
+        if key not in self.registries:
+            self.registries[key] = OrderBlockRegistry(
+                symbol,
+                timeframe,
+                settings=self.config["order_block"],
+                max_age_bars=self.config["order_block"].get("max_age_bars", 500),
+                max_signals=self.config["engine"]["max_signals_per_ob"],
+            )
+        return self.registries[key]
+
+    def _now(self) -> pd.Timestamp:
+        return pd.Timestamp(self.clock(), tz="UTC")
+
+    def _fetch(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        with METRICS.timer("engine_stage_seconds", stage="fetch", symbol=symbol, timeframe=timeframe):
+            frame = fetch_candles(self.client, symbol, timeframe, cache=self.candle_cache)
+        if self.history_store is not None:
+            save_history(self.history_store, frame, now=self._now())
         return frame
 
-    def process_symbol_timeframe(self, symbol: str, timeframe: str, bias: str) -> None:
-        frame = fetch_candles(self.client, symbol, timeframe)
-        frame = self._enrich_frame(frame)
+    def process_symbol_timeframe(
+        self,
+        symbol: str,
+        timeframe: str,
+        bias: str,
+        frame: pd.DataFrame | None = None,
+    ) -> None:
+        if frame is None:
+            frame = self._fetch(symbol, timeframe)
+        with METRICS.timer("engine_stage_seconds", stage="enrich", symbol=symbol, timeframe=timeframe):
+            frame = self._enrich_frame(frame, symbol, timeframe)
 
-        obs = find_order_blocks(
-            frame,
-            symbol=symbol,
-            timeframe=timeframe,
-            range_mode=self.config["order_block"]["range_mode"],
-            min_move_atr=self.config["order_block"]["min_move_atr"],
-            min_move_pct=self.config["order_block"]["min_move_pct"],
-            min_impulse_candles=self.config["order_block"]["min_impulse_candles"],
-        )
+        registry = self._registry(symbol, timeframe)
+        with METRICS.timer("engine_stage_seconds", stage="order_blocks", symbol=symbol, timeframe=timeframe):
+            added, evicted = registry.update(frame, now=self._now())
+        self.mirror_order_blocks(symbol, timeframe, added, evicted)
 
-        last_close = float(frame["close"].iloc[-1])
-        validated = validate_order_blocks(
-            obs,
-            close=last_close,
-            invalidate_on_wick=self.config["order_block"]["invalidate_on_wick"],
-        )
+        last = frame.iloc[-1]
+        touched = registry.touched(last["high"], last["low"], last["close"])
+        with METRICS.timer("engine_stage_seconds", stage="evaluate", symbol=symbol, timeframe=timeframe):
+            self.evaluate_touches(symbol, timeframe, bias, frame, touched)
 
-        for ob in validated:
-            if not ob.valid:
-                continue
+    def mirror_order_blocks(self, symbol: str, timeframe: str, added: list[OrderBlock], evicted: list[OrderBlock]) -> None:
+        state_key = f"{symbol}-{timeframe}"
+        for ob in added:
+            self.state.add_order_block(state_key, ob)
+        for ob in evicted:
+            self.state.remove_order_block(state_key, ob.id)
+
+    def evaluate_touches(self, symbol: str, timeframe: str, bias: str, frame: pd.DataFrame, touched: list[OrderBlock]) -> None:
+        """Aplica confluências, IA e paper trading aos OBs tocados pelo último candle de `frame` (enriquecido)."""
+        registry = self._registry(symbol, timeframe)
+        last = frame.iloc[-1]
+        candidates: list[tuple[OrderBlock, str, dict[str, str]]] = []
+        for ob in touched:
             key = f"{symbol}-{timeframe}-{ob.id}"
             if self._cooldown_active(key):
                 continue
-            last = frame.iloc[-1]
             direction = "buy" if ob.direction == "bull" else "sell"
-            touch = ob_touch(ob, last["high"], last["low"], last["close"])
             div_ok = (last["bull_divergence"] if ob.direction == "bull" else last["bear_divergence"])
             vol_ok = bool(last["volume_spike"])
             bias_ok = bias_allows(direction, bias)
 
             confluence_map = {
-                "touch": "ok" if touch else "fail",
+                "touch": "ok",
                 "divergence": "ok" if div_ok else "fail",
                 "volume": "ok" if vol_ok else "fail",
                 "bias": bias,
             }
 
-            if not touch:
-                continue
             if self.config["confluence"]["require_rsi_divergence"] and not div_ok:
                 continue
             if self.config["confluence"]["require_volume_spike"] and not vol_ok:
                 continue
             if self.config["confluence"]["require_bias_alignment"] and not bias_ok:
                 continue
+            candidates.append((ob, direction, confluence_map))
+        if not candidates:
+            return
+
+        # Uma única chamada ao modelo para todos os (OB, perfil) do candle.
+        profiles = [(profile, settings) for profile, settings in self.config["profiles"].items() if settings["enabled"]]
+        rows = [(ob, profile) for ob, _, _ in candidates for profile, _ in profiles]
+        with METRICS.timer("engine_stage_seconds", stage="inference", symbol=symbol, timeframe=timeframe):
+            scores = self.model.predict_proba_batch(build_feature_matrix(frame, rows, bias))
+        scores = scores.reshape(len(candidates), len(profiles)).tolist()
 
-            for profile, settings in self.config["profiles"].items():
-                if not settings["enabled"]:
-                    continue
-                features = build_features(frame, ob, bias=bias, profile=profile)
-                probability = self.model.predict_proba(features)
+        for (ob, direction, confluence_map), ob_scores in zip(candidates, scores):
+            key = f"{symbol}-{timeframe}-{ob.id}"
+            for (profile, settings), probability in zip(profiles, ob_scores):
+                if not registry.can_signal(ob.id):
+                    break
                 decision = decide(
                     probability=probability,
                     min_probability=settings["ai_threshold"],
@@ -123,7 +216,7 @@ class SignalEngine:
                     direction=direction,
                     score=probability,
                     reason=decision.reason,
-                    timestamp=datetime.utcnow(),
+                    timestamp=self.clock(),
                     order_block_id=ob.id,
                     confluences=confluence_map,
                     status="enter" if decision.action == "ENTER" else "skip",
@@ -149,39 +242,175 @@ class SignalEngine:
                     profile=profile,
                     direction=direction,
                     decision=decision.action,
-                LOGGER.info(
-                    "signal_generated",
-                    extra={
-                        "message": "Sinal gerado",
-                        "symbol": symbol,
-                        "timeframe": timeframe,
-                        "profile": profile,
-                        "direction": direction,
-                        "decision": decision.action,
-                    },
                 )
+                METRICS.inc("engine_signals_total", symbol=symbol, timeframe=timeframe, decision=decision.action)
                 if decision.action == "ENTER":
                     self.paper_broker.open_trade(signal, frame, ob)
                     self._mark_cooldown(key)
+                    registry.record_signal(ob.id)
+
+    def run_cycle(self, timeframes: list[str] | None = None, closed_only: bool = False) -> None:
+        """Processa os timeframes de execução em `timeframes` (todos, se None).
+
+        Com `closed_only`, o candle em formação é descartado e a avaliação usa
+        o último candle fechado (modo alinhado ao fechamento do scheduler).
+        """
+        self.busy_since = started = perf_counter()
+        try:
+            workers = self.config["engine"].get("workers", 1)
+            exec_tfs = self.config["timeframes"]["execution_tf"]
+            if timeframes is not None:
+                exec_tfs = [tf for tf in exec_tfs if tf in timeframes]
+            if workers > 1:
+                self._run_concurrent(workers, exec_tfs, closed_only)
+            else:
+                self._run_serial(exec_tfs, closed_only)
+            self.state.mark_updated(self.clock())
+            self._record_cycle(perf_counter() - started)
+            if self.candle_cache is not None:
+                log_event(
+                    LOGGER,
+                    "candle_cache_stats",
+                    message="Estatísticas do cache de candles",
+                    level="debug",
+                    **self.candle_cache.stats(),
+                )
+        finally:
+            self.busy_since = None
+
+    def _record_cycle(self, seconds: float) -> None:
+        """Duração do ciclo contra `polling_seconds`: um ciclo mais longo atrasa o seguinte."""
+        budget = self.config["engine"]["polling_seconds"]
+        METRICS.observe("engine_cycle_seconds", seconds)
+        METRICS.set("engine_cycle_last_seconds", seconds)
+        METRICS.set("engine_cycle_budget_ratio", seconds / budget if budget else 0.0)
+        if budget and seconds > budget:
+            METRICS.inc("engine_cycle_overruns_total")
+            log_event(
+                LOGGER,
+                "engine_cycle_overrun",
+                message="Ciclo mais longo que o intervalo de polling",
+                seconds=round(seconds, 3),
+                polling_seconds=budget,
+                level="warning",
+            )
 
-    def run_cycle(self) -> None:
+    def _closed(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame[frame["close_time"] < self._now()].reset_index(drop=True)
+
+    def _run_serial(self, exec_tfs: list[str], closed_only: bool = False) -> None:
         higher_tfs = self.config["timeframes"]["higher_tf"]
-        exec_tfs = self.config["timeframes"]["execution_tf"]
+        now = self._now()
         for symbol in self.config["symbols"]:
-            bias = "neutral"
             for tf in higher_tfs:
-                higher_frame = fetch_candles(self.client, symbol, tf)
-                bias = compute_bias(higher_frame)
+                if self.bias_service.needs_refresh(symbol, tf, now):
+                    self.bias_service.update(symbol, tf, self._fetch(symbol, tf), now)
+            bias = self.bias_service.bias(symbol)
             for tf in exec_tfs:
-                self.process_symbol_timeframe(symbol, tf, bias)
-        self.state.last_update = datetime.utcnow()
+                frame = self._fetch(symbol, tf)
+                self.process_symbol_timeframe(symbol, tf, bias, frame=self._closed(frame) if closed_only else frame)
+
+    def _run_concurrent(self, workers: int, exec_tfs: list[str], closed_only: bool = False) -> None:
+        """Busca todos os pares em paralelo e processa cada frame assim que chega.
+
+        O processamento (e toda escrita em `EngineState`) acontece na thread que
+        chamou `run_cycle`; as threads do pool só fazem I/O.
+        """
+        higher_tfs = self.config["timeframes"]["higher_tf"]
+        now = self._now()
+        stale = {
+            symbol: [tf for tf in higher_tfs if self.bias_service.needs_refresh(symbol, tf, now)]
+            for symbol in self.config["symbols"]
+        }
+        pending_higher = {symbol: len(tfs) for symbol, tfs in stale.items()}
+        waiting: dict[str, list[tuple[str, pd.DataFrame]]] = defaultdict(list)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="engine-fetch") as pool:
+            futures = {}
+            for symbol in self.config["symbols"]:
+                for tf in stale[symbol]:
+                    futures[pool.submit(self._fetch, symbol, tf)] = (symbol, tf, True)
+                for tf in exec_tfs:
+                    futures[pool.submit(self._fetch, symbol, tf)] = (symbol, tf, False)
+
+            for future in as_completed(futures):
+                symbol, tf, is_higher = futures[future]
+                try:
+                    frame = future.result()
+                except Exception as exc:
+                    log_event(
+                        LOGGER,
+                        "fetch_failed",
+                        message="Falha ao buscar candles",
+                        symbol=symbol,
+                        timeframe=tf,
+                        error=str(exc),
+                        level="error",
+                    )
+                    frame = None
+                if is_higher:
+                    if frame is not None:
+                        self.bias_service.update(symbol, tf, frame, now)
+                    pending_higher[symbol] -= 1
+                    if pending_higher[symbol] == 0:
+                        bias = self.bias_service.bias(symbol)
+                        for exec_tf, exec_frame in waiting.pop(symbol, []):
+                            self._process_safely(symbol, exec_tf, bias, exec_frame)
+                elif frame is not None:
+                    if closed_only:
+                        frame = self._closed(frame)
+                    if pending_higher[symbol]:
+                        waiting[symbol].append((tf, frame))
+                    else:
+                        self._process_safely(symbol, tf, self.bias_service.bias(symbol), frame)
+
+    def _process_safely(self, symbol: str, timeframe: str, bias: str, frame: pd.DataFrame) -> None:
+        try:
+            self.process_symbol_timeframe(symbol, timeframe, bias, frame=frame)
+        except Exception as exc:
+            log_event(
+                LOGGER,
+                "process_failed",
+                message="Falha ao processar símbolo",
+                symbol=symbol,
+                timeframe=timeframe,
+                error=str(exc),
+                level="error",
+            )
+
+    def on_candle_close(self, symbol: str, timeframe: str) -> None:
+        """Callback do feed por streaming: processa o timeframe de execução cujo candle fechou."""
+        if timeframe not in self.config["timeframes"]["execution_tf"]:
+            return
+        frame = self.candle_cache.frame(symbol, timeframe)
+        if frame is None or len(frame) < 2:
+            return
+        now = self._now()
+        for tf in self.config["timeframes"]["higher_tf"]:
+            higher_frame = self.candle_cache.frame(symbol, tf)
+            if higher_frame is not None and self.bias_service.needs_refresh(symbol, tf, now):
+                self.bias_service.update(symbol, tf, higher_frame, now)
+        bias = self.bias_service.bias(symbol)
+        closed = frame.iloc[:-1].reset_index(drop=True)
+        self.busy_since = perf_counter()
+        try:
+            if self.history_store is not None:
+                save_history(self.history_store, closed)
+            self._process_safely(symbol, timeframe, bias, closed)
+        finally:
+            self.busy_since = None
+        self.state.mark_updated(self.clock())
+
+    def stream_subscriptions(self) -> list[tuple[str, str]]:
+        timeframes = self.config["timeframes"]["higher_tf"] + self.config["timeframes"]["execution_tf"]
+        return [(symbol, tf) for symbol in self.config["symbols"] for tf in dict.fromkeys(timeframes)]
 
     def _cooldown_active(self, key: str) -> bool:
         cooldown_minutes = self.config["engine"]["cooldown_minutes"]
         if key not in self.cooldowns:
             return False
-        elapsed = datetime.utcnow() - self.cooldowns[key]
+        elapsed = self.clock() - self.cooldowns[key]
         return elapsed.total_seconds() < (cooldown_minutes * 60)
 
     def _mark_cooldown(self, key: str) -> None:
-        self.cooldowns[key] = datetime.utcnow()
+        self.cooldowns[key] = self.clock()
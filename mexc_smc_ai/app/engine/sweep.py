@@ -0,0 +1,212 @@
+"""Varredura de parâmetros e walk-forward sobre o backtest, em paralelo por processos."""
+from __future__ import annotations
+
+import copy
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from app.core.logger import get_logger, log_event
+from app.data.shared_history import SharedFrameSpec, SharedHistory, attach_history
+from app.engine.backtest import Backtester
+
+
+LOGGER = get_logger(__name__)
+
+# Estado de cada worker, preenchido uma vez por `_init_worker`.
+_WORKER: dict = {}
+
+
+@dataclass(frozen=True)
+class Phase:
+    split: int
+    name: str  # full|train|test
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+
+def set_path(config: dict, dotted: str, value: object) -> None:
+    node = config
+    *parents, leaf = dotted.split(".")
+    for key in parents:
+        node = node[key]
+    if leaf not in node:
+        raise KeyError(f"Chave de configuração inexistente: {dotted}")
+    node[leaf] = value
+
+
+def parameter_sets(params: dict, method: str = "grid", samples: int = 20, seed: int = 42) -> list[dict]:
+    """Grid: produto cartesiano das listas. Random: `samples` sorteios; `{min, max}` vira faixa uniforme."""
+    keys = list(params)
+    if method == "grid":
+        return [dict(zip(keys, values)) for values in itertools.product(*(params[key] for key in keys))]
+    if method != "random":
+        raise ValueError(f"Método de varredura desconhecido: {method}")
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(samples):
+        chosen = {}
+        for key in keys:
+            spec = params[key]
+            if isinstance(spec, dict):
+                low, high = spec["min"], spec["max"]
+                chosen[key] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                chosen[key] = rng.choice(spec)
+        sets.append(chosen)
+    return sets
+
+
+def walk_forward_phases(start: pd.Timestamp, end: pd.Timestamp, splits: int, train_ratio: float) -> list[Phase]:
+    """Divide [start, end) em `splits` dobras consecutivas; cada uma tem treino seguido de teste."""
+    if splits < 1 or train_ratio >= 1:
+        return [Phase(0, "full", start, end)]
+    # Cortes em ms para comparar sem perda com `open_time` de qualquer resolução.
+    edges = pd.date_range(start, end, periods=splits + 1).floor("ms")
+    phases = []
+    for split, (fold_start, fold_end) in enumerate(zip(edges[:-1], edges[1:])):
+        cut = (fold_start + (fold_end - fold_start) * train_ratio).floor("ms")
+        phases.append(Phase(split, "train", fold_start, cut))
+        phases.append(Phase(split, "test", cut, fold_end))
+    return phases
+
+
+def _init_worker(config: dict, specs: list[SharedFrameSpec], warmup_bars: int) -> None:
+    # Backtests em massa geram um log por sinal; nos workers só avisos interessam.
+    logging.disable(logging.INFO)
+    history, blocks = attach_history(specs)
+    _WORKER.update(config=config, history=history, blocks=blocks, warmup_bars=warmup_bars)
+
+
+def _slice_history(phase: Phase) -> dict[tuple[str, str], pd.DataFrame]:
+    """Recorta até o fim da fase, com `warmup_bars` candles antes do início para aquecer OBs e indicadores."""
+    sliced = {}
+    for key, frame in _WORKER["history"].items():
+        times = frame["open_time"]
+        first = max(0, int(times.searchsorted(phase.start)) - _WORKER["warmup_bars"])
+        last = int(times.searchsorted(phase.end))
+        sliced[key] = frame.iloc[first:last]
+    return sliced
+
+
+def _run_task(combo: int, params: dict, phase: Phase) -> dict:
+    config = copy.deepcopy(_WORKER["config"])
+    for key, value in params.items():
+        set_path(config, key, value)
+    window = config.get("backtest", {}).get("window", 200)
+    result = Backtester(config, window=window).run(_slice_history(phase), trade_from=phase.start)
+    return {"combo": combo, "split": phase.split, "phase": phase.name, **params, **result.stats}
+
+
+def rank_results(runs: pd.DataFrame, params: list[str], metric: str) -> pd.DataFrame:
+    """Uma linha por combinação, ordenada pela métrica fora da amostra (ou do período inteiro)."""
+    ranked_phase = "test" if (runs["phase"] == "test").any() else "full"
+    columns = {}
+    for phase, group in runs.groupby("phase"):
+        stats = group.groupby("combo").agg(
+            metric=(metric, "mean"),
+            worst=(metric, "min"),
+            trades=("trades", "sum"),
+            win_rate=("win_rate", "mean"),
+        )
+        columns[phase] = stats.add_prefix(f"{phase}_")
+    table = runs.groupby("combo")[params].first().join(list(columns.values()))
+    return table.sort_values(f"{ranked_phase}_metric", ascending=False).reset_index()
+
+
+def walk_forward_report(runs: pd.DataFrame, params: list[str], metric: str) -> pd.DataFrame:
+    """Por dobra: a combinação escolhida no treino e o resultado dela no teste seguinte."""
+    rows = []
+    for split, group in runs.groupby("split"):
+        train = group[group["phase"] == "train"]
+        test = group[group["phase"] == "test"].set_index("combo")
+        if train.empty or test.empty:
+            continue
+        best = train.loc[train[metric].idxmax()]
+        rows.append(
+            {
+                "split": split,
+                "combo": int(best["combo"]),
+                **{key: best[key] for key in params},
+                f"train_{metric}": best[metric],
+                f"test_{metric}": test.loc[best["combo"], metric],
+                "test_trades": test.loc[best["combo"], "trades"],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def run_sweep(
+    config: dict,
+    history: dict[tuple[str, str], pd.DataFrame],
+    settings: dict,
+    output_dir: str | None = None,
+) -> pd.DataFrame:
+    """Executa todas as (combinação, fase) num `ProcessPoolExecutor` e devolve o ranking."""
+    params = settings["params"]
+    combos = parameter_sets(
+        params,
+        method=settings.get("method", "grid"),
+        samples=settings.get("samples", 20),
+        seed=settings.get("seed", 42),
+    )
+    exec_frames = [
+        frame
+        for (symbol, tf), frame in history.items()
+        if tf in config["timeframes"]["execution_tf"] and not frame.empty
+    ]
+    if not combos or not exec_frames:
+        raise ValueError("Varredura sem combinações ou sem histórico dos timeframes de execução")
+    start = min(frame["open_time"].iloc[0] for frame in exec_frames)
+    end = max(frame["open_time"].iloc[-1] for frame in exec_frames) + pd.Timedelta(milliseconds=1)
+    walk_forward = settings.get("walk_forward", {})
+    phases = walk_forward_phases(
+        start,
+        end,
+        splits=walk_forward.get("splits", 1),
+        train_ratio=walk_forward.get("train_ratio", 1.0),
+    )
+    workers = settings.get("workers") or os.cpu_count() or 1
+    warmup_bars = config["order_block"].get("max_age_bars", 500)
+    metric = settings.get("metric", "total_return_pct")
+    log_event(
+        LOGGER,
+        "sweep_start",
+        message="Iniciando varredura de parâmetros",
+        combos=len(combos),
+        phases=len(phases),
+        workers=workers,
+    )
+
+    rows = []
+    with SharedHistory(history) as shared, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(config, shared.specs, warmup_bars),
+    ) as pool:
+        futures = [
+            pool.submit(_run_task, combo, values, phase)
+            for combo, values in enumerate(combos)
+            for phase in phases
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            rows.append(future.result())
+            if done % max(len(futures) // 10, 1) == 0:
+                log_event(LOGGER, "sweep_progress", message="Progresso da varredura", done=done, total=len(futures))
+
+    runs = pd.DataFrame(rows).sort_values(["combo", "split", "phase"]).reset_index(drop=True)
+    ranked = rank_results(runs, list(params), metric)
+    if output_dir:
+        output = Path(output_dir)
+        output.mkdir(parents=True, exist_ok=True)
+        runs.to_csv(output / "sweep_runs.csv", index=False)
+        ranked.to_csv(output / "sweep_ranked.csv", index=False)
+        walk_forward_report(runs, list(params), metric).to_csv(output / "walk_forward.csv", index=False)
+    log_event(LOGGER, "sweep_finished", message="Varredura concluída", runs=len(runs))
+    return ranked
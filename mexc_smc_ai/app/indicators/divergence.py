@@ -1,6 +1,7 @@
 """Detecção simples de divergência entre preço e RSI."""
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 
@@ -27,3 +28,26 @@ def detect_rsi_divergence(frame: pd.DataFrame) -> pd.DataFrame:
             frame.loc[last_two.index[-1], "bear_divergence"] = True
 
     return frame
+
+
+def last_row_divergence(frame: pd.DataFrame, pivot_right: int) -> tuple[np.ndarray, np.ndarray]:
+    """Para cada candle t, o valor que `detect_rsi_divergence` daria na última linha de um frame terminado em t.
+
+    Só pivots recebem a marca, e com `pivot_right > 0` o último candle nunca é
+    pivot; com `pivot_right == 0` compara cada pivot com o anterior do mesmo tipo.
+    """
+    size = len(frame)
+    bull = np.zeros(size, dtype=bool)
+    bear = np.zeros(size, dtype=bool)
+    if pivot_right > 0:
+        return bull, bear
+    rsi = frame["rsi"].to_numpy(dtype=float)
+    lows_at = np.flatnonzero(frame["pivot_low"].to_numpy(dtype=bool))
+    highs_at = np.flatnonzero(frame["pivot_high"].to_numpy(dtype=bool))
+    lows = frame["low"].to_numpy(dtype=float)
+    highs = frame["high"].to_numpy(dtype=float)
+    prev, cur = lows_at[:-1], lows_at[1:]
+    bull[cur] = (lows[cur] < lows[prev]) & (rsi[cur] > rsi[prev])
+    prev, cur = highs_at[:-1], highs_at[1:]
+    bear[cur] = (highs[cur] > highs[prev]) & (rsi[cur] < rsi[prev])
+    return bull, bear
@@ -1,20 +1,27 @@
 """Detecção de pivots (swing highs/lows)."""
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _window_extreme(values: np.ndarray, left: int, right: int, reducer) -> np.ndarray:
+    # Máximo/mínimo da janela [idx - left, idx + right] para cada idx em [left, len - right).
+    return reducer(sliding_window_view(values, left + right + 1), axis=1)
 
 
 def detect_pivots(frame: pd.DataFrame, left: int, right: int) -> pd.DataFrame:
-    highs = frame["high"].values
-    lows = frame["low"].values
-    pivot_high = [False] * len(frame)
-    pivot_low = [False] * len(frame)
+    highs = frame["high"].to_numpy()
+    lows = frame["low"].to_numpy()
+    size = len(frame)
+    pivot_high = np.zeros(size, dtype=bool)
+    pivot_low = np.zeros(size, dtype=bool)
 
-    for idx in range(left, len(frame) - right):
-        window_high = highs[idx - left : idx + right + 1]
-        window_low = lows[idx - left : idx + right + 1]
-        pivot_high[idx] = highs[idx] == max(window_high)
-        pivot_low[idx] = lows[idx] == min(window_low)
+    if size > left + right:
+        center = slice(left, size - right)
+        pivot_high[center] = highs[center] == _window_extreme(highs, left, right, np.max)
+        pivot_low[center] = lows[center] == _window_extreme(lows, left, right, np.min)
 
     frame = frame.copy()
     frame["pivot_high"] = pivot_high
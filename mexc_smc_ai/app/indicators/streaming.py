@@ -0,0 +1,237 @@
+"""Indicadores incrementais: O(1) por candle e equivalentes às versões em lote.
+
+Cada indicador aceita `update(..., replace=True)` para reprocessar o último
+candle (ainda em formação) sem perder o estado dos anteriores.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class RollingMean:
+    """Média móvel simples com soma corrente (mesma semântica de `rolling(min_periods=period)`)."""
+
+    RESYNC_EVERY = 1024
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self._values: deque[float] = deque()
+        self._total = 0.0
+        self._updates = 0
+
+    def push(self, value: float) -> float:
+        self._values.append(value)
+        self._total += value
+        if len(self._values) > self.period:
+            self._total -= self._values.popleft()
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            # Evita o acúmulo de erro de arredondamento da soma corrente.
+            self._total = math.fsum(self._values)
+        return self.value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def replace_last(self, value: float) -> float:
+        self._total += value - self._values[-1]
+        self._values[-1] = value
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self._values) < self.period:
+            return math.nan
+        return self._total / self.period
+
+
+class IncrementalRSI:
+    """Equivalente a `compute_rsi` (médias simples de ganhos/perdas, NaN -> 0)."""
+
+    def __init__(self, period: int = 14) -> None:
+        self.gains = RollingMean(period)
+        self.losses = RollingMean(period)
+        self._prev_close: float | None = None
+        self._last_close: float | None = None
+
+    def update(self, close: float, replace: bool = False) -> float:
+        if replace and self._last_close is not None:
+            reference = self._prev_close
+            if reference is not None:
+                delta = close - reference
+                self.gains.replace_last(max(delta, 0.0))
+                self.losses.replace_last(max(-delta, 0.0))
+        else:
+            reference = self._last_close
+            self._prev_close = reference
+            if reference is not None:
+                delta = close - reference
+                self.gains.push(max(delta, 0.0))
+                self.losses.push(max(-delta, 0.0))
+        self._last_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        avg_gain = self.gains.value
+        avg_loss = self.losses.value
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return 0.0
+        if avg_loss == 0:
+            return 0.0 if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class IncrementalATR:
+    """Equivalente a `compute_atr` (média simples do true range, NaN -> 0)."""
+
+    def __init__(self, period: int = 14) -> None:
+        self.true_range = RollingMean(period)
+        self._prev_close: float | None = None
+        self._last_close: float | None = None
+
+    @staticmethod
+    def _tr(high: float, low: float, prev_close: float | None) -> float:
+        if prev_close is None:
+            return high - low
+        return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+    def update(self, high: float, low: float, close: float, replace: bool = False) -> float:
+        if replace and self._last_close is not None:
+            self.true_range.replace_last(self._tr(high, low, self._prev_close))
+        else:
+            self._prev_close = self._last_close
+            self.true_range.push(self._tr(high, low, self._prev_close))
+        self._last_close = close
+        return self.value
+
+    @property
+    def value(self) -> float:
+        value = self.true_range.value
+        return 0.0 if math.isnan(value) else value
+
+
+class IncrementalVolumeSpike:
+    """Equivalente a `volume_spike`: volume acima de `mult` vezes a SMA (incluindo o candle atual)."""
+
+    def __init__(self, period: int = 20, mult: float = 1.5) -> None:
+        self.sma = RollingMean(period)
+        self.mult = mult
+        self._last_volume = math.nan
+
+    def update(self, volume: float, replace: bool = False) -> bool:
+        if replace and len(self.sma):
+            self.sma.replace_last(volume)
+        else:
+            self.sma.push(volume)
+        self._last_volume = volume
+        return self.value
+
+    @property
+    def value(self) -> bool:
+        sma = self.sma.value
+        return not math.isnan(sma) and self._last_volume > sma * self.mult
+
+
+class IndicatorCache:
+    """Mantém `rsi`, `atr` e `volume_spike` para um (símbolo, timeframe) cujo frame cresce pelo fim.
+
+    `apply` só processa as linhas novas (e reprocessa a última conhecida, que
+    pode ter mudado enquanto o candle estava aberto). Se o frame não se
+    encaixa no histórico em memória, o estado é refeito a partir dele.
+
+    Os valores ficam em arrays NumPy com folga de `max_rows`; cada chamada
+    escreve só as posições novas e copia a janela do frame nas colunas dele,
+    sem montar listas nem copiar o frame (que é alterado e devolvido).
+
+    Diferença de aquecimento: as funções em lote zeram as primeiras linhas do
+    frame que recebem, enquanto aqui, depois da primeira chamada, as linhas
+    iniciais de uma janela deslizante carregam os valores calculados com o
+    histórico anterior a ela. Só num reset (primeira chamada ou lacuna) o
+    resultado é idêntico ao das funções em lote sobre o mesmo frame.
+    """
+
+    def __init__(
+        self,
+        rsi_period: int = 14,
+        atr_period: int = 14,
+        volume_period: int = 20,
+        volume_mult: float = 1.5,
+        max_rows: int = 1000,
+    ) -> None:
+        self.params = (rsi_period, atr_period, volume_period, volume_mult)
+        self.max_rows = max_rows
+        self._reset()
+
+    def _reset(self) -> None:
+        rsi_period, atr_period, volume_period, volume_mult = self.params
+        self.rsi = IncrementalRSI(rsi_period)
+        self.atr = IncrementalATR(atr_period)
+        self.volume = IncrementalVolumeSpike(volume_period, volume_mult)
+        self._times: np.ndarray | None = None
+        self._rsi = np.empty(0)
+        self._atr = np.empty(0)
+        self._spike = np.empty(0, dtype=bool)
+        self._size = 0
+
+    def _reserve(self, times: np.ndarray, extra: int) -> None:
+        """Garante espaço para `extra` linhas, descartando o que passou de `max_rows` (ou da janela atual)."""
+        if self._times is not None and self._size + extra <= len(self._times):
+            return
+        keep = min(self._size, max(self.max_rows, len(times)))
+        capacity = 2 * max(self.max_rows, keep + extra)
+        kept = slice(self._size - keep, self._size)
+        buffers = []
+        for old, dtype in ((self._times, times.dtype), (self._rsi, float), (self._atr, float), (self._spike, bool)):
+            fresh = np.empty(capacity, dtype=dtype)
+            if keep:
+                fresh[:keep] = old[kept]
+            buffers.append(fresh)
+        self._times, self._rsi, self._atr, self._spike = buffers
+        self._size = keep
+
+    def _store(self, pos: int, high: float, low: float, close: float, volume: float, replace: bool) -> None:
+        self._rsi[pos] = self.rsi.update(close, replace=replace)
+        self._atr[pos] = self.atr.update(high, low, close, replace=replace)
+        self._spike[pos] = self.volume.update(volume, replace=replace)
+
+    def _start_position(self, times: np.ndarray) -> int:
+        if not self._size:
+            return -1
+        last_known = self._times[self._size - 1]
+        pos = int(np.searchsorted(times, last_known))
+        if pos >= len(times) or times[pos] != last_known or pos + 1 > self._size:
+            return -1
+        if self._times[self._size - pos - 1] != times[0]:
+            return -1
+        return pos
+
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        times = frame["open_time"].to_numpy()
+        highs = frame["high"].to_numpy(dtype=float)
+        lows = frame["low"].to_numpy(dtype=float)
+        closes = frame["close"].to_numpy(dtype=float)
+        volumes = frame["volume"].to_numpy(dtype=float)
+
+        pos = self._start_position(times)
+        if pos < 0:
+            self._reset()
+            start = 0
+        else:
+            self._store(self._size - 1, highs[pos], lows[pos], closes[pos], volumes[pos], replace=True)
+            start = pos + 1
+        self._reserve(times, len(frame) - start)
+        for idx in range(start, len(frame)):
+            self._times[self._size] = times[idx]
+            self._store(self._size, highs[idx], lows[idx], closes[idx], volumes[idx], replace=False)
+            self._size += 1
+
+        window = slice(self._size - len(frame), self._size)
+        frame["rsi"] = self._rsi[window]
+        frame["atr"] = self._atr[window]
+        frame["volume_spike"] = self._spike[window]
+        return frame
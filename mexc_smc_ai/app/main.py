@@ -5,12 +5,22 @@ import argparse
 import os
 import subprocess
 
+import pandas as pd
+
+from app.ai.training import train_model
+from app.engine.backtest import Backtester, load_backtest_history, write_report
 from app.engine.signal_engine import SignalEngine
-from app.engine.scheduler import EngineScheduler
-from app.core.logger import get_logger, log_event
-from app.core.logger import get_logger
+from app.engine.sweep import run_sweep
+from app.engine.scheduler import drive_engine
+from app.engine.sharding import ShardCoordinator
+from app.core.logger import configure_logging, get_logger, log_event
+from app.core.metrics import configure_metrics, start_metrics_server
 from app.core.state import EngineState
+from app.core.state_store import attach_writer
 from app.core.config import load_config
+from app.data.backfill import Backfiller
+from app.data.mexc_client import MexcClient
+from app.data.storage import HistoryStore
 
 
 LOGGER = get_logger(__name__)
@@ -19,16 +29,81 @@ LOGGER = get_logger(__name__)
 def run_engine() -> None:
     config = load_config()
     state = EngineState()
-    engine = SignalEngine(config=config, state=state)
-    scheduler = EngineScheduler(engine=engine, polling_seconds=config["engine"]["polling_seconds"])
+    writer = attach_writer(state, config.get("state", {}))
+    metrics = config.get("metrics", {})
+    registry = configure_metrics(metrics)
+    if registry.enabled:
+        start_metrics_server(registry, metrics.get("host", "127.0.0.1"), metrics.get("port", 9108))
     log_event(LOGGER, "engine_start", message="Iniciando engine de sinais", component="engine")
-    LOGGER.info("engine_start", extra={"message": "Iniciando engine de sinais"})
-    scheduler.run()
+    try:
+        if config.get("sharding", {}).get("shards", 1) > 1:
+            ShardCoordinator(config, state).run()
+            return
+        drive_engine(SignalEngine(config=config, state=state), config)
+    finally:
+        if writer is not None:
+            writer.stop()
+
+
+def run_backtest(data_dir: str | None = None, output_dir: str | None = None) -> None:
+    config = load_config()
+    settings = config.get("backtest", {})
+    data_dir = data_dir or settings.get("data_dir", "data/history")
+    output_dir = output_dir or settings.get("output_dir", "data/backtest")
+    log_event(LOGGER, "backtest_start", message="Iniciando backtest", component="backtest", data_dir=data_dir)
+    history = load_backtest_history(config, data_dir)
+    result = Backtester(config, window=settings.get("window", 200)).run(history)
+    output = write_report(result, output_dir)
+    log_event(LOGGER, "backtest_report", message="Relatório de backtest salvo", path=str(output))
+
+
+def run_parameter_sweep(data_dir: str | None = None, output_dir: str | None = None) -> None:
+    config = load_config()
+    data_dir = data_dir or config.get("backtest", {}).get("data_dir", "data/history")
+    output_dir = output_dir or config.get("backtest", {}).get("output_dir", "data/backtest")
+    history = load_backtest_history(config, data_dir)
+    ranked = run_sweep(config, history, config["sweep"], output_dir=output_dir)
+    log_event(LOGGER, "sweep_report", message="Ranking salvo", path=output_dir, best=ranked.iloc[0].to_dict())
+
+
+def run_training(data_dir: str | None = None, output_dir: str | None = None) -> None:
+    config = load_config()
+    data_dir = data_dir or config.get("backtest", {}).get("data_dir", "data/history")
+    artifact_path = output_dir or config["ai"].get("artifact_path", "models/ai_filter")
+    log_event(LOGGER, "training_start", message="Iniciando treino do modelo", component="training", data_dir=data_dir)
+    history = load_backtest_history(config, data_dir)
+    train_model(config, history, artifact_path)
+
+
+def run_backfill(start: str | None = None, end: str | None = None) -> None:
+    config = load_config()
+    settings = config.get("backfill", {})
+    workers = settings.get("workers", 4)
+    backfiller = Backfiller(
+        client=MexcClient(pool_size=workers),
+        store=HistoryStore(config["storage"]["path"]),
+        limit=settings.get("limit", 1000),
+        workers=workers,
+    )
+    timeframes = dict.fromkeys(config["timeframes"]["higher_tf"] + config["timeframes"]["execution_tf"])
+    pairs = [(symbol, tf) for symbol in config["symbols"] for tf in timeframes]
+    log_event(LOGGER, "backfill_start", message="Iniciando backfill de histórico", component="backfill", pairs=len(pairs))
+    reports = backfiller.run(
+        pairs,
+        start=pd.Timestamp(start or settings["start"], tz="UTC"),
+        end=pd.Timestamp(end, tz="UTC") if end else None,
+    )
+    log_event(
+        LOGGER,
+        "backfill_finished",
+        message="Backfill concluído",
+        added=sum(report.added for report in reports),
+        pairs_with_gaps=sum(1 for report in reports if report.gaps),
+    )
 
 
 def run_streamlit() -> None:
     log_event(LOGGER, "ui_start", message="Abrindo Streamlit", component="ui")
-    LOGGER.info("ui_start", extra={"message": "Abrindo Streamlit"})
     streamlit_cmd = [
         "streamlit",
         "run",
@@ -39,11 +114,24 @@ def run_streamlit() -> None:
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="MEXC SMC AI")
-    parser.add_argument("--mode", choices=["engine", "ui"], default="engine")
+    parser.add_argument("--mode", choices=["engine", "ui", "backtest", "sweep", "backfill", "train"], default="engine")
+    parser.add_argument("--data", help="Diretório do histórico em disco (backtest/sweep/train)")
+    parser.add_argument("--output", help="Diretório do relatório (backtest/sweep) ou do artefato (train)")
+    parser.add_argument("--start", help="Início do backfill (UTC), ex.: 2024-01-01")
+    parser.add_argument("--end", help="Fim do backfill (UTC); padrão: último candle fechado")
     args = parser.parse_args()
+    configure_logging(load_config().get("logging", {}))
 
     if args.mode == "ui":
         run_streamlit()
+    elif args.mode == "backtest":
+        run_backtest(args.data, args.output)
+    elif args.mode == "sweep":
+        run_parameter_sweep(args.data, args.output)
+    elif args.mode == "train":
+        run_training(args.data, args.output)
+    elif args.mode == "backfill":
+        run_backfill(args.start, args.end)
     else:
         run_engine()
 
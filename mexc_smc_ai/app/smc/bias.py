@@ -1,8 +1,15 @@
 """Bias simples por timeframe maior."""
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
+from app.core.timeframes import timeframe_delta
+
+_BIAS_NAMES = np.array(["bearish", "neutral", "bullish"])
+
 
 def compute_bias(frame: pd.DataFrame) -> str:
     if len(frame) < 2:
@@ -14,3 +21,75 @@ def compute_bias(frame: pd.DataFrame) -> str:
     if last["close"] < prev["close"]:
         return "bearish"
     return "neutral"
+
+
+def composite_bias(biases: list[str]) -> str:
+    """Combina os bias de vários HTFs: direção só quando todos os não neutros concordam."""
+    directional = {bias for bias in biases if bias != "neutral"}
+    if len(directional) == 1:
+        return directional.pop()
+    return "neutral"
+
+
+def bias_codes(frame: pd.DataFrame, moments: pd.Series) -> np.ndarray:
+    """Bias (+1/-1/0) de `compute_bias` sobre os candles fechados antes de cada instante."""
+    closes = frame["close"].to_numpy(dtype=float)
+    close_times = frame["close_time"].to_numpy()
+    direction = np.zeros(len(closes), dtype=int)
+    direction[1:] = np.sign(np.diff(closes)).astype(int)
+    last_closed = np.searchsorted(close_times, moments.to_numpy(), side="left") - 1
+    codes = np.zeros(len(moments), dtype=int)
+    known = last_closed >= 1
+    codes[known] = direction[last_closed[known]]
+    return codes
+
+
+def composite_codes(codes: list[np.ndarray], size: int) -> np.ndarray:
+    """Versão vetorizada de `composite_bias`."""
+    if not codes:
+        return np.full(size, "neutral")
+    stacked = np.vstack(codes)
+    bull = (stacked == 1).any(axis=0)
+    bear = (stacked == -1).any(axis=0)
+    return _BIAS_NAMES[bull.astype(int) - bear.astype(int) + 1]
+
+
+@dataclass(slots=True)
+class _CachedBias:
+    bias: str
+    refresh_at: pd.Timestamp
+
+
+class BiasService:
+    """Cache de bias por (símbolo, HTF) baseado apenas em candles fechados.
+
+    O bias de um HTF só pode mudar quando fecha o próximo candle dele, então
+    `needs_refresh` só volta a pedir dados depois desse fechamento (mais
+    `grace_seconds`, para a exchange consolidar o candle).
+    """
+
+    def __init__(self, timeframes: list[str], grace_seconds: float = 2.0) -> None:
+        self.timeframes = timeframes
+        self.grace = pd.Timedelta(seconds=grace_seconds)
+        self._cache: dict[tuple[str, str], _CachedBias] = {}
+
+    def needs_refresh(self, symbol: str, timeframe: str, now: pd.Timestamp) -> bool:
+        cached = self._cache.get((symbol, timeframe))
+        return cached is None or now >= cached.refresh_at
+
+    def update(self, symbol: str, timeframe: str, frame: pd.DataFrame, now: pd.Timestamp) -> str:
+        closed = frame[frame["close_time"] < now]
+        bias = compute_bias(closed)
+        step = timeframe_delta(timeframe)
+        if closed.empty:
+            refresh_at = now + self.grace
+        else:
+            # O candle seguinte ao último fechado é o que está em formação.
+            refresh_at = closed["open_time"].iloc[-1] + 2 * step + self.grace
+        self._cache[(symbol, timeframe)] = _CachedBias(bias=bias, refresh_at=refresh_at)
+        return bias
+
+    def bias(self, symbol: str) -> str:
+        return composite_bias(
+            [self._cache[(symbol, tf)].bias for tf in self.timeframes if (symbol, tf) in self._cache]
+        )
@@ -2,12 +2,18 @@
 from __future__ import annotations
 
 from app.core.models import OrderBlock
+from app.smc.interval_index import OrderBlockIndex
 
 
 def ob_touch(ob: OrderBlock, high: float, low: float, close: float) -> bool:
     return (low <= ob.high and high >= ob.low) or (ob.low <= close <= ob.high)
 
 
+def touched_order_blocks(index: OrderBlockIndex, high: float, low: float, close: float) -> list[OrderBlock]:
+    """Versão indexada de `ob_touch` sobre todos os OBs do índice."""
+    return index.touched(high, low, close)
+
+
 def bias_allows(direction: str, bias: str) -> bool:
     if bias == "neutral":
         return True
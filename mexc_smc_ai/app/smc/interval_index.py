@@ -0,0 +1,112 @@
+"""Índice de intervalos de preço para consultar quais OBs um candle toca."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from app.core.models import OrderBlock
+
+
+@dataclass
+class _Node:
+    center: float
+    by_low: list[OrderBlock]
+    by_high: list[OrderBlock]
+    left: _Node | None = None
+    right: _Node | None = None
+
+
+def _build(blocks: list[OrderBlock]) -> _Node | None:
+    if not blocks:
+        return None
+    edges = sorted(edge for ob in blocks for edge in (ob.low, ob.high))
+    center = edges[len(edges) // 2]
+    here, left, right = [], [], []
+    for ob in blocks:
+        if ob.high < center:
+            left.append(ob)
+        elif ob.low > center:
+            right.append(ob)
+        else:
+            here.append(ob)
+    return _Node(
+        center=center,
+        by_low=sorted(here, key=lambda ob: ob.low),
+        by_high=sorted(here, key=lambda ob: ob.high, reverse=True),
+        left=_build(left),
+        right=_build(right),
+    )
+
+
+@dataclass
+class OrderBlockIndex:
+    """Árvore de intervalos centrada sobre os ranges [low, high] dos OBs ativos.
+
+    Consultas custam O(log n + k). Inserções e remoções só marcam a árvore como
+    suja; ela é reconstruída (O(n log n)) na próxima consulta, o que compensa
+    porque OBs entram e saem muito menos vezes do que candles são consultados.
+    Os resultados voltam na ordem de inserção, como numa varredura linear.
+    """
+
+    _blocks: dict[str, OrderBlock] = field(default_factory=dict)
+    _order: dict[str, int] = field(default_factory=dict)
+    _root: _Node | None = None
+    _dirty: bool = False
+    _seq: int = 0
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def insert(self, ob: OrderBlock) -> None:
+        if ob.id not in self._order:
+            self._order[ob.id] = self._seq
+            self._seq += 1
+        self._blocks[ob.id] = ob
+        self._dirty = True
+
+    def remove(self, ob_id: str) -> None:
+        if self._blocks.pop(ob_id, None) is not None:
+            self._order.pop(ob_id, None)
+            self._dirty = True
+
+    def overlapping(self, low: float, high: float) -> list[OrderBlock]:
+        if self._dirty:
+            self._root = _build(list(self._blocks.values()))
+            self._dirty = False
+        found: list[OrderBlock] = []
+        node = self._root
+        pending = [node] if node is not None else []
+        while pending:
+            node = pending.pop()
+            if high < node.center:
+                for ob in node.by_low:
+                    if ob.low > high:
+                        break
+                    found.append(ob)
+                if node.left is not None:
+                    pending.append(node.left)
+            elif low > node.center:
+                for ob in node.by_high:
+                    if ob.high < low:
+                        break
+                    found.append(ob)
+                if node.right is not None:
+                    pending.append(node.right)
+            else:
+                found.extend(node.by_low)
+                if node.left is not None:
+                    pending.append(node.left)
+                if node.right is not None:
+                    pending.append(node.right)
+        found.sort(key=lambda ob: self._order[ob.id])
+        return found
+
+    def touched(self, high: float, low: float, close: float) -> list[OrderBlock]:
+        """Mesma regra de `ob_touch`: sobreposição com [low, high] ou fechamento dentro do OB."""
+        found = self.overlapping(low, high)
+        if low <= close <= high:
+            return found
+        seen = {ob.id for ob in found}
+        extra = [ob for ob in self.overlapping(close, close) if ob.id not in seen]
+        if not extra:
+            return found
+        return sorted(found + extra, key=lambda ob: self._order[ob.id])
@@ -1,23 +1,35 @@
 """Lógica de identificação e validação de Order Blocks."""
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime
-from uuid import uuid4
+from uuid import UUID, uuid5
 
+import numpy as np
 import pandas as pd
 
 from app.core.models import OrderBlock
 from app.indicators.atr import compute_atr
 
 
-def _ob_range(candle: pd.Series, range_mode: str) -> tuple[float, float]:
-    if range_mode == "body":
-        low = min(candle["open"], candle["close"])
-        high = max(candle["open"], candle["close"])
-    else:
-        low = candle["low"]
-        high = candle["high"]
-    return float(low), float(high)
+OB_NAMESPACE = UUID("6f1f7f5e-3c4b-4a55-9a3e-2f2b9f6f0b1d")
+
+
+def order_block_id(symbol: str, timeframe: str, origin: object, direction: str) -> str:
+    """ID determinístico: o mesmo candle de origem gera o mesmo OB em todo ciclo."""
+    return str(uuid5(OB_NAMESPACE, f"{symbol}|{timeframe}|{origin}|{direction}"))
+
+
+def _origin_times(frame: pd.DataFrame) -> pd.Index:
+    if "open_time" in frame.columns:
+        return pd.Index(frame["open_time"])
+    return frame.index
+
+
+def _created_at(origin: object, fallback: datetime) -> datetime:
+    if isinstance(origin, pd.Timestamp):
+        return origin.to_pydatetime()
+    return fallback
 
 
 def find_order_blocks(
@@ -29,59 +41,92 @@ def find_order_blocks(
     min_move_pct: float,
     min_impulse_candles: int,
 ) -> list[OrderBlock]:
-    frame = frame.copy()
-    frame["atr"] = compute_atr(frame)
-    order_blocks: list[OrderBlock] = []
+    if len(frame) < 2:
+        return []
+    opens = frame["open"].to_numpy(dtype=float)
+    closes = frame["close"].to_numpy(dtype=float)
+    highs = frame["high"].to_numpy(dtype=float)
+    lows = frame["low"].to_numpy(dtype=float)
+    atr = compute_atr(frame).to_numpy(dtype=float)[1:]
+    if range_mode == "body":
+        range_low, range_high = np.minimum(opens, closes), np.maximum(opens, closes)
+    else:
+        range_low, range_high = lows, highs
+
+    # Posição i nos vetores abaixo = candle do OB em i, pivot confirmado em i + 1.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bull_move = highs[1:] - highs[:-1]
+        bull = (
+            frame["pivot_low"].to_numpy(dtype=bool)[1:]
+            & (closes[:-1] < opens[:-1])
+            & ((bull_move >= min_move_atr * atr) | ((bull_move / closes[:-1]) * 100 >= min_move_pct))
+        )
+        bear_move = lows[:-1] - lows[1:]
+        bear = (
+            frame["pivot_high"].to_numpy(dtype=bool)[1:]
+            & (closes[:-1] > opens[:-1])
+            & ((bear_move >= min_move_atr * atr) | ((bear_move / closes[:-1]) * 100 >= min_move_pct))
+        )
+
+    bull_idx = np.flatnonzero(bull)
+    bear_idx = np.flatnonzero(bear)
+    if not len(bull_idx) and not len(bear_idx):
+        return []
+    # Mesma ordem do laço original: por candle, bull antes de bear.
+    positions = np.concatenate([bull_idx, bear_idx])
+    is_bear = np.concatenate([np.zeros(len(bull_idx), dtype=bool), np.ones(len(bear_idx), dtype=bool)])
+    order = np.lexsort((is_bear, positions))
 
-    for idx in range(1, len(frame)):
-        row = frame.iloc[idx]
-        if row["pivot_low"]:
-            ob_idx = idx - 1
-            ob_candle = frame.iloc[ob_idx]
-            if ob_candle["close"] < ob_candle["open"]:
-                low, high = _ob_range(ob_candle, range_mode)
-                move = row["high"] - ob_candle["high"]
-                atr_move = move >= (min_move_atr * row["atr"])
-                pct_move = (move / ob_candle["close"]) * 100 >= min_move_pct
-                if atr_move or pct_move:
-                    order_blocks.append(
-                        OrderBlock(
-                            id=str(uuid4()),
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            direction="bull",
-                            created_at=datetime.utcnow(),
-                            low=low,
-                            high=high,
-                            impulse_candles=min_impulse_candles,
-                            min_move=move,
-                        )
-                    )
-        if row["pivot_high"]:
-            ob_idx = idx - 1
-            ob_candle = frame.iloc[ob_idx]
-            if ob_candle["close"] > ob_candle["open"]:
-                low, high = _ob_range(ob_candle, range_mode)
-                move = ob_candle["low"] - row["low"]
-                atr_move = move >= (min_move_atr * row["atr"])
-                pct_move = (move / ob_candle["close"]) * 100 >= min_move_pct
-                if atr_move or pct_move:
-                    order_blocks.append(
-                        OrderBlock(
-                            id=str(uuid4()),
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            direction="bear",
-                            created_at=datetime.utcnow(),
-                            low=low,
-                            high=high,
-                            impulse_candles=min_impulse_candles,
-                            min_move=move,
-                        )
-                    )
+    origins = _origin_times(frame)
+    now = datetime.utcnow()
+    order_blocks: list[OrderBlock] = []
+    for pos, bear_hit in zip(positions[order].tolist(), is_bear[order].tolist()):
+        direction = "bear" if bear_hit else "bull"
+        origin = origins[pos]
+        order_blocks.append(
+            OrderBlock(
+                id=order_block_id(symbol, timeframe, origin, direction),
+                symbol=symbol,
+                timeframe=timeframe,
+                direction=direction,
+                created_at=_created_at(origin, now),
+                low=float(range_low[pos]),
+                high=float(range_high[pos]),
+                impulse_candles=min_impulse_candles,
+                min_move=float(bear_move[pos] if bear_hit else bull_move[pos]),
+            )
+        )
     return order_blocks
 
 
+def order_blocks_by_confirmation(
+    frame: pd.DataFrame,
+    symbol: str,
+    timeframe: str,
+    settings: dict,
+) -> dict[int, list[OrderBlock]]:
+    """OBs de um histórico inteiro agrupados pela posição do candle em que o pivot fica confirmado.
+
+    Origem em p, pivot em p + 1: ao vivo o OB só aparece quando o candle
+    p + 1 + pivot_right fecha.
+    """
+    found = find_order_blocks(
+        frame,
+        symbol=symbol,
+        timeframe=timeframe,
+        range_mode=settings["range_mode"],
+        min_move_atr=settings["min_move_atr"],
+        min_move_pct=settings["min_move_pct"],
+        min_impulse_candles=settings["min_impulse_candles"],
+    )
+    times = frame["open_time"]
+    pending: dict[int, list[OrderBlock]] = defaultdict(list)
+    for ob in found:
+        origin = int(times.searchsorted(pd.Timestamp(ob.created_at)))
+        pending[origin + 1 + settings["pivot_right"]].append(ob)
+    return pending
+
+
 def validate_order_blocks(order_blocks: list[OrderBlock], close: float, invalidate_on_wick: bool) -> list[OrderBlock]:
     validated: list[OrderBlock] = []
     for ob in order_blocks:
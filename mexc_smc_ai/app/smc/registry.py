@@ -0,0 +1,179 @@
+"""Registro persistente de Order Blocks por (símbolo, timeframe)."""
+from __future__ import annotations
+
+import pandas as pd
+
+from app.core.models import OrderBlock
+from app.smc.confluence import touched_order_blocks
+from app.smc.interval_index import OrderBlockIndex
+from app.smc.order_blocks import find_order_blocks, validate_order_blocks
+
+# Período de ATR usado por `find_order_blocks`; a varredura incremental inclui
+# esse histórico extra para que o ATR dos pivots reavaliados seja o mesmo de
+# uma varredura completa.
+ATR_LOOKBACK = 14
+
+
+class OrderBlockRegistry:
+    """Mantém os OBs ativos entre ciclos, varrendo apenas os candles novos.
+
+    Os OBs são identificados pelo ID determinístico de `find_order_blocks`
+    (símbolo, timeframe, candle de origem, direção). A cada `update` os ativos
+    são validados contra os fechamentos novos; inválidos, antigos demais ou que
+    já atingiram `max_signals` saem do registro e não voltam a ser descobertos.
+
+    Com `now`, o candle ainda em formação (`close_time >= now`) fica de fora da
+    descoberta e da validação: uma excursão intrabar que volta antes do
+    fechamento não invalida nem mitiga OBs. Ele é processado no `update`
+    seguinte ao seu fechamento.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        timeframe: str,
+        settings: dict,
+        max_age_bars: int = 500,
+        max_signals: int = 1,
+    ) -> None:
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.settings = settings
+        self.max_age_bars = max_age_bars
+        self.max_signals = max_signals
+        self.blocks: dict[str, OrderBlock] = {}
+        self.index = OrderBlockIndex()
+        self.signal_counts: dict[str, int] = {}
+        self._born: dict[str, int] = {}
+        self._retired: dict[str, pd.Timestamp] = {}
+        self._bars = 0
+        self._last_time: pd.Timestamp | None = None
+
+    def _resume_position(self, times: pd.Series) -> int | None:
+        """Posição da última linha já vista (que pode ter mudado, se ainda estava em formação)."""
+        if self._last_time is None:
+            return None
+        pos = int(times.searchsorted(self._last_time))
+        if pos >= len(times) or times.iloc[pos] != self._last_time:
+            return None
+        return pos
+
+    def _discover(self, frame: pd.DataFrame, start: int) -> list[OrderBlock]:
+        # Pivots cuja janela alcança as linhas novas podem ter mudado de estado.
+        first_pivot = max(0, start - self.settings["pivot_right"])
+        scan_from = max(0, first_pivot - ATR_LOOKBACK - 1)
+        found = find_order_blocks(
+            frame.iloc[scan_from:],
+            symbol=self.symbol,
+            timeframe=self.timeframe,
+            range_mode=self.settings["range_mode"],
+            min_move_atr=self.settings["min_move_atr"],
+            min_move_pct=self.settings["min_move_pct"],
+            min_impulse_candles=self.settings["min_impulse_candles"],
+        )
+        if scan_from > 0:
+            # As linhas de histórico extra só servem para o ATR.
+            oldest_origin = pd.Timestamp(frame["open_time"].iloc[first_pivot - 1])
+            found = [ob for ob in found if pd.Timestamp(ob.created_at) >= oldest_origin]
+        return [ob for ob in found if ob.id not in self.blocks and ob.id not in self._retired]
+
+    def update(self, frame: pd.DataFrame, now: pd.Timestamp | None = None) -> tuple[list[OrderBlock], list[OrderBlock]]:
+        """Incorpora o frame enriquecido (com pivots). Retorna (novos, removidos).
+
+        Sem `now`, todas as linhas são tratadas como candles fechados.
+        """
+        if now is not None:
+            frame = frame.iloc[: int(frame["close_time"].searchsorted(now))]
+            if frame.empty:
+                return [], []
+        times = frame["open_time"]
+        resume = self._resume_position(times)
+        start = 0 if resume is None else resume
+        self._bars += len(frame) if resume is None else len(frame) - resume - 1
+        self._last_time = times.iloc[-1]
+
+        existing = list(self.blocks.values())
+        added = self._discover(frame, start)
+        self._admit(added)
+
+        closes = frame["close"].to_numpy(dtype=float)
+        highs = frame["high"].to_numpy(dtype=float)
+        lows = frame["low"].to_numpy(dtype=float)
+        added_ids = {ob.id for ob in added}
+        for idx in range(start, len(frame)):
+            self._observe(existing, highs[idx], lows[idx], closes[idx], added_ids)
+        validate_order_blocks(added, close=closes[-1], invalidate_on_wick=self.settings["invalidate_on_wick"])
+
+        evicted = self._evict()
+        self._prune_retired(times.iloc[0])
+        return added, evicted
+
+    def replay_bar(
+        self,
+        candidates: list[OrderBlock],
+        high: float,
+        low: float,
+        close: float,
+    ) -> tuple[list[OrderBlock], list[OrderBlock]]:
+        """Avança um candle fechado com OBs já descobertos fora do registro (backtest).
+
+        `candidates` são os OBs cujo pivot fica confirmado neste candle; o efeito
+        é o mesmo de `update` com um frame que termina nele.
+        """
+        self._bars += 1
+        existing = list(self.blocks.values())
+        added = [ob for ob in candidates if ob.id not in self.blocks and ob.id not in self._retired]
+        self._admit(added)
+        self._observe(existing, high, low, close, {ob.id for ob in added})
+        validate_order_blocks(added, close=close, invalidate_on_wick=self.settings["invalidate_on_wick"])
+        return added, self._evict()
+
+    def _admit(self, added: list[OrderBlock]) -> None:
+        for ob in added:
+            self.blocks[ob.id] = ob
+            self.index.insert(ob)
+            self._born[ob.id] = self._bars
+
+    def _observe(self, existing: list[OrderBlock], high: float, low: float, close: float, added_ids: set[str]) -> None:
+        validate_order_blocks(existing, close=close, invalidate_on_wick=self.settings["invalidate_on_wick"])
+        for ob in touched_order_blocks(self.index, high, low, close):
+            if ob.valid and ob.id not in added_ids:
+                ob.mitigated = True
+
+    def _evict(self) -> list[OrderBlock]:
+        evicted = [ob for ob in self.blocks.values() if self._expired(ob)]
+        for ob in evicted:
+            self._retire(ob)
+        return evicted
+
+    def _expired(self, ob: OrderBlock) -> bool:
+        return (
+            not ob.valid
+            or self._bars - self._born[ob.id] > self.max_age_bars
+            or self.signal_counts.get(ob.id, 0) >= self.max_signals
+        )
+
+    def _retire(self, ob: OrderBlock) -> None:
+        self.blocks.pop(ob.id, None)
+        self.index.remove(ob.id)
+        self._born.pop(ob.id, None)
+        self.signal_counts.pop(ob.id, None)
+        self._retired[ob.id] = pd.Timestamp(ob.created_at)
+
+    def _prune_retired(self, oldest: pd.Timestamp) -> None:
+        # OBs com origem anterior ao início do frame não podem ser redescobertos.
+        stale = [ob_id for ob_id, created in self._retired.items() if created < oldest]
+        for ob_id in stale:
+            del self._retired[ob_id]
+
+    def record_signal(self, ob_id: str) -> None:
+        self.signal_counts[ob_id] = self.signal_counts.get(ob_id, 0) + 1
+
+    def can_signal(self, ob_id: str) -> bool:
+        return self.signal_counts.get(ob_id, 0) < self.max_signals
+
+    def active(self) -> list[OrderBlock]:
+        return [ob for ob in self.blocks.values() if ob.valid]
+
+    def touched(self, high: float, low: float, close: float) -> list[OrderBlock]:
+        return [ob for ob in touched_order_blocks(self.index, high, low, close) if ob.valid]
@@ -0,0 +1,80 @@
+"""Redução de séries longas para o número de pontos que cabe no gráfico."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def bucket_starts(size: int, buckets: int) -> np.ndarray:
+    """Início de cada um dos `buckets` blocos contíguos (quase iguais) de `size` linhas."""
+    if size <= buckets:
+        return np.arange(size)
+    return np.unique(np.linspace(0, size, buckets + 1).astype(np.int64)[:-1])
+
+
+def ohlc_buckets(frame: pd.DataFrame, points: int) -> pd.DataFrame:
+    """Agrega candles consecutivos em até `points` candles (abertura, máxima, mínima, fechamento).
+
+    Máximas e mínimas de cada bloco são preservadas, então nenhum extremo do
+    preço some do gráfico. Com colunas `pivot_high`/`pivot_low`, o bloco fica
+    marcado quando o pivot é o próprio extremo do bloco.
+    """
+    if len(frame) <= points:
+        return frame.reset_index(drop=True)
+    starts = bucket_starts(len(frame), points)
+    ends = np.append(starts[1:], len(frame)) - 1
+    highs = frame["high"].to_numpy(dtype=float)
+    lows = frame["low"].to_numpy(dtype=float)
+    out = pd.DataFrame(
+        {
+            "open_time": frame["open_time"].to_numpy()[starts],
+            "open": frame["open"].to_numpy(dtype=float)[starts],
+            "high": np.maximum.reduceat(highs, starts),
+            "low": np.minimum.reduceat(lows, starts),
+            "close": frame["close"].to_numpy(dtype=float)[ends],
+        }
+    )
+    if "volume" in frame.columns:
+        out["volume"] = np.add.reduceat(frame["volume"].to_numpy(dtype=float), starts)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(frame))))
+    if "pivot_high" in frame.columns:
+        defining = frame["pivot_high"].to_numpy(dtype=bool) & (highs == out["high"].to_numpy()[bucket])
+        out["pivot_high"] = np.logical_or.reduceat(defining, starts)
+    if "pivot_low" in frame.columns:
+        defining = frame["pivot_low"].to_numpy(dtype=bool) & (lows == out["low"].to_numpy()[bucket])
+        out["pivot_low"] = np.logical_or.reduceat(defining, starts)
+    return out
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets (mantém primeiro e último ponto)."""
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (size - 2) / (points - 2)
+    chosen = np.empty(points, dtype=np.int64)
+    chosen[0] = 0
+    anchor = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        following = slice(end, min(int((bucket + 2) * every) + 1, size))
+        avg_x = x[following].mean()
+        avg_y = y[following].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:end] - y[anchor]) - (x[anchor] - x[start:end]) * (avg_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        chosen[bucket + 1] = anchor
+    chosen[-1] = size - 1
+    return chosen
+
+
+def downsample_line(frame: pd.DataFrame, x: str, y: str, points: int) -> pd.DataFrame:
+    """Linhas do frame escolhidas por `lttb` sobre as colunas `x` (numérica ou datetime) e `y`."""
+    if len(frame) <= points:
+        return frame
+    values = frame[x]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.astype("int64")
+    return frame.iloc[lttb(values.to_numpy(dtype=float), frame[y].to_numpy(dtype=float), points)]
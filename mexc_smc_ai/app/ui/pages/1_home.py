@@ -1,9 +1,13 @@
 """Página inicial com status."""
 from __future__ import annotations
 
+import requests
 import streamlit as st
 
-state = st.session_state["engine_state"]
+from app.ui.state import engine_state, ui_config
+from app.ui.transforms import cycle_summary, model_summary, stage_summary
+
+state = engine_state()
 
 st.header("Status")
 col1, col2, col3 = st.columns(3)
@@ -16,3 +20,26 @@ if state.logs:
     st.json(list(state.logs)[:5])
 else:
     st.info("Nenhum erro recente registrado.")
+
+st.subheader("Desempenho do motor")
+metrics = ui_config().get("metrics", {})
+if not metrics.get("enabled"):
+    st.info("Métricas desligadas (`metrics.enabled` no config.yaml).")
+else:
+    try:
+        response = requests.get(f"http://{metrics.get('host', '127.0.0.1')}:{metrics.get('port', 9108)}/metrics.json", timeout=1)
+        snapshot = response.json()
+    except (requests.RequestException, ValueError):
+        st.warning("Endpoint de métricas do motor indisponível.")
+    else:
+        cycle = cycle_summary(snapshot)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Último ciclo (s)", f"{cycle['last_seconds']:.2f}" if cycle["last_seconds"] is not None else "-")
+        col2.metric("Ciclo / polling", f"{cycle['budget_ratio']:.0%}" if cycle["budget_ratio"] is not None else "-")
+        col3.metric("Ciclos estourados", cycle["overruns"])
+        model = model_summary(snapshot)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("IA (ms/previsão)", f"{model['ms_per_prediction']:.3f}" if model["ms_per_prediction"] is not None else "-")
+        col2.metric("IA no scorer linear", "sim" if model["degraded"] else "não")
+        col3.metric("Lotes fora do orçamento / no fallback", f"{model['over_budget']} / {model['fallback']}")
+        st.dataframe(stage_summary(snapshot), use_container_width=True)
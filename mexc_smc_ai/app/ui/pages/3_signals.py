@@ -4,29 +4,35 @@ from __future__ import annotations
 import pandas as pd
 import streamlit as st
 
-state = st.session_state["engine_state"]
+from app.ui.state import engine_state, page_size, refresh_seconds
+from app.ui.transforms import page, page_count, signals_frame
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def signals_table(version: int, _signals) -> pd.DataFrame:
+    # `version` é a chave do cache; a deque (prefixo `_`) não é hasheada.
+    return signals_frame(_signals)
+
 
 st.header("Sinais")
 
-if not state.signals:
-    st.info("Nenhum sinal gerado ainda.")
-else:
-    data = [
-        {
-            "symbol": s.symbol,
-            "tf": s.timeframe,
-            "profile": s.profile,
-            "direction": s.direction,
-            "score": round(s.score, 3),
-            "status": s.status,
-            "reason": s.reason,
-        }
-        for s in state.signals
-    ]
-    df = pd.DataFrame(data)
-    st.dataframe(df, use_container_width=True)
+
+@st.fragment(run_every=refresh_seconds())
+def signals_view() -> None:
+    state = engine_state()
+    if not state.signals:
+        st.info("Nenhum sinal gerado ainda.")
+        return
+    df = signals_table(state.version, state.signals)
+    size = page_size()
+    number = st.number_input("Página", min_value=1, max_value=page_count(len(df), size), value=1, key="signals_page")
+    st.dataframe(page(df, number, size), use_container_width=True)
+    st.caption(f"{len(df)} sinais")
 
     st.subheader("Narrativa")
     for signal in list(state.signals)[:5]:
         st.write(f"{signal.symbol} {signal.timeframe} {signal.profile} -> {signal.status}")
         st.json(signal.confluences)
+
+
+signals_view()
@@ -2,36 +2,55 @@
 from __future__ import annotations
 
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
-state = st.session_state["engine_state"]
+from app.ui.downsample import downsample_line
+from app.ui.state import engine_state, page_size, refresh_seconds, ui_config
+from app.ui.transforms import EquityCurve, page, page_count, trades_frame
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def trades_table(version: int, _trades) -> pd.DataFrame:
+    return trades_frame(_trades)
+
+
+def equity_figure(curve: EquityCurve) -> go.Figure:
+    """Reaproveita a figura da sessão enquanto a curva não ganhou pontos."""
+    cached = st.session_state.get("equity_figure")
+    if cached is not None and cached[0] == len(curve):
+        return cached[1]
+    data = downsample_line(curve.frame(), "time", "equity", ui_config().get("ui", {}).get("chart_points", 1500))
+    figure = go.Figure(go.Scattergl(x=data["time"], y=data["equity"], mode="lines", name="Equity"))
+    figure.update_layout(title="Equity Curve", margin={"l": 10, "r": 10, "t": 40, "b": 10})
+    st.session_state["equity_figure"] = (len(curve), figure)
+    return figure
+
 
 st.header("Paper Trades")
 
-if not state.trades:
-    st.info("Nenhum trade simulado.")
-else:
-    data = [
-        {
-            "symbol": t.symbol,
-            "profile": t.profile,
-            "direction": t.direction,
-            "status": t.status,
-            "entry": t.entry_price,
-            "exit": t.exit_price,
-            "pnl": t.pnl,
-        }
-        for t in state.trades
-    ]
-    df = pd.DataFrame(data)
-    st.dataframe(df, use_container_width=True)
-
-    pnl_series = df["pnl"].fillna(0).cumsum()
-    fig = px.line(pnl_series, title="Equity Curve")
-    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment(run_every=refresh_seconds())
+def trades_view() -> None:
+    state = engine_state()
+    if not state.trades:
+        st.info("Nenhum trade simulado.")
+        return
+    df = trades_table(state.version, state.trades)
+    size = page_size()
+    number = st.number_input("Página", min_value=1, max_value=page_count(len(df), size), value=1, key="trades_page")
+    st.dataframe(page(df, number, size), use_container_width=True)
+    st.caption(f"{len(df)} trades")
+
+    curve = st.session_state.setdefault("equity_curve", EquityCurve())
+    curve.update(state.trades)
+    if len(curve):
+        st.plotly_chart(equity_figure(curve), use_container_width=True)
 
     st.subheader("Narrativas")
     for trade in list(state.trades)[:3]:
         st.write(f"Trade {trade.symbol} {trade.profile}")
         st.write(trade.narrative)
+
+
+trades_view()
@@ -3,7 +3,9 @@ from __future__ import annotations
 
 import streamlit as st
 
-state = st.session_state["engine_state"]
+from app.ui.state import engine_state
+
+state = engine_state()
 
 st.header("Logs")
 
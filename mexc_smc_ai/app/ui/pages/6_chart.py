@@ -0,0 +1,161 @@
+"""Gráfico de candles com OBs, pivots e trades."""
+from __future__ import annotations
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from app.core.timeframes import timeframe_delta
+from app.data.backfill import MAX_LIMIT
+from app.data.feed import normalize_klines
+from app.data.mexc_client import MexcClient
+from app.data.storage import HistoryStore
+from app.indicators.pivots import detect_pivots
+from app.ui.downsample import ohlc_buckets
+from app.ui.state import engine_state, refresh_seconds, ui_config
+
+
+@st.cache_resource
+def _client() -> MexcClient:
+    return MexcClient(pool_size=2)
+
+
+def latest_candles(symbol: str, timeframe: str) -> pd.DataFrame:
+    """Os dois candles mais recentes: o último fechado e o que está em formação."""
+    return normalize_klines(symbol, timeframe, _client().get_klines(symbol, timeframe, limit=2))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def history_buckets(
+    store_path: str,
+    symbol: str,
+    timeframe: str,
+    last_closed: pd.Timestamp,
+    points: int,
+    pivot_left: int,
+    pivot_right: int,
+) -> pd.DataFrame:
+    """Histórico fechado até `last_closed`, com pivots e reduzido a `points` candles.
+
+    Lê o store até onde ele foi gravado e busca na API só os candles que
+    faltam depois disso. Só é recalculado quando fecha um candle novo
+    (`last_closed` é a chave).
+    """
+    store = HistoryStore(store_path)
+    stored_until = store.last_open_time(symbol, timeframe)
+    end = last_closed + pd.Timedelta(milliseconds=1)
+    frame = store.read(symbol, timeframe, end=end)
+    if stored_until is None or stored_until < last_closed:
+        # Só o trecho que falta no disco vem da API (no máximo os últimos `MAX_LIMIT` candles).
+        step = timeframe_delta(timeframe)
+        start = last_closed - step * (MAX_LIMIT - 1)
+        if stored_until is not None:
+            start = max(start, stored_until + step)
+        klines = _client().get_klines(
+            symbol,
+            timeframe,
+            limit=MAX_LIMIT,
+            start_time=start.value // 1_000_000,
+            end_time=end.value // 1_000_000,
+        )
+        tail = normalize_klines(symbol, timeframe, klines)
+        tail = tail[(tail["open_time"] >= start) & (tail["open_time"] <= last_closed)]
+        frame = pd.concat([frame, tail[frame.columns]], ignore_index=True) if len(frame) else tail
+    frame = detect_pivots(frame.reset_index(drop=True), left=pivot_left, right=pivot_right)
+    return ohlc_buckets(frame, points)
+
+
+def _naive_utc(moment) -> pd.Timestamp:
+    # Trades usam o relógio do motor (UTC sem fuso); candles e OBs vêm com fuso.
+    moment = pd.Timestamp(moment)
+    return moment.tz_convert(None) if moment.tzinfo is not None else moment
+
+
+def build_figure(history: pd.DataFrame, forming: pd.DataFrame, order_blocks: list, trades: list) -> go.Figure:
+    candles = pd.concat([history, forming[["open_time", "open", "high", "low", "close"]]], ignore_index=True)
+    times = candles["open_time"].dt.tz_convert(None)
+    figure = go.Figure(
+        go.Candlestick(
+            x=times,
+            open=candles["open"],
+            high=candles["high"],
+            low=candles["low"],
+            close=candles["close"],
+            name="Candles",
+        )
+    )
+    end = times.iloc[-1]
+    for ob in order_blocks:
+        color = "rgba(38, 166, 154, 0.2)" if ob.direction == "bull" else "rgba(239, 83, 80, 0.2)"
+        figure.add_shape(type="rect", x0=_naive_utc(ob.created_at), x1=end, y0=ob.low, y1=ob.high, fillcolor=color, line_width=0, layer="below")
+    highs = history[history["pivot_high"]]
+    lows = history[history["pivot_low"]]
+    figure.add_trace(go.Scatter(x=highs["open_time"].dt.tz_convert(None), y=highs["high"], mode="markers", name="Pivot high", marker={"symbol": "triangle-down", "size": 7}))
+    figure.add_trace(go.Scatter(x=lows["open_time"].dt.tz_convert(None), y=lows["low"], mode="markers", name="Pivot low", marker={"symbol": "triangle-up", "size": 7}))
+    if trades:
+        figure.add_trace(
+            go.Scatter(
+                x=[_naive_utc(t.opened_at) for t in trades],
+                y=[t.entry_price for t in trades],
+                mode="markers",
+                name="Entradas",
+                marker={"symbol": ["triangle-up" if t.direction == "buy" else "triangle-down" for t in trades], "size": 11},
+            )
+        )
+        closed = [t for t in trades if t.status == "closed"]
+        figure.add_trace(
+            go.Scatter(
+                x=[_naive_utc(t.closed_at) for t in closed],
+                y=[t.exit_price for t in closed],
+                mode="markers",
+                name="Saídas",
+                marker={"symbol": "x", "size": 10},
+            )
+        )
+    figure.update_layout(
+        xaxis_rangeslider_visible=False,
+        height=650,
+        margin={"l": 10, "r": 10, "t": 30, "b": 10},
+        uirevision="chart",  # mantém zoom/pan entre atualizações
+    )
+    return figure
+
+
+config = ui_config()
+st.header("Gráfico")
+col1, col2 = st.columns(2)
+symbol = col1.selectbox("Símbolo", config["symbols"])
+timeframe = col2.selectbox(
+    "Timeframe",
+    list(dict.fromkeys(config["timeframes"]["execution_tf"] + config["timeframes"]["higher_tf"])),
+)
+
+
+@st.fragment(run_every=refresh_seconds())
+def chart_view() -> None:
+    try:
+        latest = latest_candles(symbol, timeframe)
+    except Exception as exc:
+        st.error(f"Falha ao buscar candles: {exc}")
+        return
+    if len(latest) < 2:
+        st.info("Sem candles para o par.")
+        return
+    settings = config["order_block"]
+    history = history_buckets(
+        config["storage"]["path"],
+        symbol,
+        timeframe,
+        latest["open_time"].iloc[-2],
+        config.get("ui", {}).get("chart_points", 1500),
+        settings["pivot_left"],
+        settings["pivot_right"],
+    )
+    state = engine_state()
+    order_blocks = state.order_blocks.get(f"{symbol}-{timeframe}", [])
+    trades = [t for t in state.trades if t.symbol == symbol and t.timeframe == timeframe]
+    st.plotly_chart(build_figure(history, latest.iloc[-1:], order_blocks, trades), use_container_width=True)
+    st.caption(f"{len(history)} candles exibidos · {len(order_blocks)} OBs ativos · {len(trades)} trades")
+
+
+chart_view()
@@ -0,0 +1,41 @@
+"""Acesso das páginas ao estado do motor."""
+from __future__ import annotations
+
+import streamlit as st
+
+from app.core.config import load_config
+from app.core.state import EngineState
+from app.core.state_store import StateReader
+
+
+@st.cache_resource
+def _reader(path: str) -> StateReader:
+    return StateReader(path)
+
+
+def ui_config() -> dict:
+    if "config" not in st.session_state:
+        st.session_state["config"] = load_config()
+    return st.session_state["config"]
+
+
+def engine_state() -> EngineState:
+    """Estado gravado pelo motor (backend `sqlite`) ou o estado em memória da sessão.
+
+    Com `sqlite`, cada chamada só lê as linhas novas desde a anterior.
+    """
+    settings = ui_config().get("state", {})
+    if settings.get("backend", "memory") == "sqlite":
+        return _reader(settings["path"]).refresh()
+    if "engine_state" not in st.session_state:
+        st.session_state["engine_state"] = EngineState()
+    return st.session_state["engine_state"]
+
+
+def refresh_seconds() -> float | None:
+    """Intervalo de atualização automática das páginas (None desliga)."""
+    return ui_config().get("ui", {}).get("refresh_seconds") or None
+
+
+def page_size() -> int:
+    return ui_config().get("ui", {}).get("page_size", 50)
@@ -0,0 +1,129 @@
+"""Transformações de dados das páginas do dashboard (sem dependência do Streamlit)."""
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from app.core.models import Signal, Trade
+
+SIGNAL_COLUMNS = ("time", "symbol", "tf", "profile", "direction", "score", "status", "reason")
+TRADE_COLUMNS = ("opened_at", "symbol", "profile", "direction", "status", "entry", "exit", "pnl")
+
+
+def signals_frame(signals: Iterable[Signal]) -> pd.DataFrame:
+    rows = [
+        (s.timestamp, s.symbol, s.timeframe, s.profile, s.direction, round(s.score, 3), s.status, s.reason)
+        for s in signals
+    ]
+    return pd.DataFrame.from_records(rows, columns=SIGNAL_COLUMNS)
+
+
+def trades_frame(trades: Iterable[Trade]) -> pd.DataFrame:
+    rows = [
+        (t.opened_at, t.symbol, t.profile, t.direction, t.status, t.entry_price, t.exit_price, t.pnl)
+        for t in trades
+    ]
+    return pd.DataFrame.from_records(rows, columns=TRADE_COLUMNS)
+
+
+def page_count(rows: int, page_size: int) -> int:
+    return max(1, math.ceil(rows / page_size))
+
+
+def page(frame: pd.DataFrame, number: int, page_size: int) -> pd.DataFrame:
+    """Página `number` (a partir de 1) do frame."""
+    number = min(max(number, 1), page_count(len(frame), page_size))
+    return frame.iloc[(number - 1) * page_size : number * page_size]
+
+
+class EquityCurve:
+    """Curva de PnL acumulado que só recebe os trades fechados ainda não vistos.
+
+    Guarda os pontos em vetores que crescem por blocos; `update` custa o
+    número de trades novos, e `frame` só é remontado quando algo mudou.
+    """
+
+    def __init__(self) -> None:
+        self._seen: set[str] = set()
+        self._times: list = []
+        self._pnl = np.empty(0, dtype=float)
+        self._equity = np.empty(0, dtype=float)
+        self._size = 0
+        self._frame: pd.DataFrame | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def update(self, trades: Iterable[Trade]) -> int:
+        """Acrescenta os trades recém-fechados, em ordem de fechamento. Retorna quantos entraram."""
+        fresh = sorted(
+            (t for t in trades if t.status == "closed" and t.pnl is not None and t.id not in self._seen),
+            key=lambda t: t.closed_at,
+        )
+        if not fresh:
+            return 0
+        needed = self._size + len(fresh)
+        if needed > len(self._pnl):
+            capacity = max(needed, 2 * len(self._pnl), 64)
+            self._pnl = np.resize(self._pnl, capacity)
+            self._equity = np.resize(self._equity, capacity)
+        pnl = np.array([t.pnl for t in fresh], dtype=float)
+        start = self._equity[self._size - 1] if self._size else 0.0
+        self._pnl[self._size : needed] = pnl
+        self._equity[self._size : needed] = start + np.cumsum(pnl)
+        self._times.extend(t.closed_at for t in fresh)
+        self._seen.update(t.id for t in fresh)
+        self._size = needed
+        self._frame = None
+        return len(fresh)
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.DataFrame(
+                {"time": self._times, "pnl": self._pnl[: self._size], "equity": self._equity[: self._size]}
+            )
+        return self._frame
+
+
+def stage_summary(snapshot: dict) -> pd.DataFrame:
+    """Tempo por etapa do pipeline (de `MetricsRegistry.snapshot`), da mais cara para a mais barata."""
+    rows = [
+        {
+            "stage": item["labels"].get("stage"),
+            "symbol": item["labels"].get("symbol"),
+            "timeframe": item["labels"].get("timeframe"),
+            "count": item["count"],
+            "total_s": item["sum"],
+            "mean_ms": item["sum"] / item["count"] * 1000 if item["count"] else 0.0,
+            "p95_ms": item["p95"] * 1000,
+        }
+        for item in snapshot.get("histograms", [])
+        if item["name"] == "engine_stage_seconds"
+    ]
+    frame = pd.DataFrame(rows, columns=["stage", "symbol", "timeframe", "count", "total_s", "mean_ms", "p95_ms"])
+    return frame.sort_values("total_s", ascending=False, ignore_index=True)
+
+
+def cycle_summary(snapshot: dict) -> dict:
+    """Último ciclo, razão contra `polling_seconds` e estouros."""
+    values = {item["name"]: item["value"] for item in snapshot.get("gauges", []) + snapshot.get("counters", []) if not item["labels"]}
+    return {
+        "last_seconds": values.get("engine_cycle_last_seconds"),
+        "budget_ratio": values.get("engine_cycle_budget_ratio"),
+        "overruns": int(values.get("engine_cycle_overruns_total", 0)),
+    }
+
+
+def model_summary(snapshot: dict) -> dict:
+    """Latência por previsão do modelo de IA e se ele está servindo pelo scorer linear."""
+    values = {item["name"]: item["value"] for item in snapshot.get("gauges", []) + snapshot.get("counters", []) if not item["labels"]}
+    per_prediction = values.get("model_seconds_per_prediction")
+    return {
+        "ms_per_prediction": per_prediction * 1000 if per_prediction is not None else None,
+        "degraded": bool(values.get("model_degraded", 0)),
+        "over_budget": int(values.get("model_over_budget_total", 0)),
+        "fallback": int(values.get("model_fallback_total", 0)),
+    }
@@ -0,0 +1,64 @@
+"""Compara consultas de toque no OrderBlockIndex com a varredura linear de ob_touch.
+
+Uso: python -m benchmarks.bench_ob_index [--blocks 5000] [--queries 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from app.core.models import OrderBlock
+from app.smc.confluence import ob_touch, touched_order_blocks
+from app.smc.interval_index import OrderBlockIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    blocks = []
+    for idx in range(args.blocks):
+        low = rng.uniform(10_000, 60_000)
+        blocks.append(
+            OrderBlock(
+                id=str(idx),
+                symbol="BTCUSDT",
+                timeframe="15m",
+                direction="bull",
+                created_at=datetime(2024, 1, 1),
+                low=low,
+                high=low + rng.uniform(10, 300),
+            )
+        )
+    index = OrderBlockIndex()
+    for ob in blocks:
+        index.insert(ob)
+    candles = []
+    for _ in range(args.queries):
+        low = rng.uniform(10_000, 60_000)
+        high = low + rng.uniform(10, 200)
+        candles.append((high, low, rng.uniform(low, high)))
+
+    started = time.perf_counter()
+    linear_hits = sum(sum(1 for ob in blocks if ob_touch(ob, *candle)) for candle in candles)
+    linear = time.perf_counter() - started
+
+    index.overlapping(0, 0)
+    started = time.perf_counter()
+    indexed_hits = sum(len(touched_order_blocks(index, *candle)) for candle in candles)
+    indexed = time.perf_counter() - started
+
+    assert linear_hits == indexed_hits
+    print(
+        f"blocks={args.blocks} queries={args.queries} "
+        f"linear={linear * 1000:.0f}ms índice={indexed * 1000:.0f}ms speedup={linear / indexed:.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
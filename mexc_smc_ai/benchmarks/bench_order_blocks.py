@@ -0,0 +1,30 @@
+"""Compara find_order_blocks colunar com o laço iloc original.
+
+Uso: python -m benchmarks.bench_order_blocks [--size 100000]
+"""
+from __future__ import annotations
+
+import argparse
+
+from app.indicators.pivots import detect_pivots
+from app.smc.order_blocks import find_order_blocks
+from benchmarks.bench_pivots import best_of
+from benchmarks.reference import find_order_blocks_loop
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frame = detect_pivots(synthetic_ohlcv(args.size), 3, 3)
+    params = dict(range_mode="wick", min_move_atr=1.2, min_move_pct=0.4, min_impulse_candles=2)
+    columnar = best_of(lambda: find_order_blocks(frame, symbol="BTCUSDT", timeframe="15m", **params), args.repeat)
+    loop = best_of(lambda: find_order_blocks_loop(frame, "wick", 1.2, 0.4), 1)
+    print(f"bars={args.size} colunar={columnar * 1000:.1f}ms laço={loop * 1000:.1f}ms speedup={loop / columnar:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Compara detect_pivots vetorizado com o laço Python original.
+
+Uso: python -m benchmarks.bench_pivots [--size 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.indicators.pivots import detect_pivots
+from benchmarks.reference import detect_pivots_loop
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frame = synthetic_ohlcv(args.size)
+    vectorized = best_of(lambda: detect_pivots(frame, 3, 3), args.repeat)
+    loop = best_of(lambda: detect_pivots_loop(frame, 3, 3), 1)
+    print(f"bars={args.size} vetorizado={vectorized * 1000:.1f}ms laço={loop * 1000:.1f}ms speedup={loop / vectorized:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
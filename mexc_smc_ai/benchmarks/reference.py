@@ -0,0 +1,40 @@
+"""Implementações originais em laço Python, mantidas como referência de equivalência e velocidade."""
+from __future__ import annotations
+
+import pandas as pd
+
+from app.indicators.atr import compute_atr
+
+
+def detect_pivots_loop(frame: pd.DataFrame, left: int, right: int) -> tuple[list, list]:
+    highs = frame["high"].values
+    lows = frame["low"].values
+    pivot_high = [False] * len(frame)
+    pivot_low = [False] * len(frame)
+    for idx in range(left, len(frame) - right):
+        pivot_high[idx] = highs[idx] == max(highs[idx - left : idx + right + 1])
+        pivot_low[idx] = lows[idx] == min(lows[idx - left : idx + right + 1])
+    return pivot_high, pivot_low
+
+
+def find_order_blocks_loop(frame: pd.DataFrame, range_mode: str, min_move_atr: float, min_move_pct: float) -> list[tuple]:
+    frame = frame.copy()
+    frame["atr"] = compute_atr(frame)
+    found = []
+    for idx in range(1, len(frame)):
+        row = frame.iloc[idx]
+        ob_candle = frame.iloc[idx - 1]
+        if range_mode == "body":
+            low = min(ob_candle["open"], ob_candle["close"])
+            high = max(ob_candle["open"], ob_candle["close"])
+        else:
+            low, high = ob_candle["low"], ob_candle["high"]
+        if row["pivot_low"] and ob_candle["close"] < ob_candle["open"]:
+            move = row["high"] - ob_candle["high"]
+            if move >= min_move_atr * row["atr"] or (move / ob_candle["close"]) * 100 >= min_move_pct:
+                found.append(("bull", float(low), float(high), float(move)))
+        if row["pivot_high"] and ob_candle["close"] > ob_candle["open"]:
+            move = ob_candle["low"] - row["low"]
+            if move >= min_move_atr * row["atr"] or (move / ob_candle["close"]) * 100 >= min_move_pct:
+                found.append(("bear", float(low), float(high), float(move)))
+    return found
@@ -0,0 +1,325 @@
+"""Suíte de benchmarks reprodutível (indicadores, SMC, features e ciclo completo) com saída JSON.
+
+Uso:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 1000,100000 --compare baseline.json --threshold 0.25
+
+Com `--compare`, cada caso é comparado ao mesmo (nome, candles, símbolos) do arquivo
+de referência pelo menor tempo medido; o processo sai com código 1 se algum
+ficar mais lento que `threshold`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from app.ai.features import build_features
+from app.core.config import load_config
+from app.core.models import OrderBlock
+from app.core.state import EngineState
+from app.core.timeframes import timeframe_seconds
+from app.engine.signal_engine import SignalEngine, enrich_frame
+from app.indicators.atr import compute_atr
+from app.indicators.divergence import detect_rsi_divergence
+from app.indicators.pivots import detect_pivots
+from app.indicators.rsi import compute_rsi
+from app.smc.order_blocks import find_order_blocks
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+FUNCTION_CASES = (
+    "detect_pivots",
+    "compute_rsi",
+    "compute_atr",
+    "detect_rsi_divergence",
+    "find_order_blocks",
+    "build_features",
+)
+CYCLE_CASES = ("run_cycle_cold", "run_cycle")
+# Início do relógio simulado: folga para 200 candles de 4h antes do primeiro ciclo.
+CYCLE_START = datetime(2020, 3, 1)
+FETCH_LIMIT = 200
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> list[float]:
+    """Executa `func` pelo menos `repeat` vezes e até somar `min_time` segundos (máximo de 1000 execuções)."""
+    timings: list[float] = []
+    while len(timings) < repeat or (sum(timings) < min_time and len(timings) < 1000):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(name: str, bars: int, timings: list[float], **params) -> dict:
+    result = {
+        "name": name,
+        "bars": bars,
+        "runs": len(timings),
+        "min_ms": min(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+    }
+    if params:
+        result["params"] = params
+    return result
+
+
+def function_cases(frame: pd.DataFrame, config: dict) -> dict[str, Callable[[], object]]:
+    """Um callable por função medida, com as entradas já preparadas (fora da medição)."""
+    settings = config["order_block"]
+    left, right = settings["pivot_left"], settings["pivot_right"]
+    pivoted = detect_pivots(frame, left, right)
+    with_rsi = pivoted.assign(rsi=compute_rsi(pivoted["close"]))
+    enriched = enrich_frame(frame, config)
+    last = enriched.iloc[-1]
+    ob = OrderBlock(
+        id="bench",
+        symbol="BTCUSDT",
+        timeframe="15m",
+        direction="bull",
+        created_at=last["open_time"].to_pydatetime(),
+        low=float(last["low"]),
+        high=float(last["high"]),
+    )
+    return {
+        "detect_pivots": lambda: detect_pivots(frame, left, right),
+        "compute_rsi": lambda: compute_rsi(frame["close"]),
+        "compute_atr": lambda: compute_atr(frame, period=config["risk"]["atr_period"]),
+        "detect_rsi_divergence": lambda: detect_rsi_divergence(with_rsi),
+        "find_order_blocks": lambda: find_order_blocks(
+            pivoted,
+            symbol="BTCUSDT",
+            timeframe="15m",
+            range_mode=settings["range_mode"],
+            min_move_atr=settings["min_move_atr"],
+            min_move_pct=settings["min_move_pct"],
+            min_impulse_candles=settings["min_impulse_candles"],
+        ),
+        "build_features": lambda: build_features(enriched, ob, "bullish", "scalping"),
+    }
+
+
+class SimulatedClock:
+    def __init__(self, start: datetime) -> None:
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+class ReplayClient:
+    """`MexcClient` falso: serve candles sintéticos até o instante do relógio simulado.
+
+    Respeita `limit` e `start_time` como a API, então o `CandleCache` do motor
+    faz a mesma carga inicial e os mesmos refreshes incrementais que faria ao vivo.
+    """
+
+    def __init__(self, symbols: list[str], timeframes: list[str], clock: SimulatedClock, until: datetime) -> None:
+        self.clock = clock
+        self.calls = 0
+        self._open_ms: dict[tuple[str, str], np.ndarray] = {}
+        self._rows: dict[tuple[str, str], list[list]] = {}
+        origin = pd.Timestamp(CYCLE_START - timedelta(days=60))
+        for seed, symbol in enumerate(symbols):
+            for timeframe in timeframes:
+                seconds = timeframe_seconds(timeframe)
+                size = int((until - origin.to_pydatetime()).total_seconds() // seconds) + 2
+                frame = synthetic_ohlcv(size, seed=seed, start=str(origin), freq=f"{seconds}s")
+                open_ms = frame["open_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+                close_ms = frame["close_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+                values = frame[["open", "high", "low", "close", "volume"]].to_numpy().astype(str)
+                self._open_ms[(symbol, timeframe)] = open_ms
+                self._rows[(symbol, timeframe)] = [
+                    [int(o), *row, int(c), "0", 0, "0", "0", "0"] for o, row, c in zip(open_ms, values.tolist(), close_ms)
+                ]
+
+    def get_klines(self, symbol, interval, limit=200, start_time=None, end_time=None):
+        self.calls += 1
+        open_ms = self._open_ms[(symbol, interval)]
+        now_ms = int(pd.Timestamp(self.clock(), tz="UTC").value // 1_000_000)
+        last = int(np.searchsorted(open_ms, now_ms, side="right"))  # inclui o candle em formação
+        if start_time is not None:
+            first = int(np.searchsorted(open_ms, start_time, side="left"))
+            return self._rows[(symbol, interval)][first : min(first + limit, last)]
+        return self._rows[(symbol, interval)][max(0, last - limit) : last]
+
+
+def cycle_config(symbols: int) -> dict:
+    config = load_config()
+    config["symbols"] = [f"SYM{idx:02d}USDT" for idx in range(symbols)]
+    config["engine"]["workers"] = 1
+    config["storage"]["enabled"] = False
+    config["ai"]["artifact_path"] = None
+    return config
+
+
+def cycle_cases(symbols: int, cycles: int, repeat: int) -> list[dict]:
+    """Ciclo completo do `SignalEngine` contra o `ReplayClient`, avançando um candle de execução por ciclo.
+
+    `run_cycle_cold` é o primeiro ciclo de um motor novo (carga inicial dos
+    caches); `run_cycle` são os ciclos seguintes, em regime.
+    """
+    config = cycle_config(symbols)
+    timeframes = list(dict.fromkeys(config["timeframes"]["execution_tf"] + config["timeframes"]["higher_tf"]))
+    step = min(timeframe_seconds(tf) for tf in config["timeframes"]["execution_tf"])
+    until = CYCLE_START + timedelta(seconds=step * (cycles + 1))
+    params = {"symbols": symbols, "timeframes": timeframes}
+
+    cold: list[float] = []
+    for _ in range(repeat):
+        clock = SimulatedClock(CYCLE_START)
+        client = ReplayClient(config["symbols"], timeframes, clock, until)
+        engine = SignalEngine(config=config, state=EngineState(), client=client, clock=clock)
+        started = time.perf_counter()
+        engine.run_cycle()
+        cold.append(time.perf_counter() - started)
+
+    steady: list[float] = []
+    for _ in range(cycles):
+        clock.advance(step)
+        started = time.perf_counter()
+        engine.run_cycle()
+        steady.append(time.perf_counter() - started)
+    return [
+        summarize("run_cycle_cold", FETCH_LIMIT, cold, **params),
+        summarize("run_cycle", FETCH_LIMIT, steady, cycles=cycles, **params),
+    ]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    cases: tuple[str, ...] = FUNCTION_CASES + CYCLE_CASES,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    symbols: int = 8,
+    cycles: int = 50,
+) -> dict:
+    """Roda os casos pedidos e devolve `{"meta": ..., "results": [...]}` (tempos em ms)."""
+    config = load_config()
+    results = []
+    # Os logs do motor (um evento por busca) dominariam o tempo medido no terminal.
+    logging.disable(logging.WARNING)
+    try:
+        for size in sizes:
+            prepared = function_cases(synthetic_ohlcv(size), config)
+            for name in FUNCTION_CASES:
+                if name in cases:
+                    results.append(summarize(name, size, measure(prepared[name], repeat, min_time)))
+        if any(name in cases for name in CYCLE_CASES):
+            results.extend(result for result in cycle_cases(symbols, cycles, repeat) if result["name"] in cases)
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _case_key(item: dict) -> tuple:
+    # Ciclos com outro número de símbolos não são comparáveis.
+    return item["name"], item["bars"], item.get("params", {}).get("symbols")
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.25) -> list[dict]:
+    """Razão `min_ms` atual / referência para cada caso presente nos dois; `regression` acima de 1 + threshold."""
+    previous = {_case_key(item): item for item in baseline["results"]}
+    rows = []
+    for item in current["results"]:
+        before = previous.get(_case_key(item))
+        if before is None:
+            continue
+        ratio = item["min_ms"] / before["min_ms"] if before["min_ms"] else float("inf")
+        rows.append(
+            {
+                "name": item["name"],
+                "bars": item["bars"],
+                "baseline_ms": before["min_ms"],
+                "current_ms": item["min_ms"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def _print_results(results: list[dict]) -> None:
+    print(f"{'caso':<24}{'candles':>10}{'execuções':>11}{'min ms':>12}{'mediana ms':>12}")
+    for item in results:
+        print(f"{item['name']:<24}{item['bars']:>10}{item['runs']:>11}{item['min_ms']:>12.3f}{item['median_ms']:>12.3f}")
+
+
+def _print_comparison(rows: list[dict]) -> None:
+    print(f"\n{'caso':<24}{'candles':>10}{'ref ms':>12}{'atual ms':>12}{'razão':>8}")
+    for row in rows:
+        flag = "  REGRESSÃO" if row["regression"] else ""
+        print(f"{row['name']:<24}{row['bars']:>10}{row['baseline_ms']:>12.3f}{row['current_ms']:>12.3f}{row['ratio']:>8.2f}{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--cases", default=",".join(FUNCTION_CASES + CYCLE_CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="segundos mínimos medidos por caso")
+    parser.add_argument("--symbols", type=int, default=8, help="símbolos no ciclo completo")
+    parser.add_argument("--cycles", type=int, default=50, help="ciclos em regime medidos")
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    parser.add_argument("--compare", help="JSON de referência (saída anterior desta suíte)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="lentidão tolerada antes de acusar regressão")
+    args = parser.parse_args()
+
+    report = run_suite(
+        sizes=tuple(int(size) for size in args.sizes.split(",") if size),
+        cases=tuple(name for name in args.cases.split(",") if name),
+        repeat=args.repeat,
+        min_time=args.min_time,
+        symbols=args.symbols,
+        cycles=args.cycles,
+    )
+    _print_results(report["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            rows = compare_results(json.load(handle), report, args.threshold)
+        _print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
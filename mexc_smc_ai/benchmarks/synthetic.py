@@ -0,0 +1,24 @@
+"""Gerador de OHLCV sintético e reprodutível para benchmarks."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlcv(size: int, seed: int = 42, start: str = "2020-01-01", freq: str = "15min") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, size)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0015, size)) * close
+    open_time = pd.date_range(start, periods=size, freq=freq, tz="UTC")
+    return pd.DataFrame(
+        {
+            "open_time": open_time,
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": rng.lognormal(3, 0.5, size),
+            "close_time": open_time + pd.Timedelta(freq) - pd.Timedelta(milliseconds=1),
+        }
+    )
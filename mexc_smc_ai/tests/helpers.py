@@ -0,0 +1,92 @@
+"""Fixtures de dados compartilhadas pelos testes (klines, clientes falsos, configs)."""
+import threading
+import time
+
+import pandas as pd
+
+from app.core.config import load_config
+from app.core.state import EngineState
+from app.engine.signal_engine import SignalEngine
+from benchmarks.synthetic import synthetic_ohlcv
+
+MINUTE_MS = 60_000
+
+
+def make_kline(open_time: int, close: float) -> list:
+    return [
+        open_time,
+        str(close),
+        str(close + 1),
+        str(close - 1),
+        str(close),
+        "10",
+        open_time + MINUTE_MS - 1,
+        "0",
+        0,
+        "0",
+        "0",
+        "0",
+    ]
+
+
+class FakeClient:
+    def __init__(self, count: int) -> None:
+        self.klines = [make_kline(i * MINUTE_MS, 100 + i) for i in range(count)]
+        self.calls: list[dict] = []
+
+    def get_klines(self, symbol, interval, limit=200, start_time=None, end_time=None):
+        self.calls.append({"limit": limit, "start_time": start_time})
+        rows = self.klines
+        if start_time is not None:
+            rows = [row for row in rows if row[0] >= start_time]
+            return rows[:limit]
+        return rows[-limit:]
+
+
+def make_config() -> dict:
+    config = load_config()
+    config["symbols"] = ["BTCUSDT"]
+    config["timeframes"] = {"higher_tf": ["1h"], "execution_tf": ["15m"]}
+    config["confluence"]["require_rsi_divergence"] = False
+    config["confluence"]["require_volume_spike"] = False
+    return config
+
+
+def make_history(size: int) -> dict:
+    frame = synthetic_ohlcv(size, seed=7)
+    hourly = (
+        frame.set_index("open_time")
+        .resample("1h")
+        .agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        .reset_index()
+    )
+    hourly["close_time"] = hourly["open_time"] + pd.Timedelta("1h") - pd.Timedelta(milliseconds=1)
+    return {("BTCUSDT", "15m"): frame, ("BTCUSDT", "1h"): hourly}
+
+
+class SlowClient:
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get_klines(self, symbol, interval, limit=200, start_time=None, end_time=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return [make_kline(i * MINUTE_MS, 100 + i) for i in range(limit)]
+
+
+def make_engine(workers: int) -> tuple[SignalEngine, list]:
+    config = load_config()
+    config["symbols"] = ["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT"]
+    config["engine"]["workers"] = workers
+    engine = SignalEngine(config=config, state=EngineState())
+    engine.client = SlowClient()
+    processed = []
+    engine.process_symbol_timeframe = lambda symbol, tf, bias, frame=None: processed.append((symbol, tf, bias))
+    return engine, processed
@@ -0,0 +1,87 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.backfill import Backfiller, find_gaps
+from app.data.mexc_client import MexcClient
+from app.data.storage import HistoryStore
+from tests.helpers import MINUTE_MS, make_kline
+
+START = pd.Timestamp("2024-01-01", tz="UTC")
+START_MS = START.value // 1_000_000
+# A "exchange" não tem os candles 250..259 (parada de manutenção).
+HOLE = range(250, 260)
+
+
+class KlineHandler(BaseHTTPRequestHandler):
+    requests: list[dict] = []
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        query = {key: int(params[key][0]) for key in ("startTime", "endTime", "limit")}
+        self.requests.append({"symbol": params["symbol"][0], **query})
+        first = max(0, -(-(query["startTime"] - START_MS) // MINUTE_MS))
+        rows = []
+        idx = first
+        while len(rows) < query["limit"] and idx < 1000:
+            open_ms = START_MS + idx * MINUTE_MS
+            if open_ms > query["endTime"]:
+                break
+            if idx not in HOLE:
+                rows.append(make_kline(open_ms, 100 + idx))
+            idx += 1
+        body = json.dumps(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    KlineHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), KlineHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_find_gaps_reports_missing_ranges():
+    times = START_MS + np.array([0, 1, 2, 5, 6]) * MINUTE_MS
+    gaps = find_gaps(times, "1m", START, START + pd.Timedelta(minutes=9))
+
+    assert gaps == [
+        (START + pd.Timedelta(minutes=3), START + pd.Timedelta(minutes=5)),
+        (START + pd.Timedelta(minutes=7), START + pd.Timedelta(minutes=9)),
+    ]
+
+
+def test_backfill_pages_resumes_and_reports_gaps(server, tmp_path):
+    client = MexcClient(base_url=server, max_retries=1)
+    store = HistoryStore(str(tmp_path))
+    backfiller = Backfiller(client, store, limit=100, workers=2)
+
+    first = backfiller.backfill_pair("BTCUSDT", "1m", START, end=START + pd.Timedelta(minutes=300))
+    assert store.rows("BTCUSDT", "1m") == 290
+    assert first.gaps == [(START + pd.Timedelta(minutes=250), START + pd.Timedelta(minutes=260))]
+
+    KlineHandler.requests = []
+    reports = backfiller.run([("BTCUSDT", "1m"), ("ETHUSDT", "1m")], START, end=START + pd.Timedelta(minutes=600))
+    btc = next(report for report in reports if report.symbol == "BTCUSDT")
+
+    # Retoma do candle seguinte ao último gravado em vez de recomeçar.
+    btc_requests = [req for req in KlineHandler.requests if req["symbol"] == "BTCUSDT"]
+    assert btc_requests[0]["startTime"] == START_MS + 300 * MINUTE_MS
+    assert btc.added == 300
+    assert store.rows("BTCUSDT", "1m") == 590
+    assert store.rows("ETHUSDT", "1m") == 590
+    assert all(report.gaps == first.gaps for report in reports)
@@ -0,0 +1,49 @@
+from collections import deque
+
+import pandas as pd
+import pytest
+
+from app.core.state import EngineState
+from app.engine.backtest import Backtester, SimulatedClock
+from app.engine.signal_engine import SignalEngine
+from tests.helpers import make_config, make_history
+
+WINDOW = 120
+
+
+def live_signals(config: dict, history: dict) -> list[tuple]:
+    """Referência: o engine ao vivo recebendo, a cada candle fechado, a janela que a API devolveria."""
+    frame = history[("BTCUSDT", "15m")]
+    hourly = history[("BTCUSDT", "1h")]
+    clock = SimulatedClock()
+    engine = SignalEngine(config=config, state=EngineState(signals=deque()), clock=clock.now)
+    for idx in range(len(frame)):
+        moment = frame["open_time"].iloc[idx] + pd.Timedelta("15min")
+        clock.current = moment.tz_convert(None).to_pydatetime()
+        if engine.bias_service.needs_refresh("BTCUSDT", "1h", moment):
+            engine.bias_service.update("BTCUSDT", "1h", hourly, moment)
+        window = frame.iloc[max(0, idx - WINDOW + 1) : idx + 1].reset_index(drop=True)
+        engine.process_symbol_timeframe("BTCUSDT", "15m", engine.bias_service.bias("BTCUSDT"), frame=window)
+    return [(s.order_block_id, s.timestamp, s.profile, s.status) for s in engine.state.signals]
+
+
+def test_backtest_replay_matches_live_pipeline():
+    config = make_config()
+    history = make_history(600)
+    backtester = Backtester(config, window=WINDOW)
+    backtester.run(history)
+    replayed = [(s.order_block_id, s.timestamp, s.profile, s.status) for s in backtester.state.signals]
+
+    assert replayed
+    assert replayed == live_signals(config, history)
+
+
+def test_backtest_reports_trades_equity_and_stats():
+    result = Backtester(make_config(), window=WINDOW).run(make_history(600))
+
+    assert result.stats["bars"] == 600
+    assert result.stats["trades"] == len(result.trades)
+    assert len(result.equity) == result.stats["closed"]
+    assert all(trade.opened_at.year == 2020 for trade in result.trades)
+    if len(result.equity):
+        assert result.equity["equity"].iloc[-1] == pytest.approx(sum(t.pnl for t in result.trades if t.status == "closed"))
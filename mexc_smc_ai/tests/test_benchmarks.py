@@ -0,0 +1,32 @@
+from benchmarks.run import CYCLE_CASES, FUNCTION_CASES, compare_results, run_suite
+
+
+def test_suite_runs_every_case_and_reports_timings():
+    report = run_suite(sizes=(300,), repeat=1, min_time=0.0, symbols=1, cycles=2)
+
+    assert [item["name"] for item in report["results"]] == list(FUNCTION_CASES + CYCLE_CASES)
+    assert all(item["min_ms"] > 0 for item in report["results"])
+    assert report["results"][-1]["params"]["symbols"] == 1
+    assert report["meta"]["pandas"]
+
+
+def test_compare_flags_only_slower_matching_cases():
+    baseline = {
+        "results": [
+            {"name": "compute_rsi", "bars": 1000, "min_ms": 1.0},
+            {"name": "compute_atr", "bars": 1000, "min_ms": 1.0},
+            {"name": "run_cycle", "bars": 200, "min_ms": 50.0, "params": {"symbols": 8}},
+        ]
+    }
+    current = {
+        "results": [
+            {"name": "compute_rsi", "bars": 1000, "min_ms": 1.1},
+            {"name": "compute_atr", "bars": 1000, "min_ms": 1.6},
+            {"name": "run_cycle", "bars": 200, "min_ms": 90.0, "params": {"symbols": 2}},
+            {"name": "detect_pivots", "bars": 1000, "min_ms": 5.0},
+        ]
+    }
+
+    rows = compare_results(baseline, current, threshold=0.25)
+
+    assert [(row["name"], row["regression"]) for row in rows] == [("compute_rsi", False), ("compute_atr", True)]
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from app.core.timeframes import candle_open
+from app.smc.bias import BiasService, composite_bias
+
+
+def make_frame(end: pd.Timestamp, closes: list[float], timeframe: str = "1h") -> pd.DataFrame:
+    step = pd.Timedelta(timeframe)
+    open_time = pd.date_range(end=end, periods=len(closes), freq=step)
+    return pd.DataFrame(
+        {
+            "open_time": open_time,
+            "close_time": open_time + step - pd.Timedelta(milliseconds=1),
+            "close": closes,
+        }
+    )
+
+
+def test_composite_bias_requires_agreement():
+    assert composite_bias(["bullish", "neutral", "bullish"]) == "bullish"
+    assert composite_bias(["bullish", "bearish"]) == "neutral"
+    assert composite_bias([]) == "neutral"
+
+
+def test_bias_ignores_forming_candle_and_waits_for_next_close():
+    now = pd.Timestamp("2024-05-01 10:30", tz="UTC")
+    service = BiasService(["1h"], grace_seconds=0)
+    # Último candle (10:00) ainda está aberto e não pode mudar o bias.
+    frame = make_frame(pd.Timestamp("2024-05-01 10:00", tz="UTC"), [1.0, 2.0, 0.5])
+
+    assert service.update("BTCUSDT", "1h", frame, now) == "bullish"
+    assert not service.needs_refresh("BTCUSDT", "1h", now + pd.Timedelta(minutes=29))
+    assert service.needs_refresh("BTCUSDT", "1h", pd.Timestamp("2024-05-01 11:00", tz="UTC"))
+    assert service.bias("BTCUSDT") == "bullish"
+
+
+def test_weekly_candles_open_on_monday():
+    opened = candle_open(pd.Timestamp("2024-05-02 15:00", tz="UTC").to_pydatetime(), "1W")
+    assert opened.weekday() == 0
+    assert opened.hour == 0
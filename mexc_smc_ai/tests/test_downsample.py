@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.indicators.pivots import detect_pivots
+from app.ui.downsample import downsample_line, lttb, ohlc_buckets
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def test_ohlc_buckets_keep_extremes_and_pivots():
+    frame = detect_pivots(synthetic_ohlcv(10_000, seed=5), left=3, right=3)
+    started = time.perf_counter()
+    out = ohlc_buckets(frame, 500)
+    assert time.perf_counter() - started < 0.5
+
+    assert len(out) == 500
+    assert out["high"].max() == frame["high"].max()
+    assert out["low"].min() == frame["low"].min()
+    assert out["open"].iloc[0] == frame["open"].iloc[0]
+    assert out["close"].iloc[-1] == frame["close"].iloc[-1]
+    assert out["volume"].sum() == pytest.approx(frame["volume"].sum())
+    assert out["open_time"].is_monotonic_increasing
+    # O bloco da máxima global é marcado se ela for um pivot de alta.
+    top = frame["high"].idxmax()
+    assert out["pivot_high"].iloc[out["high"].idxmax()] == frame["pivot_high"].iloc[top]
+    assert ohlc_buckets(frame.iloc[:100], 500).equals(frame.iloc[:100].reset_index(drop=True))
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(5000, dtype=float)
+    y = np.sin(x / 200)
+    y[2500] = 50.0
+    chosen = lttb(x, y, 200)
+    assert len(chosen) == 200
+    assert chosen[0] == 0 and chosen[-1] == 4999
+    assert 2500 in chosen
+    assert (np.diff(chosen) > 0).all()
+
+
+def test_downsample_line_accepts_datetimes():
+    frame = synthetic_ohlcv(3000, seed=1)
+    out = downsample_line(frame, "open_time", "close", 300)
+    assert len(out) == 300
+    assert out["open_time"].iloc[-1] == frame["open_time"].iloc[-1]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ai.features import FEATURE_COLUMNS, build_feature_matrix, build_features
+from app.ai.model import LogisticRegressionModel
+from app.core.models import OrderBlock
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def make_frame() -> pd.DataFrame:
+    frame = synthetic_ohlcv(60, seed=3)
+    frame["rsi"] = np.linspace(30, 70, len(frame))
+    frame["bull_divergence"] = False
+    frame["bear_divergence"] = True
+    return frame
+
+
+def make_ob(low: float, high: float) -> OrderBlock:
+    return OrderBlock(id=f"{low}", symbol="BTCUSDT", timeframe="15m", direction="bull", created_at=pd.Timestamp(0), low=low, high=high)
+
+
+def test_feature_matrix_matches_per_candidate_features():
+    frame = make_frame()
+    candidates = [(make_ob(99, 100), "scalping"), (make_ob(98, 99), "swing")]
+    matrix = build_feature_matrix(frame, candidates, bias="bullish")
+
+    for row, (ob, profile) in zip(matrix, candidates):
+        expected = build_features(frame, ob, bias="bullish", profile=profile)
+        assert list(expected) == list(FEATURE_COLUMNS)
+        assert row == pytest.approx([expected[column] for column in FEATURE_COLUMNS])
+    legacy_ratio = frame["volume"].iloc[-1] / frame["volume"].rolling(20).mean().iloc[-1]
+    assert matrix[0, FEATURE_COLUMNS.index("volume_ratio")] == pytest.approx(legacy_ratio)
+
+
+def test_batch_prediction_matches_single_rows():
+    rng = np.random.default_rng(0)
+    model = LogisticRegressionModel()
+    features = rng.normal(size=(200, len(FEATURE_COLUMNS)))
+    model.fit(features, (features[:, 0] > 0).astype(int))
+
+    batch = model.predict_proba_batch(features[:5])
+    single = [model.predict_proba(dict(zip(FEATURE_COLUMNS, row))) for row in features[:5]]
+    assert batch == pytest.approx(single)
+    assert LogisticRegressionModel().predict_proba_batch(features[:3]).tolist() == [0.5, 0.5, 0.5]
@@ -0,0 +1,33 @@
+from app.data.feed import CandleCache, fetch_candles
+from tests.helpers import MINUTE_MS, FakeClient, make_kline
+
+
+def test_cache_fetches_only_new_candles():
+    client = FakeClient(250)
+    cache = CandleCache(max_candles=200)
+    first = fetch_candles(client, "BTCUSDT", "1m", cache=cache)
+    assert len(first) == 200
+    assert cache.misses == 1
+
+    client.klines[-1] = make_kline(249 * MINUTE_MS, 999)
+    client.klines.append(make_kline(250 * MINUTE_MS, 500))
+    second = fetch_candles(client, "BTCUSDT", "1m", cache=cache)
+
+    assert client.calls[-1]["start_time"] == 249 * MINUTE_MS
+    assert cache.hits == 1
+    assert len(second) == 200
+    assert second["open_time"].is_monotonic_increasing
+    assert second["close"].iloc[-2] == 999
+    assert second["close"].iloc[-1] == 500
+
+
+def test_cache_reloads_when_gap_exceeds_refresh_window():
+    client = FakeClient(200)
+    cache = CandleCache(max_candles=200, refresh_limit=10)
+    fetch_candles(client, "BTCUSDT", "1m", cache=cache)
+    client.klines.extend(make_kline(i * MINUTE_MS, 100 + i) for i in range(200, 230))
+
+    frame = fetch_candles(client, "BTCUSDT", "1m", cache=cache)
+
+    assert cache.misses == 2
+    assert frame["close"].iloc[-1] == 329
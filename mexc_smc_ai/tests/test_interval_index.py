@@ -0,0 +1,43 @@
+import random
+from datetime import datetime
+
+from app.core.models import OrderBlock
+from app.smc.confluence import ob_touch, touched_order_blocks
+from app.smc.interval_index import OrderBlockIndex
+
+
+def make_block(idx: int, low: float, high: float) -> OrderBlock:
+    return OrderBlock(
+        id=f"ob-{idx}",
+        symbol="BTCUSDT",
+        timeframe="15m",
+        direction="bull",
+        created_at=datetime(2024, 1, 1),
+        low=low,
+        high=high,
+    )
+
+
+def test_index_matches_linear_ob_touch_with_inserts_and_removals():
+    rng = random.Random(5)
+    index = OrderBlockIndex()
+    blocks = {}
+    for idx in range(400):
+        low = rng.uniform(90, 110)
+        block = make_block(idx, low, low + rng.uniform(0, 3))
+        blocks[block.id] = block
+        index.insert(block)
+    for ob_id in rng.sample(sorted(blocks), 100):
+        index.remove(ob_id)
+        del blocks[ob_id]
+
+    for _ in range(300):
+        low = rng.uniform(88, 112)
+        high = low + rng.uniform(0, 2)
+        close = rng.choice([rng.uniform(low, high), rng.uniform(85, 115)])
+        expected = [ob.id for ob in blocks.values() if ob_touch(ob, high, low, close)]
+        assert [ob.id for ob in touched_order_blocks(index, high, low, close)] == expected
+
+
+def test_empty_index_returns_nothing():
+    assert OrderBlockIndex().overlapping(1.0, 2.0) == []
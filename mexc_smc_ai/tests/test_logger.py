@@ -0,0 +1,99 @@
+import io
+import json
+import logging
+
+from app.core.logger import JsonFormatter, _TimedStreamHandler, configure_logging, get_logger, log_event
+from app.core.metrics import METRICS
+
+
+class Collect(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def collecting_logger(name: str, level: int = logging.INFO) -> tuple[logging.Logger, Collect]:
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    handler = Collect()
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, handler
+
+
+def test_get_logger_uses_a_single_shared_queue_handler():
+    first = get_logger("test_logger.first")
+    second = get_logger("test_logger.second")
+
+    assert len(first.handlers) == 1
+    assert first.handlers[0] is second.handlers[0]
+
+
+def test_loggers_created_after_configure_use_the_configured_level(monkeypatch):
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    configure_logging({"level": "warning"})
+    try:
+        late = get_logger("test_logger.late")
+        assert late.level == logging.WARNING
+    finally:
+        configure_logging({})
+    assert late.level == logging.INFO
+
+
+def test_disabled_level_is_skipped_before_building_the_record():
+    logger, handler = collecting_logger("test_logger.lazy", logging.WARNING)
+
+    log_event(logger, "noise", message="ignorado", level="debug", value=1)
+    log_event(logger, "kept", message="mantido", level="warning", value=2)
+
+    assert [record.getMessage() for record in handler.records] == ["kept"]
+    assert handler.records[0].fields == {"value": 2, "event_message": "mantido"}
+
+
+def test_sampled_events_emit_one_in_n():
+    logger, handler = collecting_logger("test_logger.sampled")
+    configure_logging({"sample": {"fetch_candles": 3}})
+    try:
+        for idx in range(7):
+            log_event(logger, "fetch_candles", symbol="BTCUSDT", idx=idx)
+        log_event(logger, "other_event")
+    finally:
+        configure_logging({})
+
+    fetches = [record.fields for record in handler.records if record.getMessage() == "fetch_candles"]
+    assert [fields["idx"] for fields in fetches] == [0, 3, 6]
+    assert all(fields["sampled"] == 3 for fields in fetches)
+    assert handler.records[-1].getMessage() == "other_event"
+
+
+def test_json_formatter_renames_reserved_fields():
+    logger, handler = collecting_logger("test_logger.json")
+    log_event(logger, "fetch_failed", message="Falha", name="BTCUSDT", error="timeout")
+
+    payload = json.loads(JsonFormatter().format(handler.records[0]))
+
+    assert payload["message"] == "fetch_failed"
+    assert payload["logger"] == "test_logger.json"
+    assert payload["event_name"] == "BTCUSDT"
+    assert payload["error"] == "timeout"
+    assert payload["event_message"] == "Falha"
+
+
+def test_output_handler_times_formatting_and_write():
+    handler = _TimedStreamHandler(io.StringIO())
+    handler.setFormatter(JsonFormatter())
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        handler.handle(logging.LogRecord("test_logger.timed", logging.WARNING, "", 0, "evento", (), None))
+        histograms = METRICS.snapshot()["histograms"]
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+
+    assert json.loads(handler.stream.getvalue())["message"] == "evento"
+    assert [(h["name"], h["labels"], h["count"]) for h in histograms] == [("log_emit_seconds", {"level": "warning"}, 1)]
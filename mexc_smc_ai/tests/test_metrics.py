@@ -0,0 +1,69 @@
+import json
+import urllib.request
+
+from app.core.metrics import MetricsRegistry, start_metrics_server
+from app.ui.transforms import cycle_summary, stage_summary
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer("engine_stage_seconds", stage="fetch"):
+        pass
+    registry.inc("engine_cycle_overruns_total")
+    assert registry.snapshot() == {"counters": [], "gauges": [], "histograms": []}
+    assert registry.timer("x") is registry.timer("y")
+
+
+def test_histogram_rendering_and_summary():
+    registry = MetricsRegistry(enabled=True)
+    for value in (0.002, 0.004, 0.2):
+        registry.observe("engine_stage_seconds", value, stage="enrich", symbol="BTCUSDT", timeframe="15m")
+    registry.observe("engine_stage_seconds", 0.001, stage="fetch", symbol="BTCUSDT", timeframe="15m")
+    registry.set("engine_cycle_last_seconds", 16.0)
+    registry.set("engine_cycle_budget_ratio", 16.0 / 15)
+    registry.inc("engine_cycle_overruns_total")
+
+    text = registry.render()
+    assert "# TYPE engine_stage_seconds histogram" in text
+    assert 'engine_stage_seconds_bucket{stage="enrich",symbol="BTCUSDT",timeframe="15m",le="0.005"} 2' in text
+    assert 'engine_stage_seconds_bucket{stage="enrich",symbol="BTCUSDT",timeframe="15m",le="+Inf"} 3' in text
+    assert 'engine_stage_seconds_count{stage="enrich",symbol="BTCUSDT",timeframe="15m"} 3' in text
+    assert "engine_cycle_overruns_total 1" in text
+
+    snapshot = registry.snapshot()
+    stages = stage_summary(snapshot)
+    assert stages["stage"].tolist() == ["enrich", "fetch"]
+    assert stages["p95_ms"].iloc[0] == 250.0
+    assert cycle_summary(snapshot) == {"last_seconds": 16.0, "budget_ratio": 16.0 / 15, "overruns": 1}
+
+
+def test_metrics_endpoint_serves_text_and_json():
+    registry = MetricsRegistry(enabled=True)
+    registry.inc("mexc_requests_total", endpoint="/api/v3/klines", result="ok")
+    server = start_metrics_server(registry, port=0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert 'mexc_requests_total{endpoint="/api/v3/klines",result="ok"} 1' in response.read().decode()
+        with urllib.request.urlopen(f"{base}/metrics.json", timeout=5) as response:
+            assert json.loads(response.read())["counters"][0]["value"] == 1.0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_engine_cycle_reports_overrun(monkeypatch):
+    from tests.helpers import make_engine
+
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr("app.engine.signal_engine.METRICS", registry)
+    engine, _ = make_engine(workers=1)
+    engine.config["engine"]["polling_seconds"] = 0.01
+    engine.client.delay = 0.01
+    engine.run_cycle()
+
+    summary = cycle_summary(registry.snapshot())
+    assert summary["overruns"] == 1 and summary["budget_ratio"] > 1
+    fetches = [h for h in registry.snapshot()["histograms"] if h["labels"].get("stage") == "fetch"]
+    assert fetches and all(h["count"] >= 1 for h in fetches)
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from app.data.mexc_client import MexcClient
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload=None, headers=None) -> None:
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    def __init__(self, responses: list[FakeResponse]) -> None:
+        self.responses = responses
+        self.calls: list[dict] = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        return self.responses.pop(0)
+
+
+def test_retries_after_429_and_records_latency():
+    client = MexcClient(backoff_seconds=0.0)
+    client.session = FakeSession([FakeResponse(429, headers={"Retry-After": "0"}), FakeResponse(200, [[1]])])
+
+    result = client.get_klines("BTCUSDT", "15m", limit=5, start_time=1000)
+
+    assert result == [[1]]
+    assert client.session.calls[-1]["startTime"] == 1000
+    stats = client.latency_stats()["/api/v3/klines"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 1
+
+
+def test_retry_after_accepts_http_date_and_falls_back_on_garbage():
+    client = MexcClient(backoff_seconds=1.0)
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+
+    assert 25 <= client._retry_after(future, 1) <= 30
+    assert client._retry_after("Wed, 21 Oct 2015 07:28:00 GMT", 1) == 0.0
+    assert 0.5 <= client._retry_after("soon", 1) <= 1.0
+    assert client._retry_after("2", 1) == 2.0
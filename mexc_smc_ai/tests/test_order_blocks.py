@@ -2,6 +2,8 @@ import pandas as pd
 
 from app.smc.order_blocks import find_order_blocks
 from app.indicators.pivots import detect_pivots
+from benchmarks.reference import find_order_blocks_loop
+from benchmarks.synthetic import synthetic_ohlcv
 
 
 def test_finds_bullish_order_block():
@@ -24,3 +26,32 @@ def test_finds_bullish_order_block():
         min_impulse_candles=1,
     )
     assert any(ob.direction == "bull" for ob in obs)
+
+
+def test_vectorized_order_blocks_match_reference_loop():
+    frame = detect_pivots(synthetic_ohlcv(3000, seed=3), left=2, right=2)
+    for range_mode in ["wick", "body"]:
+        obs = find_order_blocks(
+            frame,
+            symbol="BTCUSDT",
+            timeframe="15m",
+            range_mode=range_mode,
+            min_move_atr=0.5,
+            min_move_pct=0.2,
+            min_impulse_candles=2,
+        )
+        expected = find_order_blocks_loop(frame, range_mode, 0.5, 0.2)
+        assert expected
+        assert [(ob.direction, ob.low, ob.high, ob.min_move) for ob in obs] == expected
+
+
+def test_order_block_ids_are_deterministic():
+    frame = detect_pivots(synthetic_ohlcv(500, seed=5), left=2, right=2)
+    kwargs = dict(symbol="BTCUSDT", timeframe="15m", range_mode="wick", min_move_atr=0.5, min_move_pct=0.2, min_impulse_candles=2)
+    first = find_order_blocks(frame, **kwargs)
+    second = find_order_blocks(frame, **kwargs)
+
+    assert first
+    assert [ob.id for ob in first] == [ob.id for ob in second]
+    assert len({ob.id for ob in first}) == len(first)
+    assert first[0].created_at in set(frame["open_time"].dt.to_pydatetime())
@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 
 from app.indicators.pivots import detect_pivots
+from benchmarks.reference import detect_pivots_loop
 
 
 def test_detect_pivots_marks_high_low():
@@ -13,3 +15,15 @@ def test_detect_pivots_marks_high_low():
     result = detect_pivots(frame, left=1, right=1)
     assert result["pivot_high"].iloc[2]
     assert result["pivot_low"].iloc[2]
+
+
+def test_vectorized_pivots_match_reference_loop_including_ties():
+    rng = np.random.default_rng(7)
+    for size, left, right in [(500, 3, 3), (200, 1, 4), (6, 3, 3), (3, 2, 2), (50, 0, 0)]:
+        # Poucos níveis de preço para forçar empates.
+        highs = rng.integers(0, 8, size).astype(float)
+        frame = pd.DataFrame({"high": highs, "low": highs - rng.integers(0, 3, size)})
+        result = detect_pivots(frame, left=left, right=right)
+        expected_high, expected_low = detect_pivots_loop(frame, left, right)
+        assert result["pivot_high"].tolist() == expected_high
+        assert result["pivot_low"].tolist() == expected_low
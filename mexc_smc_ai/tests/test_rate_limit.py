@@ -0,0 +1,33 @@
+from app.data.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_queues_requests_beyond_budget():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, window_seconds=10, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(12)]
+
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] == 1.0
+    assert waits[11] == 1.0
+    assert clock.now == 2.0
+
+
+def test_penalize_blocks_next_request():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, window_seconds=10, clock=clock, sleep=clock.sleep)
+    bucket.penalize(3.0)
+
+    assert bucket.acquire() == 4.0
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from app.indicators.pivots import detect_pivots
+from app.smc.order_blocks import find_order_blocks
+from app.smc.registry import OrderBlockRegistry
+from benchmarks.synthetic import synthetic_ohlcv
+
+SETTINGS = {
+    "pivot_left": 2,
+    "pivot_right": 2,
+    "range_mode": "wick",
+    "min_move_atr": 0.5,
+    "min_move_pct": 0.2,
+    "min_impulse_candles": 2,
+    "invalidate_on_wick": True,
+}
+
+
+def make_registry(**kwargs) -> OrderBlockRegistry:
+    return OrderBlockRegistry("BTCUSDT", "15m", settings=SETTINGS, **kwargs)
+
+
+def test_incremental_scan_discovers_same_blocks_as_full_scan():
+    frame = detect_pivots(synthetic_ohlcv(400, seed=21), 2, 2)
+    registry = make_registry(max_age_bars=10_000)
+    discovered = set()
+    for end in range(200, 401, 7):
+        added, _ = registry.update(frame.iloc[:end])
+        discovered |= {ob.id for ob in added}
+
+    full = find_order_blocks(frame, symbol="BTCUSDT", timeframe="15m", **{
+        key: SETTINGS[key] for key in ["range_mode", "min_move_atr", "min_move_pct", "min_impulse_candles"]
+    })
+    assert discovered == {ob.id for ob in full}
+
+
+def test_blocks_are_evicted_after_max_signals_and_not_rediscovered():
+    frame = detect_pivots(synthetic_ohlcv(300, seed=22), 2, 2)
+    registry = make_registry(max_signals=1)
+    registry.update(frame.iloc[:250])
+    target = next(iter(registry.blocks.values()))
+    registry.record_signal(target.id)
+
+    assert not registry.can_signal(target.id)
+    _, evicted = registry.update(frame.iloc[:251])
+    assert target.id in {ob.id for ob in evicted}
+    added, _ = registry.update(frame.iloc[:252])
+    assert target.id not in registry.blocks
+    assert target.id not in {ob.id for ob in added}
+
+
+def test_invalidated_blocks_leave_the_registry():
+    frame = detect_pivots(synthetic_ohlcv(300, seed=23), 2, 2)
+    registry = make_registry()
+    registry.update(frame)
+
+    assert all(ob.valid for ob in registry.blocks.values())
+
+
+def test_intrabar_excursion_that_recovers_before_close_keeps_blocks():
+    frame = detect_pivots(synthetic_ohlcv(300, seed=24), 2, 2)
+    registry = make_registry(max_age_bars=10_000)
+    registry.update(frame.iloc[:250])
+    target = next(ob for ob in registry.blocks.values() if ob.direction == "bull")
+
+    # Candle seguinte ainda aberto: o pavio atravessa o OB inteiro.
+    forming = frame.iloc[:251].copy()
+    forming.loc[250, "low"] = target.low - 10
+    forming.loc[250, "close"] = target.low - 5
+    now = forming["close_time"].iloc[250] - pd.Timedelta(seconds=30)
+    _, evicted = registry.update(forming, now=now)
+
+    assert target.id not in {ob.id for ob in evicted}
+    assert registry.blocks[target.id].valid and not registry.blocks[target.id].mitigated
+    assert target in registry.touched(forming["high"].iloc[250], forming["low"].iloc[250], forming["close"].iloc[250])
+
+    # Fecha longe do OB: o candle fechado é processado, sem invalidar.
+    closed = frame.iloc[:251].copy()
+    closed.loc[250, ["open", "high", "low", "close"]] = target.high + 20, target.high + 25, target.high + 15, target.high + 22
+    _, evicted = registry.update(closed, now=closed["close_time"].iloc[250] + pd.Timedelta(seconds=1))
+
+    assert target.id not in {ob.id for ob in evicted}
+    assert registry.blocks[target.id].valid and not registry.blocks[target.id].mitigated
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from app.engine.scheduler import CandleCloseScheduler
+
+
+class FakeEngine:
+    def __init__(self) -> None:
+        self.cycles = []
+
+    def run_cycle(self, timeframes=None, closed_only=False):
+        self.cycles.append((timeframes, closed_only))
+
+
+class FakeClock:
+    def __init__(self, start: datetime) -> None:
+        self.now = start
+        self.sleeps = []
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += timedelta(seconds=seconds)
+
+
+def make_scheduler(start: datetime, intrabar_seconds: float = 0.0) -> tuple[CandleCloseScheduler, FakeEngine, FakeClock]:
+    engine, clock = FakeEngine(), FakeClock(start)
+    scheduler = CandleCloseScheduler(
+        engine, ["15m", "1h"], grace_seconds=2, intrabar_seconds=intrabar_seconds, clock=clock, sleep=clock.sleep
+    )
+    return scheduler, engine, clock
+
+
+def test_wakes_after_each_close_and_runs_only_closed_timeframes():
+    scheduler, engine, clock = make_scheduler(datetime(2024, 1, 1, 0, 40, 0))
+
+    scheduler.step()  # arranque: processa tudo
+    assert clock.now == datetime(2024, 1, 1, 0, 45, 2)
+    scheduler.step()
+    assert clock.now == datetime(2024, 1, 1, 1, 0, 2)
+    scheduler.step()
+
+    assert engine.cycles == [(["15m", "1h"], True), (["15m"], True), (["15m", "1h"], True)]
+
+
+def test_cycle_duration_does_not_shift_the_next_wake():
+    scheduler, engine, clock = make_scheduler(datetime(2024, 1, 1, 0, 44, 0))
+    scheduler.step()
+    engine.run_cycle = lambda **kwargs: setattr(clock, "now", clock.now + timedelta(seconds=40))
+
+    scheduler.step()  # acorda 00:45:02, ciclo termina 00:45:42
+
+    assert clock.now == datetime(2024, 1, 1, 1, 0, 2)
+
+
+def test_overrun_catches_up_on_every_missed_close():
+    scheduler, engine, clock = make_scheduler(datetime(2024, 1, 1, 0, 40, 0))
+    scheduler.step()
+    clock.now = datetime(2024, 1, 1, 1, 20, 0)  # ciclos perdidos às 00:45, 01:00 e 01:15
+
+    assert scheduler.step() == ["15m", "1h"]
+    assert scheduler.step() == ["15m"]
+    assert clock.now == datetime(2024, 1, 1, 1, 45, 2)
+
+
+def test_intrabar_runs_on_forming_candle_between_closes():
+    scheduler, engine, clock = make_scheduler(datetime(2024, 1, 1, 0, 43, 30), intrabar_seconds=60)
+    scheduler.step()
+    assert clock.now == datetime(2024, 1, 1, 0, 44, 0)
+    scheduler.step()
+    assert clock.now == datetime(2024, 1, 1, 0, 45, 0)
+    scheduler.step()
+    assert clock.now == datetime(2024, 1, 1, 0, 45, 2)
+    scheduler.step()
+
+    assert engine.cycles[1:] == [(None, False), (None, False), (["15m"], True)]
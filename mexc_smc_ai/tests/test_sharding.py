@@ -0,0 +1,151 @@
+import multiprocessing
+from dataclasses import replace
+from datetime import datetime
+
+from app.core.metrics import METRICS, MetricsRegistry
+from app.core.models import OrderBlock, Trade
+from app.core.state import EngineState
+from app.data.rate_limit import SharedTokenBucket
+from app.engine.sharding import ShardCoordinator, apply_event, partition_symbols, shard_of
+
+
+SYMBOLS = [f"SYM{idx}USDT" for idx in range(40)]
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.alive = True
+        self.exitcode = None
+        self.terminated = False
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        self.terminated = True
+        self.alive = False
+
+    def join(self, timeout=None) -> None:
+        pass
+
+
+class FakeCoordinator(ShardCoordinator):
+    def _spawn(self, shard):
+        return FakeProcess()
+
+
+def make_ob(symbol: str) -> OrderBlock:
+    return OrderBlock(
+        id=f"{symbol}-ob",
+        symbol=symbol,
+        timeframe="15m",
+        direction="bull",
+        created_at=datetime(2024, 1, 1),
+        low=1.0,
+        high=2.0,
+    )
+
+
+def _drain_bucket(bucket: SharedTokenBucket, count: int) -> None:
+    for _ in range(count):
+        bucket.acquire()
+
+
+def test_partition_is_stable_and_disjoint():
+    parts = partition_symbols(SYMBOLS, 4)
+
+    assert sorted(symbol for part in parts for symbol in part) == sorted(SYMBOLS)
+    assert all(shard_of(symbol, 4) == shard for shard, part in enumerate(parts) for symbol in part)
+    assert shard_of("BTCUSDT", 4) == 2895029187 % 4  # zlib.crc32(b"BTCUSDT")
+
+
+def test_trade_updates_replace_the_previous_copy():
+    state = EngineState()
+    trade = Trade("t1", "BTCUSDT", "15m", "scalping", "buy", 100.0, 95.0, 110.0, "open", datetime(2024, 1, 1))
+    apply_event(state, "trade", trade)
+    apply_event(state, "trade", replace(trade, status="closed", exit_price=108.0))
+
+    assert len(state.trades) == 1
+    assert state.trades[0].status == "closed"
+
+
+def test_coordinator_applies_events_and_restarts_dead_shard():
+    config = {"symbols": SYMBOLS, "sharding": {"shards": 2, "restart_delay_seconds": 0}}
+    state = EngineState()
+    coordinator = FakeCoordinator(config, state)
+    coordinator.start()
+    dead, healthy = coordinator.assignments[0][0], coordinator.assignments[1][0]
+    for shard, symbol in ((0, dead), (1, healthy)):
+        coordinator.events.put((shard, "order_block", (f"{symbol}-15m", make_ob(symbol))))
+    coordinator.events.put((1, "heartbeat", {"busy_seconds": 0.0, "metrics": None}))
+    while sum(len(blocks) for blocks in state.order_blocks.values()) < 2:
+        coordinator.drain(timeout=1)
+
+    first = coordinator.processes[0]
+    first.alive = False
+
+    assert coordinator.check_workers() == [0]
+    assert coordinator.processes[0] is not first
+    assert state.order_blocks[f"{dead}-15m"] == []
+    assert [ob.symbol for ob in state.order_blocks[f"{healthy}-15m"]] == [healthy]
+    assert coordinator.restarts[0] == 1
+
+
+def test_hung_engine_is_restarted_and_its_open_trades_abandoned():
+    config = {"symbols": SYMBOLS, "sharding": {"shards": 2, "restart_delay_seconds": 0, "cycle_timeout_seconds": 60}}
+    state = EngineState()
+    coordinator = FakeCoordinator(config, state, clock=lambda: datetime(2024, 1, 2))
+    coordinator.start()
+    hung, healthy = coordinator.assignments[0][0], coordinator.assignments[1][0]
+    for shard, symbol in ((0, hung), (1, healthy)):
+        trade = Trade(f"t-{symbol}", symbol, "15m", "scalping", "buy", 100.0, 95.0, 110.0, "open", datetime(2024, 1, 1))
+        coordinator.events.put((shard, "trade", trade))
+    # A thread de heartbeat segue viva, mas o ciclo do motor não termina.
+    coordinator.events.put((0, "heartbeat", {"busy_seconds": 61.0, "metrics": None}))
+    coordinator.events.put((1, "heartbeat", {"busy_seconds": 2.0, "metrics": None}))
+    while coordinator.busy_seconds[0] == 0.0 or len(state.trades) < 2:
+        coordinator.drain(timeout=1)
+    first = coordinator.processes[0]
+
+    assert coordinator.check_workers() == [0]
+    assert first.terminated
+    trades = {trade.symbol: trade for trade in state.trades}
+    assert trades[hung].status == "abandoned" and trades[hung].closed_at == datetime(2024, 1, 2)
+    assert trades[healthy].status == "open"
+
+    # Cópia atrasada do worker antigo não reabre o trade.
+    coordinator.events.put((0, "trade", replace(trades[hung], status="open", closed_at=None)))
+    coordinator.drain(timeout=1)
+    assert {trade.symbol: trade for trade in state.trades}[hung].status == "abandoned"
+
+
+def test_heartbeat_metrics_are_exposed_with_the_shard_label():
+    config = {"symbols": SYMBOLS, "sharding": {"shards": 2}}
+    worker = MetricsRegistry(enabled=True)
+    worker.inc("mexc_requests_total", 3, outcome="ok")
+    worker.observe("engine_cycle_seconds", 0.2)
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        coordinator = FakeCoordinator(config, EngineState())
+        coordinator.events.put((1, "heartbeat", {"busy_seconds": 0.0, "metrics": worker.dump()}))
+        while not coordinator.drain(timeout=1):
+            pass
+        rendered = METRICS.render()
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+
+    assert 'mexc_requests_total{outcome="ok",shard="1"} 3' in rendered
+    assert 'engine_cycle_seconds_count{shard="1"} 1' in rendered
+
+
+def test_shared_bucket_budget_is_shared_across_processes():
+    context = multiprocessing.get_context("spawn")
+    bucket = SharedTokenBucket(capacity=100, window_seconds=1000, context=context)
+    child = context.Process(target=_drain_bucket, args=(bucket, 60))
+    child.start()
+    child.join(30)
+
+    assert child.exitcode == 0
+    assert 39 <= bucket.available < 41
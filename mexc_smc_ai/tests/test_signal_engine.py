@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from tests.helpers import make_engine
+
+
+def test_concurrent_cycle_fetches_in_parallel():
+    engine, processed = make_engine(workers=12)
+    engine.run_cycle()
+
+    assert engine.client.max_in_flight > 1
+    assert sorted(processed) == [
+        (symbol, "15m", "bullish") for symbol in ["AAAUSDT", "BBBUSDT", "CCCUSDT", "DDDUSDT"]
+    ]
+    assert engine.state.last_update is not None
+
+
+def test_serial_cycle_matches_concurrent_result():
+    engine, processed = make_engine(workers=1)
+    engine.run_cycle()
+
+    assert engine.client.max_in_flight == 1
+    assert len(processed) == 4
+
+
+def test_closed_only_cycle_drops_forming_candle_and_filters_timeframes():
+    engine, _ = make_engine(workers=1)
+    engine.config["symbols"] = ["AAAUSDT"]
+    engine.config["timeframes"]["execution_tf"] = ["5m", "15m"]
+    engine.client.delay = 0
+    # Relógio dentro do último candle devolvido pelo SlowClient (limit=200, um por minuto).
+    engine.clock = lambda: datetime(1970, 1, 1, 3, 19, 30)
+    seen = []
+    engine.process_symbol_timeframe = lambda symbol, tf, bias, frame=None: seen.append((tf, len(frame)))
+
+    engine.run_cycle(timeframes=["15m"], closed_only=True)
+    engine.run_cycle(timeframes=["15m"])
+
+    assert seen == [("15m", 199), ("15m", 200)]
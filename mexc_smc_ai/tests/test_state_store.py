@@ -0,0 +1,131 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from app.core.models import OrderBlock, Signal, Trade
+from app.core.state import EngineState
+from app.core.state_store import StateReader, StateWriter, attach_writer
+
+
+def make_signal(idx: int) -> Signal:
+    return Signal(
+        id=f"s{idx}",
+        symbol="BTCUSDT",
+        timeframe="15m",
+        profile="swing",
+        direction="buy",
+        score=0.7,
+        reason="probabilidade_ok",
+        timestamp=datetime(2024, 1, 1, 0, idx),
+        order_block_id="ob1",
+        confluences={"touch": "ok"},
+        status="enter",
+    )
+
+
+def make_trade() -> Trade:
+    return Trade(
+        id="t1",
+        symbol="BTCUSDT",
+        timeframe="15m",
+        profile="swing",
+        direction="buy",
+        entry_price=100.0,
+        stop_price=95.0,
+        target_price=110.0,
+        status="open",
+        opened_at=datetime(2024, 1, 1),
+        narrative=["Entrada simulada 100.00"],
+    )
+
+
+def make_state(tmp_path, **settings) -> tuple[EngineState, object, str]:
+    path = str(tmp_path / "state.db")
+    state = EngineState()
+    writer = attach_writer(state, {"backend": "sqlite", "path": path, "flush_ms": 20, **settings})
+    return state, writer, path
+
+
+def test_reader_mirrors_engine_state_incrementally(tmp_path):
+    state, writer, path = make_state(tmp_path)
+    reader = StateReader(path)
+    ob = OrderBlock(id="ob1", symbol="BTCUSDT", timeframe="15m", direction="bull", created_at=pd.Timestamp("2024-01-01", tz="UTC"), low=99, high=100)
+    trade = make_trade()
+    try:
+        state.add_order_block("BTCUSDT-15m", ob)
+        state.add_signal(make_signal(1))
+        state.add_trade(trade)
+        state.add_log({"event": "signal_generated", "probability": 0.7})
+        state.mark_updated(datetime(2024, 1, 1, 0, 15))
+        assert writer.flush(timeout=5)
+
+        mirror = reader.refresh()
+        assert [s.id for s in mirror.signals] == ["s1"]
+        assert mirror.signals[0].timestamp == datetime(2024, 1, 1, 0, 1)
+        assert mirror.trades[0].status == "open"
+        assert [o.id for o in mirror.order_blocks["BTCUSDT-15m"]] == ["ob1"]
+        assert mirror.logs[0]["event"] == "signal_generated"
+        assert mirror.last_update == datetime(2024, 1, 1, 0, 15)
+        version = reader.version
+        assert reader.refresh() is mirror and reader.version == version
+
+        trade.status, trade.exit_price, trade.pnl = "closed", 104.0, 4.0
+        state.update_trade(trade)
+        state.remove_order_block("BTCUSDT-15m", "ob1")
+        state.add_signal(make_signal(2))
+        assert writer.flush(timeout=5)
+
+        mirror = reader.refresh()
+        assert reader.version > version
+        assert [s.id for s in mirror.signals] == ["s2", "s1"]
+        assert len(mirror.trades) == 1 and mirror.trades[0].pnl == 4.0
+        assert mirror.order_blocks["BTCUSDT-15m"] == []
+        # Um leitor novo só carrega os OBs ainda ativos.
+        assert StateReader(path).refresh().order_blocks == {}
+    finally:
+        writer.stop()
+        reader.close()
+
+
+def test_writer_batches_and_trims(tmp_path):
+    state, writer, path = make_state(tmp_path, retention=100, batch_size=1000)
+    try:
+        for idx in range(1500):
+            state.add_log({"event": "tick", "idx": idx})
+        assert writer.flush(timeout=5)
+    finally:
+        writer.stop()
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT COUNT(*), MAX(json_extract(payload, '$.idx')) FROM logs").fetchone()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+    assert rows[0] <= 101 and rows[1] == 1499
+    assert writer.written == 1500
+
+
+def test_submit_snapshots_the_item_on_the_caller_thread(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = StateWriter(path, flush_seconds=0.02)
+    trade = make_trade()
+    writer.submit("trade", trade)
+    # O motor segue alterando o trade antes de a thread do writer gravá-lo.
+    trade.status = "closed"
+    trade.narrative.append("Saída simulada")
+    writer.start()
+    try:
+        assert writer.flush(timeout=5)
+    finally:
+        writer.stop()
+
+    reader = StateReader(path)
+    stored = reader.refresh().trades[0]
+    reader.close()
+    assert stored.status == "open"
+    assert stored.narrative == ["Entrada simulada 100.00"]
+
+
+def test_memory_backend_has_no_writer():
+    state = EngineState()
+    assert attach_writer(state, {"backend": "memory"}) is None
+    assert state.sink is None
@@ -0,0 +1,121 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from app.data.storage import HistoryStore, save_history
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def make_frame(size: int, start: str = "2024-01-01") -> pd.DataFrame:
+    frame = synthetic_ohlcv(size, start=start, freq="1min")
+    frame["symbol"] = "BTCUSDT"
+    frame["timeframe"] = "1m"
+    return frame
+
+
+def test_append_deduplicates_and_reads_ranges(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    frame = make_frame(100)
+
+    assert store.append("BTCUSDT", "1m", frame.iloc[:60]) == 60
+    assert store.append("BTCUSDT", "1m", frame.iloc[40:]) == 40
+    assert store.append("BTCUSDT", "1m", frame) == 0
+    assert store.rows("BTCUSDT", "1m") == 100
+
+    window = store.read("BTCUSDT", "1m", start=frame["open_time"].iloc[10], end=frame["open_time"].iloc[20])
+    assert len(window) == 10
+    assert (window["open_time"] == frame["open_time"].iloc[10:20].to_numpy()).all()
+    assert (window["close"].to_numpy() == frame["close"].iloc[10:20].to_numpy()).all()
+    assert store.last_open_time("BTCUSDT", "1m") == frame["open_time"].iloc[-1]
+
+
+def test_gaps_are_merged_in_order(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    frame = make_frame(50)
+    store.append("BTCUSDT", "1m", pd.concat([frame.iloc[:10], frame.iloc[30:]]))
+
+    assert store.append("BTCUSDT", "1m", frame.iloc[5:35]) == 20
+    stored = store.read("BTCUSDT", "1m")
+    assert (stored["open_time"] == frame["open_time"]).all()
+
+
+def test_interrupted_merge_keeps_the_previous_generation(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    frame = make_frame(50)
+    store.append("BTCUSDT", "1m", pd.concat([frame.iloc[:10], frame.iloc[30:]]))
+
+    def crash(*args):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(HistoryStore, "_commit", crash)
+    with pytest.raises(OSError):
+        store.append("BTCUSDT", "1m", frame.iloc[5:35])
+    monkeypatch.undo()
+
+    reopened = HistoryStore(str(tmp_path))
+    stored = reopened.read("BTCUSDT", "1m")
+    assert len(stored) == 30
+    assert (stored["open_time"].iloc[10:].to_numpy() == frame["open_time"].iloc[30:].to_numpy()).all()
+
+    assert reopened.append("BTCUSDT", "1m", frame.iloc[5:35]) == 20
+    assert (reopened.read("BTCUSDT", "1m")["open_time"] == frame["open_time"]).all()
+    assert reopened.append("BTCUSDT", "1m", make_frame(55).iloc[50:]) == 5
+    assert reopened.rows("BTCUSDT", "1m") == 55
+    assert sorted(path.name for path in (tmp_path / "BTCUSDT" / "1m").glob("*.bin")) == sorted(
+        f"{column}.1.bin" for column in ["open_time", "close_time", "open", "high", "low", "close", "volume"]
+    )
+
+
+def test_interrupted_write_is_truncated_to_complete_rows(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append("BTCUSDT", "1m", make_frame(10))
+    with open(tmp_path / "BTCUSDT" / "1m" / "open_time.bin", "ab") as handle:
+        handle.write(b"\0" * 8)
+
+    path = tmp_path / "BTCUSDT" / "1m" / "open_time.bin"
+    assert store.rows("BTCUSDT", "1m") == 10
+    assert len(store.read("BTCUSDT", "1m")) == 10
+    # Leitores não mexem nos arquivos; o reparo fica para a próxima escrita.
+    assert path.stat().st_size == 11 * 8
+
+    frame = make_frame(12)
+    assert store.append("BTCUSDT", "1m", frame) == 2
+    assert path.stat().st_size == 12 * 8
+    assert (store.read("BTCUSDT", "1m")["open_time"] == frame["open_time"]).all()
+
+
+def _append_one_by_one(root: str, size: int) -> None:
+    store = HistoryStore(root)
+    frame = make_frame(size)
+    for end in range(1, size + 1):
+        store.append("BTCUSDT", "1m", frame.iloc[end - 1 : end])
+
+
+def test_reads_from_another_process_never_lose_rows_being_appended(tmp_path):
+    size = 400
+    context = multiprocessing.get_context("spawn")
+    writer = context.Process(target=_append_one_by_one, args=(str(tmp_path), size))
+    writer.start()
+    store = HistoryStore(str(tmp_path))
+    expected = make_frame(size)
+    reads = 0
+    while writer.is_alive():
+        stored = store.read("BTCUSDT", "1m")
+        rows = len(stored)
+        assert (stored["open_time"].to_numpy() == expected["open_time"].iloc[:rows].to_numpy()).all()
+        assert (stored["close"].to_numpy() == expected["close"].iloc[:rows].to_numpy()).all()
+        reads += 1
+    writer.join(30)
+
+    assert writer.exitcode == 0
+    assert reads > 0
+    assert store.rows("BTCUSDT", "1m") == size
+
+
+def test_save_history_keeps_only_closed_candles(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    frame = make_frame(5)
+
+    assert save_history(store, frame, now=frame["close_time"].iloc[-1]) == 4
+    assert store.partitions() == [("BTCUSDT", "1m")]
@@ -0,0 +1,87 @@
+import json
+import threading
+
+from websockets.sync.server import serve
+
+from app.data.feed import CandleCache
+from app.data.stream import KlineStream, channel_name
+from tests.helpers import MINUTE_MS, FakeClient, make_kline
+
+
+def push(open_minute: int, close: float) -> str:
+    start = open_minute * 60
+    return json.dumps(
+        {
+            "c": channel_name("BTCUSDT", "1m"),
+            "d": {
+                "k": {"t": start, "T": start + 60, "o": close, "h": close, "l": close, "c": close, "v": 1, "i": "Min1"},
+                "e": "spot@public.kline.v3.api",
+            },
+            "s": "BTCUSDT",
+        }
+    )
+
+
+def test_stream_triggers_close_and_backfills_after_reconnect():
+    client = FakeClient(200)
+    connections = []
+    closes = []
+    done = threading.Event()
+
+    def handler(socket):
+        subscription = json.loads(socket.recv())
+        connections.append(subscription)
+        if len(connections) == 1:
+            socket.send(push(199, 150.0))
+            socket.send(push(200, 151.0))
+            client.klines.append(make_kline(200 * MINUTE_MS, 151.0))
+            client.klines.append(make_kline(201 * MINUTE_MS, 152.0))
+            return
+        done.set()
+        socket.recv()
+
+    with serve(handler, "localhost", 0) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.socket.getsockname()[1]
+        cache = CandleCache()
+        stream = KlineStream(
+            client=client,
+            cache=cache,
+            subscriptions=[("BTCUSDT", "1m")],
+            on_close=lambda symbol, tf: closes.append((symbol, tf)),
+            url=f"ws://localhost:{port}",
+            reconnect_seconds=0.05,
+            ping_seconds=1.0,
+        )
+        stream.start()
+        assert done.wait(timeout=5)
+        stream.stop()
+        server.shutdown()
+
+    assert connections[0]["params"] == [channel_name("BTCUSDT", "1m")]
+    assert closes == [("BTCUSDT", "1m"), ("BTCUSDT", "1m")]
+    frame = cache.frame("BTCUSDT", "1m")
+    assert frame["close"].iloc[-2] == 151.0
+    assert frame["open_time"].iloc[-1].value // 1_000_000 == 201 * MINUTE_MS
+
+
+def test_timeframe_aliases_share_one_channel():
+    client = FakeClient(200)
+    cache = CandleCache()
+    closes = []
+    stream = KlineStream(
+        client=client,
+        cache=cache,
+        subscriptions=[("BTCUSDT", "60m"), ("BTCUSDT", "1h"), ("BTCUSDT", "1h")],
+        on_close=lambda symbol, tf: closes.append(tf),
+    )
+    for timeframe in ("60m", "1h"):
+        cache.get(client, "BTCUSDT", timeframe)
+    message = json.loads(push(200, 151.0))
+    message["c"] = channel_name("BTCUSDT", "1h")
+
+    stream.handle_message(json.dumps(message))
+
+    assert list(stream.channels) == [channel_name("BTCUSDT", "60m")]
+    assert closes == ["60m", "1h"]
+    assert cache.frame("BTCUSDT", "1h")["close"].iloc[-1] == cache.frame("BTCUSDT", "60m")["close"].iloc[-1] == 151.0
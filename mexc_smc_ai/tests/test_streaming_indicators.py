@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from app.indicators.atr import compute_atr
+from app.indicators.rsi import compute_rsi
+from app.indicators.streaming import IncrementalATR, IncrementalRSI, IncrementalVolumeSpike, IndicatorCache
+from app.indicators.volume import volume_spike
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def test_incremental_indicators_match_batch_functions():
+    frame = synthetic_ohlcv(600, seed=11)
+    rsi, atr, spike = IncrementalRSI(14), IncrementalATR(14), IncrementalVolumeSpike(20, 1.5)
+    rsi_values, atr_values, spike_values = [], [], []
+    for row in frame.itertuples():
+        # Simula o candle em formação: primeiro um valor parcial, depois o fechamento.
+        rsi.update(row.open)
+        atr.update(row.open, row.open, row.open)
+        spike.update(row.volume / 2)
+        rsi_values.append(rsi.update(row.close, replace=True))
+        atr_values.append(atr.update(row.high, row.low, row.close, replace=True))
+        spike_values.append(spike.update(row.volume, replace=True))
+
+    assert np.allclose(rsi_values, compute_rsi(frame["close"]))
+    assert np.allclose(atr_values, compute_atr(frame))
+    assert spike_values == volume_spike(frame).tolist()
+
+
+def test_indicator_cache_processes_only_new_rows():
+    full = synthetic_ohlcv(300, seed=12)
+    cache = IndicatorCache()
+    cache.apply(full.iloc[:200].reset_index(drop=True))
+
+    updated = full.iloc[50:260].reset_index(drop=True)
+    result = cache.apply(updated)
+
+    expected_rsi = compute_rsi(full["close"]).iloc[50:260].to_numpy()
+    expected_atr = compute_atr(full).iloc[50:260].to_numpy()
+    assert np.allclose(result["rsi"], expected_rsi)
+    assert np.allclose(result["atr"], expected_atr)
+    assert len(result) == len(updated)
+
+
+def test_indicator_cache_reseeds_on_gap():
+    full = synthetic_ohlcv(300, seed=13)
+    cache = IndicatorCache()
+    cache.apply(full.iloc[:100].reset_index(drop=True))
+    window = full.iloc[150:300].reset_index(drop=True)
+
+    result = cache.apply(window)
+
+    assert np.allclose(result["rsi"], compute_rsi(window["close"]))
+    assert isinstance(result, pd.DataFrame)
+
+
+def test_indicator_cache_keeps_history_warmup_instead_of_batch_zeros():
+    full = synthetic_ohlcv(300, seed=14)
+    cache = IndicatorCache()
+    cache.apply(full.iloc[:200].reset_index(drop=True))
+    window = full.iloc[100:201].reset_index(drop=True)
+
+    result = cache.apply(window)
+
+    # Em lote, as primeiras linhas da janela viram 0; no cache vêm do histórico anterior.
+    assert (compute_atr(window).iloc[:13] == 0).all()
+    assert (result["atr"].iloc[:13] > 0).all()
+    assert np.allclose(result["atr"], compute_atr(full).iloc[100:201])
+
+
+def test_indicator_cache_writes_into_frame_and_survives_compaction():
+    full = synthetic_ohlcv(400, seed=15)
+    cache = IndicatorCache(max_rows=50)
+    cache.apply(full.iloc[:50].reset_index(drop=True))
+    for end in range(51, 401):
+        window = full.iloc[end - 50 : end].reset_index(drop=True)
+        result = cache.apply(window)
+        assert result is window
+
+    assert np.allclose(result["rsi"], compute_rsi(full["close"]).iloc[350:400])
+    assert result["volume_spike"].tolist() == volume_spike(full).iloc[350:400].tolist()
@@ -0,0 +1,80 @@
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pytest
+
+from app.data.shared_history import SharedHistory, attach_history
+from app.engine.sweep import parameter_sets, run_sweep, walk_forward_phases
+from tests.helpers import make_config, make_history
+
+
+def test_parameter_sets_grid_and_random():
+    grid = parameter_sets({"order_block.pivot_left": [2, 3], "order_block.min_move_atr": [1.0, 1.5]})
+    assert len(grid) == 4
+    assert {"order_block.pivot_left": 3, "order_block.min_move_atr": 1.0} in grid
+
+    sampled = parameter_sets({"order_block.pivot_left": {"min": 2, "max": 5}}, method="random", samples=10, seed=1)
+    assert len(sampled) == 10
+    assert all(2 <= values["order_block.pivot_left"] <= 5 for values in sampled)
+    assert sampled == parameter_sets({"order_block.pivot_left": {"min": 2, "max": 5}}, method="random", samples=10, seed=1)
+
+
+def test_walk_forward_phases_are_consecutive():
+    start, end = pd.Timestamp("2024-01-01", tz="UTC"), pd.Timestamp("2024-01-11", tz="UTC")
+    phases = walk_forward_phases(start, end, splits=2, train_ratio=0.6)
+
+    assert [(p.split, p.name) for p in phases] == [(0, "train"), (0, "test"), (1, "train"), (1, "test")]
+    assert phases[0].start == start and phases[-1].end == end
+    assert all(a.end == b.start for a, b in zip(phases, phases[1:]))
+    assert walk_forward_phases(start, end, splits=4, train_ratio=1.0)[0].name == "full"
+
+
+def test_shared_history_round_trip():
+    history = make_history(50)
+    with SharedHistory(history) as shared:
+        attached, blocks = attach_history(shared.specs)
+        frame = attached[("BTCUSDT", "15m")]
+        original = history[("BTCUSDT", "15m")]
+        assert (frame["open_time"] == original["open_time"]).all()
+        assert (frame["close"].to_numpy() == original["close"].to_numpy()).all()
+        assert (frame["close_time"] == original["close_time"]).all()
+        for block in blocks:
+            block.close()
+
+
+def test_shared_history_unlinks_created_blocks_on_failure(monkeypatch):
+    history = make_history(50)
+    history[("ETHUSDT", "15m")] = history[("BTCUSDT", "15m")].drop(columns=["volume"])
+    created = []
+    original = shared_memory.SharedMemory
+
+    def recording(*args, **kwargs):
+        block = original(*args, **kwargs)
+        created.append(block.name)
+        return block
+
+    monkeypatch.setattr(shared_memory, "SharedMemory", recording)
+    with pytest.raises(KeyError):
+        SharedHistory(history)
+    monkeypatch.undo()
+
+    assert len(created) == 3
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_sweep_ranks_combinations_across_processes(tmp_path):
+    settings = {
+        "params": {"order_block.min_move_atr": [0.8, 1.2]},
+        "workers": 2,
+        "metric": "total_return_pct",
+        "walk_forward": {"splits": 1, "train_ratio": 0.5},
+    }
+    ranked = run_sweep(make_config(), make_history(600), settings, output_dir=str(tmp_path))
+
+    assert sorted(ranked["order_block.min_move_atr"]) == [0.8, 1.2]
+    assert ranked["test_metric"].is_monotonic_decreasing
+    runs = pd.read_csv(tmp_path / "sweep_runs.csv")
+    assert len(runs) == 4
+    assert (tmp_path / "walk_forward.csv").exists()
@@ -0,0 +1,168 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ai.features import FEATURE_COLUMNS
+from app.ai.model import BaseModel, BudgetedModel, LinearArtifactModel, TreeArtifactModel, build_model, tree_proba
+from app.ai.training import (
+    build_training_set,
+    collect_training_set,
+    export_trees,
+    fit_model,
+    save_artifact,
+    simulate_exit,
+)
+from app.core.metrics import METRICS
+from tests.helpers import make_config, make_history
+
+
+def test_simulated_exit_follows_trailing_stop():
+    closes = np.array([100.0, 102.0, 104.0, 103.0, 99.0])
+    highs = closes + 0.5
+    lows = np.array([99.5, 101.5, 103.5, 102.0, 98.0])
+    atrs = np.ones(5)
+    # Stop sobe para 102.8 (104 - 1.2) e é atingido no candle 3.
+    assert simulate_exit(0, 98.0, True, highs, lows, closes, atrs) == pytest.approx(102.8)
+    # Sem saída até o fim do histórico.
+    assert np.isnan(simulate_exit(0, 0.0, True, highs, lows, closes, atrs * 200))
+
+
+def test_training_set_has_one_row_per_touch_and_profile():
+    config = make_config()
+    history = make_history(1500)
+    frame = history[("BTCUSDT", "15m")]
+    dataset = build_training_set(config, frame, [history[("BTCUSDT", "1h")]], "BTCUSDT", "15m")
+
+    assert dataset.features.shape[1] == len(FEATURE_COLUMNS)
+    assert len(dataset.features) > 0 and len(dataset.features) % 3 == 0
+    assert np.isfinite(dataset.features).all()
+    assert dataset.labels.tolist() == (dataset.pnl > 0).astype(int).tolist()
+    profiles = dataset.features[:, FEATURE_COLUMNS.index("profile_scalp") :].sum(axis=1)
+    assert (profiles == 1).all()
+
+
+def test_artifact_round_trip_matches_training_params(tmp_path):
+    config = make_config()
+    dataset = collect_training_set(config, make_history(1500))
+    params, metrics = fit_model(dataset, test_ratio=0.2)
+    assert metrics["samples"] == len(dataset.labels)
+    save_artifact(str(tmp_path), params, metrics)
+
+    model = build_model("logistic_regression", artifact_path=str(tmp_path))
+    assert isinstance(model.primary, LinearArtifactModel)
+    scores = model.predict_proba_batch(dataset.features)
+
+    from sklearn.linear_model import LogisticRegression
+
+    reference = LogisticRegression(max_iter=1000)
+    reference.coef_ = params["coef"][None, :]
+    reference.intercept_ = params["intercept"]
+    reference.classes_ = np.array([0, 1])
+    expected = reference.predict_proba((dataset.features - params["mean"]) / params["scale"])[:, 1]
+    assert scores == pytest.approx(expected)
+    assert model.predict_proba(dict(zip(FEATURE_COLUMNS, dataset.features[0]))) == pytest.approx(expected[0])
+
+
+def test_artifact_with_other_schema_is_neutral(tmp_path):
+    params = {name: np.zeros(3) for name in ("mean", "coef")}
+    params.update(scale=np.ones(3), intercept=np.zeros(1))
+    save_artifact(str(tmp_path), params, {})
+    metadata = (tmp_path / "metadata.json").read_text()
+    (tmp_path / "metadata.json").write_text(metadata.replace('"rsi",', ""))
+
+    model = build_model("logistic_regression", artifact_path=str(tmp_path))
+    assert model.predict_proba_batch(np.ones((2, len(FEATURE_COLUMNS)))).tolist() == [0.5, 0.5]
+
+
+def test_exported_trees_match_sklearn():
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(600, len(FEATURE_COLUMNS)))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    y = ((np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 2]) ** 2) > 0.5).astype(int)
+    model = HistGradientBoostingClassifier(max_iter=30, max_leaf_nodes=7).fit(X, y)
+
+    assert tree_proba(export_trees(model), X) == pytest.approx(model.predict_proba(X)[:, 1])
+
+
+def test_export_trees_fails_clearly_without_private_attributes():
+    class Unfitted:
+        pass
+
+    with pytest.raises(RuntimeError, match="scikit-learn"):
+        export_trees(Unfitted())
+
+
+def test_build_model_without_artifact_does_not_import_sklearn():
+    code = "import sys; from app.ai.model import build_model; build_model('hist_gradient_boosting'); print('sklearn' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[1]
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_boosting_artifact_is_served_by_numpy_scorer(tmp_path):
+    config = make_config()
+    dataset = collect_training_set(config, make_history(1500))
+    params, metrics = fit_model(dataset, model_type="hist_gradient_boosting", boosting={"max_iter": 20})
+    assert "test_accuracy" in metrics
+    save_artifact(str(tmp_path), params, metrics, model_type="hist_gradient_boosting")
+
+    model = build_model("hist_gradient_boosting", artifact_path=str(tmp_path), latency_budget_ms=50.0)
+    assert isinstance(model.primary, TreeArtifactModel)
+    assert isinstance(model.fallback, LinearArtifactModel)
+    scores = model.predict_proba_batch(dataset.features[:10])
+    assert scores == pytest.approx(tree_proba(params, dataset.features[:10]))
+    assert model.latency.calls == 1 and model.latency.rows == 10
+
+
+class SlowModel(BaseModel):
+    def __init__(self, delay_ms: float) -> None:
+        self.delay_ms = delay_ms
+
+    def predict_proba_batch(self, matrix):
+        import time
+
+        time.sleep(self.delay_ms / 1000)
+        return np.full(len(matrix), 0.9)
+
+
+class ConstantModel(BaseModel):
+    def predict_proba_batch(self, matrix):
+        return np.full(len(matrix), 0.1)
+
+
+def test_latency_budget_falls_back_and_probes_again():
+    primary = SlowModel(5.0)
+    model = BudgetedModel(primary, fallback=ConstantModel(), budget_ms=1.0, probe_every=2)
+    matrix = np.zeros((3, len(FEATURE_COLUMNS)))
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        assert model.predict_proba_batch(matrix).tolist() == [0.9] * 3
+        assert model.degraded
+        degraded = METRICS.snapshot()
+        assert model.predict_proba_batch(matrix).tolist() == [0.1] * 3
+        assert model.predict_proba_batch(matrix).tolist() == [0.1] * 3
+        primary.delay_ms = 0.0
+        assert model.predict_proba_batch(matrix).tolist() == [0.9] * 3
+        snapshot = METRICS.snapshot()
+    finally:
+        METRICS.enabled = False
+        METRICS.reset()
+
+    assert not model.degraded
+    assert model.latency.over_budget == 1 and model.latency.fallback_calls == 2
+    gauges = {item["name"]: item["value"] for item in snapshot["gauges"]}
+    counters = {item["name"]: item["value"] for item in snapshot["counters"] if item["name"].startswith("model_")}
+    histograms = {item["name"]: item["count"] for item in snapshot["histograms"] if item["name"].startswith("model_")}
+    assert {item["name"]: item["value"] for item in degraded["gauges"]}["model_degraded"] == 1
+    assert gauges["model_degraded"] == 0
+    assert gauges["model_seconds_per_prediction"] == pytest.approx(model.latency.ms_per_prediction / 1000)
+    assert counters == {"model_over_budget_total": 1, "model_fallback_total": 2}
+    assert histograms == {"model_latency_seconds": 2}
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.core.models import Trade
+from app.core.state import EngineState
+from app.ui.transforms import EquityCurve, model_summary, page, page_count, trades_frame
+
+
+def make_trade(idx: int, pnl: float | None) -> Trade:
+    opened = datetime(2024, 1, 1) + timedelta(hours=idx)
+    return Trade(
+        id=f"t{idx}",
+        symbol="BTCUSDT",
+        timeframe="15m",
+        profile="swing",
+        direction="buy",
+        entry_price=100.0,
+        stop_price=95.0,
+        target_price=110.0,
+        status="closed" if pnl is not None else "open",
+        opened_at=opened,
+        closed_at=opened + timedelta(minutes=30) if pnl is not None else None,
+        pnl=pnl,
+    )
+
+
+def test_equity_curve_only_appends_new_closed_trades():
+    trades = [make_trade(idx, float(idx % 3 - 1)) for idx in range(100)]
+    curve = EquityCurve()
+    assert curve.update(trades[:40] + [make_trade(200, None)]) == 40
+    first = curve.frame()
+    assert curve.update(trades[:40]) == 0
+    assert curve.frame() is first
+
+    assert curve.update(reversed(trades)) == 60
+    expected = pd.Series([t.pnl for t in trades]).cumsum()
+    assert curve.frame()["equity"].tolist() == expected.tolist()
+    assert curve.frame()["time"].is_monotonic_increasing
+
+
+def test_pagination_clamps_page_number():
+    frame = trades_frame([make_trade(idx, 1.0) for idx in range(120)])
+    assert page_count(len(frame), 50) == 3
+    assert len(page(frame, 3, 50)) == 20
+    assert page(frame, 9, 50).equals(page(frame, 3, 50))
+    assert page_count(0, 50) == 1
+
+
+def test_state_version_changes_with_every_update():
+    state = EngineState()
+    state.add_trade(make_trade(1, None))
+    state.update_trade(state.trades[0])
+    assert state.version == 2
+
+
+def test_model_summary_reads_latency_and_fallback_metrics():
+    snapshot = {
+        "gauges": [
+            {"name": "model_seconds_per_prediction", "labels": {}, "value": 0.0004},
+            {"name": "model_degraded", "labels": {}, "value": 1.0},
+        ],
+        "counters": [{"name": "model_fallback_total", "labels": {}, "value": 7.0}],
+    }
+
+    summary = model_summary(snapshot)
+
+    assert summary["ms_per_prediction"] == 0.4
+    assert summary["degraded"] and summary["fallback"] == 7 and summary["over_budget"] == 0
+    assert model_summary({})["ms_per_prediction"] is None